@@ -1,16 +1,54 @@
 import tkinter as tk
 from tkinter import messagebox, filedialog, ttk
 from tkinter import font as tkfont
+from array import array
+from collections import deque
+import argparse
+from bisect import bisect_left
 from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
+import difflib
+import gzip
+import hashlib
+import io
+import atexit
 import json
+import mmap
 import os
+import pickle
+import queue
 import re
+import shutil
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+import zlib
 
 try:
     import keyboard
 except ImportError:
     keyboard = None
 
+try:
+    import zstandard
+    ZSTD_ERRORS = (zstandard.ZstdError,)
+except ImportError:
+    zstandard = None
+    ZSTD_ERRORS = ()
+
+try:
+    import ctypes
+
+    user32 = ctypes.windll.user32
+except (ImportError, AttributeError):
+    user32 = None
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 HELP_DIR = os.path.join(BASE_DIR, "help")
@@ -20,7 +58,88 @@ BINDS_PATH = os.path.join(DATA_DIR, "binds.json")
 PHRASES_PATH = os.path.join(DATA_DIR, "phrases.json")
 AUTOFIX_PATH = os.path.join(DATA_DIR, "autofix.json")
 PROFILES_PATH = os.path.join(DATA_DIR, "profiles.json")
+HOTKEYS_PATH = os.path.join(DATA_DIR, "hotkeys.json")
+TRACES_DIR = os.path.join(DATA_DIR, "traces")
+TRACE_MAGIC = b"BTRC1\n"
+TRACE_REDACT = "\u2022"
+TRACE_TOKEN_LIMIT = 64
+TRACE_FLUSH_INTERVAL = 2000
+TRACE_REPLAY_TIME = "00:00"
+TRACE_REPLAY_DATE = "01.01.2000"
 LOG_PATH = os.path.join(DATA_DIR, "log.txt")
+LOG_FLUSH_INTERVAL = 2000
+LOG_BUFFER_LINES = 200
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 5
+VIEWER_CHUNK_BYTES = 1 << 20
+VIEWER_SEARCH_LINES = 4096
+VIEWER_HEAD_BYTES = 4096
+EVENTS_PATH = os.path.join(DATA_DIR, "events.sqlite3")
+EVENTS_FLUSH_INTERVAL = 2000
+EVENTS_MAX_AGE_DAYS = 180
+EVENTS_MAX_ROWS = 500000
+EVENT_EXPAND = "expand"
+STALLS_PATH = os.path.join(DATA_DIR, "stalls.json")
+STALL_HEARTBEAT_INTERVAL = 100
+STALL_THRESHOLD_MS = 500
+STALL_REPORTS_LIMIT = 20
+VARIABLE_RE = re.compile(r"%([^%]+)%")
+COUNTERS_FLUSH_INTERVAL = 2000
+CLIPBOARD_POLL_INTERVAL = 250
+HISTORY_LIMIT = 100
+HISTORY_REFS = ("commands_data", "phrases_data", "autofix:layout", "autofix:custom", "variables", "hotkeys_data")
+HOT_CACHE_SIZE = 24
+HOT_RECENT_SIZE = 8
+HOT_REBUILD_INTERVAL = 30000
+COMPLETION_POLL_INTERVAL = 60
+COMPLETION_LIMIT = 8
+COMPLETION_MIN_PREFIX = 2
+COMPLETION_HOTKEY = "ctrl+enter"
+COMPLETION_NEXT_HOTKEY = "ctrl+down"
+COMPLETION_PREV_HOTKEY = "ctrl+up"
+MACRO_CANCEL_HOTKEY = "ctrl+shift+backspace"
+WINDOW_TITLE_TTL = 0.5
+CHORD_RELEASE_TIMEOUT = 1000
+MODIFIER_BITS = {
+    "ctrl": 1,
+    "left ctrl": 1,
+    "right ctrl": 1,
+    "alt": 2,
+    "left alt": 2,
+    "right alt": 2,
+    "alt gr": 2,
+    "shift": 4,
+    "left shift": 4,
+    "right shift": 4,
+    "windows": 8,
+    "left windows": 8,
+    "right windows": 8,
+}
+MODIFIER_NAMES = ((1, "ctrl"), (2, "alt"), (4, "shift"), (8, "windows"))
+PARAM_SLOT_RE = re.compile(r"\{(\w+)(?::(\w+))?\}")
+PARAM_TYPES = {
+    "id": re.compile(r"\d+"),
+    "int": re.compile(r"-?\d+"),
+    "num": re.compile(r"-?\d+(?:[.,]\d+)?"),
+    "time": re.compile(r"\d+[smhdwсмчдн]?"),
+    "word": re.compile(r"[^\s{}%]+"),
+}
+MACRO_MAX_REPEAT = 100
+MACRO_TOKEN_RE = re.compile(r"(\{[^}]+\})")
+MACRO_WRITE, MACRO_KEY, MACRO_WAIT, MACRO_REPEAT, MACRO_LOOP, MACRO_IF = range(6)
+PACKS_DIR = os.path.join(DATA_DIR, "packs")
+CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+ADMIN_COMMANDS_PATH = os.path.join(HELP_DIR, "adminscommands.txt")
+ADMIN_CATALOG_CACHE_PATH = os.path.join(CACHE_DIR, "admincommands.json")
+STARTUP_CACHE_PATH = os.path.join(CACHE_DIR, "startup.bin")
+STARTUP_CACHE_MAGIC = b"BSTC3\n"
+ADMIN_LEVEL_RE = re.compile(r"admin level (\d+)", re.IGNORECASE)
+ADMIN_MACRO_BREAKS = {"enter", "wait", "repeat", "/repeat", "if", "/if"}
+PACKS_INDEX_PATH = os.path.join(PACKS_DIR, "index.json")
+
+SUBSCRIPTION_INTERVAL = 1800
+SUBSCRIPTION_TIMEOUT = 15
+SUBSCRIPTION_SECTIONS = ("binds", "phrases", "autofix")
 
 NAV_BUTTONS = [
     "Переменные",
@@ -34,6 +153,8 @@ EXTRA_SCREENS = [
     "Команды",
     "Фразы",
     "Автоисправление",
+    "Телепорты",
+    "Горячие клавиши",
 ]
 
 INFO_BUTTONS = [
@@ -92,6 +213,8 @@ def save_json(path, data):
 def ensure_dirs():
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(HELP_DIR, exist_ok=True)
+    os.makedirs(PACKS_DIR, exist_ok=True)
+    os.makedirs(CACHE_DIR, exist_ok=True)
 
     for _, name in INFO_BUTTONS:
         path = os.path.join(HELP_DIR, name)
@@ -117,6 +240,253 @@ def save_config(cfg):
     save_json(CONFIG_PATH, cfg)
 
 
+def log_segment_path(path, number):
+    base, ext = os.path.splitext(path)
+    return f"{base}.{number}{ext}.gz"
+
+
+class ChangeLog:
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def write(self, line):
+        with self._lock:
+            self._pending.append(line)
+            full = len(self._pending) >= LOG_BUFFER_LINES
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            data = "".join(self._pending)
+            self._pending = []
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+            if os.path.getsize(self.path) >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        for number in range(self.backup_count - 1, 0, -1):
+            src = log_segment_path(self.path, number)
+            if os.path.exists(src):
+                os.replace(src, log_segment_path(self.path, number + 1))
+        with open(self.path, "rb") as src, gzip.open(log_segment_path(self.path, 1), "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        with open(self.path, "w", encoding="utf-8"):
+            pass
+
+    def segments(self):
+        paths = [self.path]
+        for number in range(1, self.backup_count + 1):
+            path = log_segment_path(self.path, number)
+            if os.path.exists(path):
+                paths.append(path)
+        return paths
+
+
+class LineIndex:
+    def __init__(self, path, key, data=None):
+        self.path = path
+        self.key = key
+        self.data = data
+        self.offsets = array("Q", [0])
+        self.size = 0
+        self._scan(0, key[1] if data is None else len(data))
+        self.head = self._head()
+
+    def _open(self):
+        if self.data is not None:
+            return io.BytesIO(self.data)
+        return open(self.path, "rb")
+
+    def _scan(self, start, size):
+        offsets = self.offsets
+        with self._open() as f:
+            f.seek(start)
+            pos = start
+            while pos < size:
+                chunk = f.read(min(VIEWER_CHUNK_BYTES, size - pos))
+                if not chunk:
+                    break
+                found = chunk.find(b"\n")
+                while found != -1:
+                    offsets.append(pos + found + 1)
+                    found = chunk.find(b"\n", found + 1)
+                pos += len(chunk)
+        self.size = pos
+
+    def _head(self):
+        with self._open() as f:
+            return f.read(min(self._end(1), VIEWER_HEAD_BYTES))
+
+    def continues(self, key):
+        return key[2] == self.key[2] and key[1] >= self.size and self._head() == self.head
+
+    def extend(self, key):
+        self.key = key
+        self._scan(self.size, key[1])
+        return self
+
+    def __len__(self):
+        if self.offsets[-1] == self.size:
+            return len(self.offsets) - 1
+        return len(self.offsets)
+
+    def _end(self, line):
+        return self.offsets[line] if line < len(self.offsets) else self.size
+
+    def read(self, start, stop):
+        stop = min(stop, len(self))
+        if start >= stop:
+            return ""
+        begin = self.offsets[start]
+        with self._open() as f:
+            f.seek(begin)
+            data = f.read(self._end(stop) - begin)
+        return data.decode("utf-8", "replace").replace("\r\n", "\n").rstrip("\n")
+
+    def find(self, needle, start=0):
+        needle = needle.lower()
+        total = len(self)
+        if not needle or not total:
+            return -1
+        for first in (start, 0):
+            line = first
+            limit = total if first == start else min(start, total)
+            while line < limit:
+                stop = min(line + VIEWER_SEARCH_LINES, limit)
+                chunk = self.read(line, stop).lower()
+                pos = chunk.find(needle)
+                if pos != -1:
+                    return line + chunk.count("\n", 0, pos)
+                line = stop
+            if start == 0:
+                break
+        return -1
+
+
+_LINE_INDEXES = {}
+
+
+def open_line_index(path, append_only=False):
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    cached = _LINE_INDEXES.get(path)
+    if cached is not None and cached.key == key:
+        return cached
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            index = LineIndex(path, key, f.read())
+    elif append_only and cached is not None and cached.continues(key):
+        index = cached.extend(key)
+    else:
+        index = LineIndex(path, key)
+    _LINE_INDEXES[path] = index
+    return index
+
+
+class EventStore:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            ts REAL NOT NULL,
+            action TEXT NOT NULL,
+            trigger TEXT,
+            profile TEXT,
+            details TEXT
+        );
+        CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+        CREATE INDEX IF NOT EXISTS events_action_trigger ON events (action, trigger);
+        CREATE INDEX IF NOT EXISTS events_profile ON events (profile);
+    """
+
+    def __init__(self, path, max_age_days=EVENTS_MAX_AGE_DAYS, max_rows=EVENTS_MAX_ROWS):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_rows = max_rows
+        self._queue = deque()
+        self._conn = sqlite3.connect(path)
+        try:
+            self._conn.executescript(self.SCHEMA)
+            self.prune()
+        except sqlite3.Error:
+            self._conn.close()
+            raise
+
+    def prune(self):
+        removed = 0
+        with self._conn:
+            if self.max_age_days:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += self._conn.execute("DELETE FROM events WHERE ts < ?", (cutoff,)).rowcount
+            if self.max_rows:
+                removed += self._conn.execute(
+                    "DELETE FROM events WHERE id <= "
+                    "(SELECT id FROM events ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self.max_rows,),
+                ).rowcount
+        return removed
+
+    def record(self, action, trigger=None, profile=None, details=None):
+        self._queue.append((time.time(), action, trigger, profile, details))
+
+    def flush(self):
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.popleft())
+            except IndexError:
+                break
+        if rows:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO events (ts, action, trigger, profile, details) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return len(rows)
+
+    def trigger_counts(self, action=EVENT_EXPAND, profile=None):
+        query = "SELECT trigger, COUNT(*) FROM events WHERE action = ? AND trigger IS NOT NULL"
+        params = [action]
+        if profile is not None:
+            query += " AND profile = ?"
+            params.append(profile)
+        query += " GROUP BY trigger"
+        return dict(self._conn.execute(query, params).fetchall())
+
+    def top_triggers(self, limit=20, action=EVENT_EXPAND):
+        return self._conn.execute(
+            "SELECT trigger, COUNT(*) AS uses FROM events WHERE action = ? AND trigger IS NOT NULL "
+            "GROUP BY trigger ORDER BY uses DESC, trigger LIMIT ?",
+            (action, limit),
+        ).fetchall()
+
+    def hourly_usage(self, action=EVENT_EXPAND, since=None):
+        query = (
+            "SELECT CAST(strftime('%H', ts, 'unixepoch', 'localtime') AS INTEGER), COUNT(*) "
+            "FROM events WHERE action = ?"
+        )
+        params = [action]
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(since)
+        query += " GROUP BY 1"
+        hours = [0] * 24
+        for hour, count in self._conn.execute(query, params):
+            hours[hour] = count
+        return hours
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
 def style_entry(widget):
     widget.configure(
         bg=THEME["input"],
@@ -205,10 +575,2106 @@ RU_TO_EN = {
 RU_TO_EN.update({k.upper(): v.upper() for k, v in RU_TO_EN.items()})
 
 
+LAYOUT_RU_KEYS = (
+    "йцукенгшщзхъфывапролджэячсмитьбю.ё"
+    "ЙЦУКЕНГШЩЗХЪФЫВАПРОЛДЖЭЯЧСМИТЬБЮ,Ё"
+    '"№;:?/'
+)
+LAYOUT_EN_KEYS = (
+    "qwertyuiop[]asdfghjkl;'zxcvbnm,./`"
+    'QWERTYUIOP{}ASDFGHJKL:"ZXCVBNM<>?~'
+    "@#$^&|"
+)
+LAYOUT_TO_EN = str.maketrans(LAYOUT_RU_KEYS, LAYOUT_EN_KEYS)
+LAYOUT_TO_RU = str.maketrans(LAYOUT_EN_KEYS, LAYOUT_RU_KEYS)
+CYRILLIC_RE = re.compile("[а-яёА-ЯЁ]")
+
+
 def ru_to_en(text):
     return "".join(RU_TO_EN.get(ch, ch) for ch in text)
 
 
+def layout_twin(text):
+    if CYRILLIC_RE.search(text):
+        return text.translate(LAYOUT_TO_EN)
+    return text.translate(LAYOUT_TO_RU)
+
+
+def layout_key(text):
+    return text.translate(LAYOUT_TO_EN) if CYRILLIC_RE.search(text) else text
+
+
+def layout_variants(text):
+    twin = layout_twin(text)
+    return (text, twin) if twin != text else (text,)
+
+
+def exact_layout(text):
+    return (text,)
+
+
+IMPORT_KEEP_MINE = "mine"
+IMPORT_TAKE_THEIRS = "theirs"
+IMPORT_KEEP_BOTH = "both"
+
+IMPORT_POLICIES = [
+    (IMPORT_KEEP_MINE, "Оставить мои"),
+    (IMPORT_TAKE_THEIRS, "Взять из файла"),
+    (IMPORT_KEEP_BOTH, "Оставить оба (с суффиксом)"),
+]
+
+BUNDLE_LIST_SECTIONS = ("binds", "phrases", "profiles")
+
+
+class JsonStreamReader:
+    def __init__(self, f, chunk_size=65536):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch):
+        if self.peek() != ch:
+            raise ValueError(f"ожидался '{ch}'")
+        self._pos += 1
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise ValueError("неполный JSON")
+                continue
+            if end >= len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_json_bundle(path, chunk_size=65536):
+    with open(path, "r", encoding="utf-8-sig") as f:
+        reader = JsonStreamReader(f, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.read_value()
+            if not isinstance(key, str):
+                raise ValueError("ключ секции должен быть строкой")
+            reader.expect(":")
+            if key in BUNDLE_LIST_SECTIONS and reader.peek() == "[":
+                reader.expect("[")
+                if reader.peek() == "]":
+                    reader.expect("]")
+                else:
+                    while True:
+                        yield key, reader.read_value()
+                        if reader.peek() == ",":
+                            reader.expect(",")
+                            continue
+                        reader.expect("]")
+                        break
+            else:
+                yield key, reader.read_value()
+            if reader.peek() == ",":
+                reader.expect(",")
+                continue
+            reader.expect("}")
+            return
+
+
+BUNDLE_MAGIC = b"MRPB"
+BUNDLE_VERSION = 1
+BUNDLE_EXT = ".mrpb"
+BUNDLE_CODEC_GZIP = 1
+BUNDLE_CODEC_ZSTD = 2
+BUNDLE_HEADER = struct.Struct("<4sBBHII")
+BUNDLE_SECTIONS = {"config": 1, "binds": 2, "phrases": 3, "autofix": 4, "profiles": 5}
+BUNDLE_SECTION_NAMES = {value: key for key, value in BUNDLE_SECTIONS.items()}
+BUNDLE_AUTOFIX_GROUPS = ("layout", "custom")
+BUNDLE_SECTION_FIELDS = {1: 1, 2: 3, 3: 3, 4: 3, 5: 1}
+LIBRARY_MAGIC = b"MRPL"
+LIBRARY_VERSION = 1
+LIBRARY_EXT = ".mrpl"
+LIBRARY_HEADER = struct.Struct("<4sBBHII")
+LIBRARY_RECORD = struct.Struct("<IIH")
+LIBRARY_CLOSE_DELAY = 5000
+BUNDLE_FRAGMENT_RE = re.compile(r"(<@[&!]?\d+>|/[a-z]+ |%[^%\s]+%|\{[^}]+\})")
+
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("обрезанная запись")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+BUNDLE_PLACEHOLDER_BASE = 0xE000
+BUNDLE_TABLE_SIZE = 64
+BUNDLE_PLACEHOLDER_RE = re.compile(f"[{chr(BUNDLE_PLACEHOLDER_BASE)}-{chr(BUNDLE_PLACEHOLDER_BASE + BUNDLE_TABLE_SIZE - 1)}]")
+
+
+class BundleStringTable:
+    def __init__(self, strings, min_count=2, min_len=3):
+        counts = {}
+        for value in strings:
+            if BUNDLE_PLACEHOLDER_RE.search(value):
+                counts = {}
+                break
+            for part in BUNDLE_FRAGMENT_RE.findall(value):
+                counts[part] = counts.get(part, 0) + 1
+        self.entries = sorted(
+            (part for part, count in counts.items() if count >= min_count and len(part) >= min_len),
+            key=lambda part: -counts[part],
+        )[:BUNDLE_TABLE_SIZE]
+        self.index = {part: chr(BUNDLE_PLACEHOLDER_BASE + idx) for idx, part in enumerate(self.entries)}
+
+    def write(self, out):
+        _write_varint(out, len(self.entries))
+        for part in self.entries:
+            raw = part.encode("utf-8")
+            _write_varint(out, len(raw))
+            out += raw
+
+    def encode(self, value):
+        if not self.index:
+            return value
+        return BUNDLE_FRAGMENT_RE.sub(lambda m: self.index.get(m.group(0), m.group(0)), value)
+
+
+class BundleWriter:
+    def __init__(self, table):
+        self.table = table
+        self.sections = bytearray()
+        self.fields = []
+        self.blob = []
+
+    def add(self, section, strings, numbers=()):
+        for value in strings:
+            self.blob.append(self.table.encode(value))
+            self.fields.append(len(value))
+        self.fields.extend(numbers)
+        self.sections.append(BUNDLE_SECTIONS[section])
+
+    def body(self):
+        out = bytearray()
+        self.table.write(out)
+        _write_varint(out, len(self.sections))
+        out += self.sections
+        _write_varint(out, len(self.fields))
+        out += struct.pack(f"<{len(self.fields)}I", *self.fields)
+        out += "".join(self.blob).encode("utf-8")
+        return bytes(out)
+
+
+def _bundle_strings(payload):
+    if "config" in payload:
+        yield json.dumps(payload["config"], ensure_ascii=False)
+    for key in ("binds", "phrases"):
+        for item in payload.get(key, []):
+            entry = normalize_bind_entry(item)
+            if entry:
+                yield entry["trigger"]
+                yield entry["text"]
+    for group in BUNDLE_AUTOFIX_GROUPS:
+        for item in payload.get("autofix", {}).get(group, []):
+            entry = normalize_autofix_entry(item)
+            if entry:
+                yield entry["from"]
+                yield entry["to"]
+    for name in payload.get("profiles", []):
+        if isinstance(name, str):
+            yield name
+
+
+def encode_bundle(payload, codec=None):
+    if codec is None:
+        codec = BUNDLE_CODEC_ZSTD if zstandard is not None else BUNDLE_CODEC_GZIP
+    writer = BundleWriter(BundleStringTable(_bundle_strings(payload)))
+    if "config" in payload:
+        writer.add("config", [json.dumps(payload["config"], ensure_ascii=False)])
+    for section in ("binds", "phrases"):
+        for item in payload.get(section, []):
+            entry = normalize_bind_entry(item)
+            if entry:
+                writer.add(section, [entry["trigger"], entry["text"]], [entry.get("cursor_back", 0)])
+    for group_id, group in enumerate(BUNDLE_AUTOFIX_GROUPS):
+        for item in payload.get("autofix", {}).get(group, []):
+            entry = normalize_autofix_entry(item)
+            if entry:
+                writer.add("autofix", [entry["from"], entry["to"]], [group_id])
+    for name in payload.get("profiles", []):
+        if isinstance(name, str):
+            writer.add("profiles", [name])
+
+    raw = writer.body()
+    if codec == BUNDLE_CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError("нужен модуль zstandard")
+        compressed = zstandard.ZstdCompressor(level=19).compress(raw)
+    else:
+        compressed = gzip.compress(raw, compresslevel=9, mtime=0)
+    header = BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, codec, 0, zlib.crc32(raw), len(raw))
+    return header + compressed
+
+
+def save_bundle(path, payload, codec=None):
+    data = encode_bundle(payload, codec)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def is_binary_bundle(path):
+    with open(path, "rb") as f:
+        return f.read(len(BUNDLE_MAGIC)) == BUNDLE_MAGIC
+
+
+def read_bundle_body(path):
+    with open(path, "rb") as f:
+        header = f.read(BUNDLE_HEADER.size)
+        compressed = f.read()
+    if len(header) < BUNDLE_HEADER.size:
+        raise ValueError("обрезанный заголовок")
+    magic, version, codec, _reserved, checksum, size = BUNDLE_HEADER.unpack(header)
+    if magic != BUNDLE_MAGIC:
+        raise ValueError("неизвестный формат")
+    if version > BUNDLE_VERSION:
+        raise ValueError(f"неподдерживаемая версия {version}")
+    if codec == BUNDLE_CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError("нужен модуль zstandard")
+        try:
+            raw = zstandard.ZstdDecompressor().decompress(compressed, max_output_size=size)
+        except ZSTD_ERRORS as exc:
+            raise ValueError("повреждённые данные") from exc
+    elif codec == BUNDLE_CODEC_GZIP:
+        try:
+            raw = gzip.decompress(compressed)
+        except (OSError, EOFError, zlib.error) as exc:
+            raise ValueError("повреждённые данные") from exc
+    else:
+        raise ValueError(f"неизвестное сжатие {codec}")
+    if len(raw) != size or zlib.crc32(raw) != checksum:
+        raise ValueError("контрольная сумма не совпадает")
+    return raw
+
+
+def iter_binary_bundle(path):
+    data = read_bundle_body(path)
+    count, pos = _read_varint(data, 0)
+    table = []
+    for _ in range(count):
+        length, pos = _read_varint(data, pos)
+        table.append(data[pos : pos + length].decode("utf-8"))
+        pos += length
+
+    count, pos = _read_varint(data, pos)
+    sections = data[pos : pos + count]
+    pos += count
+    count, pos = _read_varint(data, pos)
+    layout = struct.Struct(f"<{count}I")
+    if len(data) < pos + layout.size or sum(BUNDLE_SECTION_FIELDS.get(sid, 0) for sid in sections) != count:
+        raise ValueError("обрезанная запись")
+    fields = layout.unpack_from(data, pos)
+    pos += layout.size
+
+    blob = data[pos:].decode("utf-8")
+    for idx, part in enumerate(table):
+        blob = blob.replace(chr(BUNDLE_PLACEHOLDER_BASE + idx), part)
+    offset = 0
+
+    def take(length):
+        nonlocal offset
+        value = blob[offset : offset + length]
+        offset += length
+        return value
+
+    idx = 0
+    for section_id in sections:
+        section = BUNDLE_SECTION_NAMES[section_id]
+        if section in ("binds", "phrases"):
+            item = {"trigger": take(fields[idx]), "text": take(fields[idx + 1])}
+            if fields[idx + 2]:
+                item["cursor_back"] = fields[idx + 2]
+            yield section, item
+        elif section == "autofix":
+            entry = {"from": take(fields[idx]), "to": take(fields[idx + 1])}
+            if fields[idx + 2] < len(BUNDLE_AUTOFIX_GROUPS):
+                yield section, {BUNDLE_AUTOFIX_GROUPS[fields[idx + 2]]: [entry]}
+        elif section == "profiles":
+            yield section, take(fields[idx])
+        elif section == "config":
+            yield section, json.loads(take(fields[idx]))
+        idx += BUNDLE_SECTION_FIELDS[section_id]
+
+
+def iter_bundle(path):
+    if is_binary_bundle(path):
+        return iter_binary_bundle(path)
+    return iter_json_bundle(path)
+
+
+def write_library(path, entries):
+    triggers = []
+    texts = bytearray()
+    table = bytearray()
+    seen = set()
+    for section, item in entries:
+        if section not in ("binds", "phrases"):
+            continue
+        entry = normalize_bind_entry(item)
+        if not entry or entry["trigger"] in seen or "\n" in entry["trigger"]:
+            continue
+        seen.add(entry["trigger"])
+        raw = entry["text"].encode("utf-8")
+        table += LIBRARY_RECORD.pack(len(texts), len(raw), min(int(entry.get("cursor_back") or 0), 0xFFFF))
+        texts += raw
+        triggers.append(entry["trigger"])
+    if len(texts) > 0xFFFFFFFF:
+        raise ValueError("библиотека слишком большая")
+    index = "\n".join(triggers).encode("utf-8")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(LIBRARY_HEADER.pack(LIBRARY_MAGIC, LIBRARY_VERSION, 0, 0, len(triggers), len(index)))
+        f.write(index)
+        f.write(table)
+        f.write(texts)
+    os.replace(tmp_path, path)
+    return len(triggers)
+
+
+def is_library(path):
+    with open(path, "rb") as f:
+        return f.read(len(LIBRARY_MAGIC)) == LIBRARY_MAGIC
+
+
+class LibraryPayload(dict):
+    __slots__ = ("library", "index")
+
+    def __init__(self, library, index, trigger):
+        super().__init__(trigger=trigger)
+        self.library = library
+        self.index = index
+
+    def __missing__(self, key):
+        if key == "text":
+            return self.library.text(self.index)
+        if key == "cursor_back":
+            return self.library.record(self.index)[2]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in ("text", "cursor_back") or super().__contains__(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class MappedLibrary:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse()
+        except (ValueError, UnicodeDecodeError, struct.error):
+            self.data.close()
+            raise
+
+    def _parse(self):
+        magic, version, _flags, _reserved, count, index_size = LIBRARY_HEADER.unpack_from(self.data, 0)
+        if magic != LIBRARY_MAGIC:
+            raise ValueError("неизвестный формат")
+        if version > LIBRARY_VERSION:
+            raise ValueError(f"неподдерживаемая версия {version}")
+        start = LIBRARY_HEADER.size
+        self.table = start + index_size
+        self.blob = self.table + count * LIBRARY_RECORD.size
+        if self.blob > len(self.data):
+            raise ValueError("обрезанная библиотека")
+        self.triggers = str(self.data[start : self.table], "utf-8").split("\n") if count else []
+        if len(self.triggers) != count:
+            raise ValueError("повреждённый индекс")
+
+    def record(self, index):
+        return LIBRARY_RECORD.unpack_from(self.data, self.table + index * LIBRARY_RECORD.size)
+
+    def text(self, index):
+        offset, length, _cursor_back = self.record(index)
+        start = self.blob + offset
+        if start + length > len(self.data):
+            raise ValueError("обрезанная библиотека")
+        return str(self.data[start : start + length], "utf-8")
+
+    def payloads(self):
+        for index, trigger in enumerate(self.triggers):
+            yield trigger, LibraryPayload(self, index, trigger)
+
+    def close(self):
+        self.data.close()
+
+
+def pack_cache_path(source):
+    name = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(PACKS_DIR, f"{name}.pack")
+
+
+def is_remote_source(source):
+    return bool(re.match(r"https?://", source, re.IGNORECASE))
+
+
+def fetch_pack(source, meta, timeout=SUBSCRIPTION_TIMEOUT):
+    if not is_remote_source(source):
+        path = os.path.expanduser(source)
+        st = os.stat(path)
+        new_meta = {"mtime": st.st_mtime, "size": st.st_size}
+        changed = new_meta["mtime"] != meta.get("mtime") or new_meta["size"] != meta.get("size")
+        return changed, path, new_meta
+
+    path = pack_cache_path(source)
+    request = urllib.request.Request(source, headers={"User-Agent": "MajesticRP-Binder"})
+    if meta.get("etag"):
+        request.add_header("If-None-Match", meta["etag"])
+    if meta.get("last_modified"):
+        request.add_header("If-Modified-Since", meta["last_modified"])
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read()
+            headers = response.headers
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            return False, path, meta
+        raise
+    new_meta = {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "sha1": hashlib.sha1(body).hexdigest(),
+    }
+    if new_meta["sha1"] == meta.get("sha1") and os.path.exists(path):
+        return False, path, new_meta
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+    return True, path, new_meta
+
+
+def sync_packs(sources, index, results):
+    try:
+        for source in sources:
+            meta = index.get(source, {})
+            try:
+                changed, path, new_meta = fetch_pack(source, meta)
+                entries = list(iter_bundle(path)) if changed else None
+                results.put((source, new_meta, entries, None))
+            except Exception as exc:
+                results.put((source, meta, None, str(exc) or type(exc).__name__))
+    finally:
+        results.put(None)
+
+
+def normalize_bind_entry(item):
+    if not isinstance(item, dict):
+        return None
+    trigger = item.get("trigger")
+    text = item.get("text") or item.get("response")
+    if not isinstance(trigger, str) or not trigger.strip():
+        return None
+    if " " in trigger.strip():
+        if not is_param_trigger(trigger):
+            return None
+        try:
+            parse_param_trigger(trigger)
+        except ValueError:
+            return None
+    if not isinstance(text, str) or not text.strip():
+        return None
+    cursor_back = item.get("cursor_back") or 0
+    if isinstance(cursor_back, str) and cursor_back.isdigit():
+        cursor_back = int(cursor_back)
+    if isinstance(cursor_back, bool) or not isinstance(cursor_back, int) or cursor_back < 0:
+        return None
+    entry = {"trigger": trigger.strip(), "text": text}
+    if cursor_back:
+        entry["cursor_back"] = cursor_back
+    return entry
+
+
+def normalize_autofix_entry(item):
+    if not isinstance(item, dict):
+        return None
+    from_val = item.get("from")
+    to_val = item.get("to")
+    if not isinstance(from_val, str) or not from_val.strip():
+        return None
+    if not isinstance(to_val, str) or not to_val.strip():
+        return None
+    return {"from": from_val, "to": to_val}
+
+
+class RecordMerger:
+    def __init__(self, items, key_field, normalize, policy, allow_suffix=True):
+        self.items = list(items)
+        self.key_field = key_field
+        self.normalize = normalize
+        self.policy = policy
+        self.allow_suffix = allow_suffix
+        self.index = {}
+        for idx, item in enumerate(self.items):
+            key = item.get(key_field) if isinstance(item, dict) else None
+            if key:
+                self.index[key] = idx
+        self.touched = set()
+        self.stats = {
+            "added": 0,
+            "replaced": 0,
+            "renamed": 0,
+            "skipped": 0,
+            "unchanged": 0,
+            "invalid": 0,
+        }
+        self.conflicts = []
+
+    def _unique_key(self, key):
+        head, sep, tail = key.partition(" ")
+        n = 2
+        while f"{head}{n}{sep}{tail}" in self.index:
+            n += 1
+        return f"{head}{n}{sep}{tail}"
+
+    def _append(self, entry):
+        key = entry[self.key_field]
+        self.index[key] = len(self.items)
+        self.items.append(entry)
+        self.touched.add(key)
+
+    def add(self, item):
+        entry = self.normalize(item)
+        if entry is None:
+            self.stats["invalid"] += 1
+            return
+        key = entry[self.key_field]
+        idx = self.index.get(key)
+        if idx is None:
+            self._append(entry)
+            self.stats["added"] += 1
+            return
+        current = self.normalize(self.items[idx])
+        if current == entry:
+            self.stats["unchanged"] += 1
+            return
+        self.conflicts.append((key, self.items[idx], entry))
+        if self.policy == IMPORT_TAKE_THEIRS:
+            self.items[idx] = entry
+            self.touched.add(key)
+            self.stats["replaced"] += 1
+        elif self.policy == IMPORT_KEEP_BOTH and self.allow_suffix:
+            entry[self.key_field] = self._unique_key(key)
+            self._append(entry)
+            self.stats["renamed"] += 1
+        else:
+            self.stats["skipped"] += 1
+
+    @property
+    def changed(self):
+        return bool(self.touched)
+
+
+def merge_config(current, incoming, policy):
+    result = dict(current)
+    variables = dict(current.get("variables", {}))
+    conflicts = []
+    for key, value in incoming.items():
+        if key == "variables" and isinstance(value, dict):
+            for name, var_value in value.items():
+                if name in variables and variables[name] != var_value:
+                    conflicts.append((name, variables[name], var_value))
+                    if policy != IMPORT_TAKE_THEIRS:
+                        continue
+                variables[name] = var_value
+            continue
+        if key not in result or policy == IMPORT_TAKE_THEIRS:
+            result[key] = value
+    result["variables"] = variables
+    return result, conflicts
+
+
+TELEPORT_RE = re.compile(
+    r"^\s*/ctp\s+(-?\d+(?:\.\d+)?)\s+(-?\d+(?:\.\d+)?)\s+(-?\d+(?:\.\d+)?)",
+    re.IGNORECASE,
+)
+TELEPORT_CELL_SIZE = 250.0
+TELEPORT_DUPLICATE_DISTANCE = 5.0
+
+
+def parse_teleport(text):
+    match = TELEPORT_RE.match(text or "")
+    if not match:
+        return None
+    return tuple(float(value) for value in match.groups())
+
+
+class TeleportCatalog:
+    def __init__(self, items=(), cell_size=TELEPORT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.entries = []
+        self.grid = {}
+        for item in items:
+            if not isinstance(item, dict) or item.get("alias_of"):
+                continue
+            coords = parse_teleport(item.get("text", ""))
+            if coords:
+                self.add(item.get("trigger", ""), coords, item.get("text", ""))
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def add(self, trigger, coords, text=""):
+        idx = len(self.entries)
+        self.entries.append((trigger, coords, text))
+        self.grid.setdefault(self._cell(coords[0], coords[1]), []).append(idx)
+        return idx
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def distance(a, b):
+        return ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2) ** 0.5
+
+    def within(self, coords, radius):
+        cx0, cy0 = self._cell(coords[0] - radius, coords[1] - radius)
+        cx1, cy1 = self._cell(coords[0] + radius, coords[1] + radius)
+        result = []
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for idx in self.grid.get((cx, cy), ()):
+                    dist = self.distance(coords, self.entries[idx][1])
+                    if dist <= radius:
+                        result.append((dist, idx))
+        result.sort()
+        return result
+
+    @staticmethod
+    def _ring(cx, cy, ring):
+        if ring == 0:
+            yield cx, cy
+            return
+        for x in range(cx - ring, cx + ring + 1):
+            yield x, cy - ring
+            yield x, cy + ring
+        for y in range(cy - ring + 1, cy + ring):
+            yield cx - ring, y
+            yield cx + ring, y
+
+    @staticmethod
+    def source_key(trigger):
+        return layout_key(trigger)
+
+    def nearest(self, coords, count=1):
+        if not self.entries:
+            return []
+        cx, cy = self._cell(coords[0], coords[1])
+        cells = list(self.grid)
+        max_ring = max(max(abs(x - cx), abs(y - cy)) for x, y in cells)
+        found = []
+        for ring in range(max_ring + 1):
+            if (2 * ring + 1) ** 2 > len(self.entries) + 8:
+                found = sorted((self.distance(coords, entry[1]), idx) for idx, entry in enumerate(self.entries))
+                break
+            for cell in self._ring(cx, cy, ring):
+                for idx in self.grid.get(cell, ()):
+                    found.append((self.distance(coords, self.entries[idx][1]), idx))
+            found.sort()
+            if len(found) >= count and found[count - 1][0] <= ring * self.cell_size:
+                break
+        return found[:count]
+
+    def duplicate_groups(self, tolerance=TELEPORT_DUPLICATE_DISTANCE):
+        seen = set()
+        groups = []
+        for idx, (_trigger, coords, _text) in enumerate(self.entries):
+            if idx in seen:
+                continue
+            group = []
+            places = set()
+            for _dist, other in self.within(coords, tolerance):
+                if other in seen:
+                    continue
+                trigger, other_coords, _text = self.entries[other]
+                place = (self.source_key(trigger), other_coords)
+                if place in places:
+                    seen.add(other)
+                    continue
+                places.add(place)
+                group.append(other)
+            if len(group) > 1:
+                group.sort()
+                groups.append(group)
+                seen.update(group)
+        return groups
+
+
+class TriggerTrie:
+    def __init__(self, triggers=()):
+        self.root = {}
+        for trigger in triggers:
+            self.insert(trigger)
+
+    def insert(self, trigger):
+        node = self.root
+        for ch in trigger:
+            node = node.setdefault(ch, {})
+        node[""] = trigger
+
+    def remove(self, trigger):
+        path = []
+        node = self.root
+        for ch in trigger:
+            if ch not in node:
+                return
+            path.append((node, ch))
+            node = node[ch]
+        node.pop("", None)
+        for parent, ch in reversed(path):
+            if parent[ch]:
+                break
+            del parent[ch]
+
+    def patched(self, added=(), removed=()):
+        clone = TriggerTrie()
+        clone.root = dict(self.root)
+        fresh = {id(clone.root)}
+
+        def walk(trigger, create):
+            path = []
+            node = clone.root
+            for ch in trigger:
+                child = node.get(ch)
+                if child is None:
+                    if not create:
+                        return None
+                    child = {}
+                elif id(child) not in fresh:
+                    child = dict(child)
+                fresh.add(id(child))
+                node[ch] = child
+                path.append((node, ch))
+                node = child
+            return node, path
+
+        for trigger in removed:
+            found = walk(trigger, False)
+            if found is None:
+                continue
+            node, path = found
+            node.pop("", None)
+            for parent, ch in reversed(path):
+                if parent[ch]:
+                    break
+                del parent[ch]
+        for trigger in added:
+            node, _path = walk(trigger, True)
+            node[""] = trigger
+        return clone
+
+    def complete(self, prefix, limit=COMPLETION_LIMIT):
+        node = self.root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return []
+        result = []
+        pending = deque([node])
+        while pending and len(result) < limit:
+            node = pending.popleft()
+            for ch, child in node.items():
+                if ch == "":
+                    result.append(child)
+                else:
+                    pending.append(child)
+        return result[:limit]
+
+
+def template_variables(text):
+    if "%" not in text:
+        return set()
+    return set(VARIABLE_RE.findall(text))
+
+
+class VariableIndex:
+    def __init__(self, mapping=None):
+        self.users = {}
+        self.uses = {}
+        for trigger, payload in (mapping or {}).items():
+            self.update(trigger, payload["text"])
+
+    def copy(self):
+        clone = VariableIndex()
+        clone.users = {name: set(triggers) for name, triggers in self.users.items()}
+        clone.uses = dict(self.uses)
+        return clone
+
+    def update(self, trigger, text=None):
+        for name in self.uses.pop(trigger, ()):
+            users = self.users.get(name)
+            if users is not None:
+                users.discard(trigger)
+                if not users:
+                    del self.users[name]
+        names = template_variables(text) if text else set()
+        if names:
+            self.uses[trigger] = names
+            for name in names:
+                self.users.setdefault(name, set()).add(trigger)
+
+    def triggers(self, name):
+        return sorted(self.users.get(name, ()))
+
+
+class VariableResolvers:
+    def __init__(self):
+        self.exact = {}
+        self.prefixed = {}
+        self.static = set()
+
+    def register(self, name, func, prefix=False, static=False):
+        (self.prefixed if prefix else self.exact)[name] = func
+        if static:
+            self.static.add(name)
+
+    def resolve(self, key):
+        func = self.exact.get(key)
+        if func is not None:
+            return func("")
+        name, sep, arg = key.partition(":")
+        func = self.prefixed.get(name) if sep else None
+        if func is not None:
+            return func(arg)
+        return _MISSING
+
+    def names(self):
+        return [f"%{name}%" for name in self.exact] + [f"%{name}:имя%" for name in self.prefixed]
+
+
+def _macro_number(word, arg, low, high):
+    if not arg.isdigit() or not low <= int(arg) <= high:
+        raise ValueError(f"{{{word}}} ожидает число от {low} до {high}")
+    return int(arg)
+
+
+@lru_cache(maxsize=512)
+def compile_macro(text):
+    ops = []
+    blocks = []
+    for part in MACRO_TOKEN_RE.split(text.replace("\r\n", "\n")):
+        if not part:
+            continue
+        if part.startswith("{") and part.endswith("}"):
+            body = part[1:-1].strip()
+            if not body:
+                continue
+            word, _sep, arg = body.partition(" ")
+            word = word.lower()
+            arg = arg.strip()
+            if word == "wait":
+                ops.append((MACRO_WAIT, _macro_number(word, arg, 0, 60000)))
+            elif word == "repeat":
+                ops.append((MACRO_REPEAT, _macro_number(word, arg, 1, MACRO_MAX_REPEAT)))
+                blocks.append(("repeat", len(ops)))
+            elif word == "if":
+                if not arg:
+                    raise ValueError("{if} ожидает имя переменной")
+                blocks.append(("if", len(ops)))
+                ops.append((MACRO_IF, arg.strip("%"), None))
+            elif word in ("/repeat", "/if"):
+                if not blocks or blocks[-1][0] != word[1:]:
+                    raise ValueError(f"{{{word}}} без открывающего блока")
+                kind, pos = blocks.pop()
+                if kind == "repeat":
+                    ops.append((MACRO_LOOP, pos))
+                else:
+                    ops[pos] = (MACRO_IF, ops[pos][1], len(ops))
+            else:
+                ops.append((MACRO_KEY, body.lower()))
+            continue
+        for number, line in enumerate(part.split("\n")):
+            if number:
+                ops.append((MACRO_KEY, "enter"))
+            if line:
+                ops.append((MACRO_WRITE, line))
+    if blocks:
+        raise ValueError(f"не закрыт блок {{{blocks[-1][0]}}}")
+    return tuple(ops)
+
+
+def run_macro(ops, write, send, wait, check, cancelled):
+    counters = []
+    pc = 0
+    while pc < len(ops):
+        if cancelled():
+            return False
+        op = ops[pc]
+        kind = op[0]
+        if kind == MACRO_WRITE:
+            write(op[1])
+        elif kind == MACRO_KEY:
+            send(op[1])
+        elif kind == MACRO_WAIT:
+            if not wait(op[1]):
+                return False
+        elif kind == MACRO_REPEAT:
+            counters.append(op[1])
+        elif kind == MACRO_LOOP:
+            counters[-1] -= 1
+            if counters[-1] > 0:
+                pc = op[1]
+                continue
+            counters.pop()
+        elif kind == MACRO_IF and not check(op[1]):
+            pc = op[2]
+            continue
+        pc += 1
+    return True
+
+
+class MacroRunner:
+    def __init__(self, report=None):
+        self.report = report
+        self.jobs = queue.Queue()
+        self.generation = 0
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def submit(self, job):
+        self.jobs.put((self.generation, job))
+
+    def cancel(self):
+        self.generation += 1
+        self.wake.set()
+
+    def cancelled(self, generation):
+        return generation != self.generation
+
+    def sleep(self, generation, ms):
+        if ms:
+            self.wake.wait(ms / 1000)
+        return generation == self.generation
+
+    def _loop(self):
+        while True:
+            generation, job = self.jobs.get()
+            self.wake.clear()
+            try:
+                job(generation)
+            except Exception as exc:
+                if self.report is not None:
+                    self.report("Ошибка макроса", f"{type(exc).__name__}: {exc}")
+
+
+def parse_admin_commands(lines):
+    commands = []
+    level = 0
+    for line in lines:
+        header = ADMIN_LEVEL_RE.search(line)
+        if header:
+            level = int(header.group(1))
+            continue
+        line = line.strip()
+        if not line.startswith("/"):
+            continue
+        signature, _sep, desc = line.partition("—")
+        args = []
+        for group in re.findall(r"\[([^\]]+)\]", signature):
+            args.extend(group.split())
+        for name in re.findall(r"/[^\s|\[\]]+", re.sub(r"\[[^\]]*\]", " ", signature)):
+            commands.append({"name": name.lower(), "args": args, "level": level, "desc": desc.strip()})
+    return commands
+
+
+class AdminCatalog:
+    def __init__(self, commands, key=None):
+        self.key = key
+        self.commands = {}
+        for command in commands:
+            self.commands.setdefault(command["name"], command)
+        self.names = sorted(self.commands)
+
+    def get(self, name):
+        return self.commands.get(name.lower())
+
+    def complete(self, prefix, limit=COMPLETION_LIMIT):
+        prefix = prefix.lower()
+        result = []
+        pos = bisect_left(self.names, prefix)
+        while pos < len(self.names) and len(result) < limit and self.names[pos].startswith(prefix):
+            result.append(self.names[pos])
+            pos += 1
+        return result
+
+    @staticmethod
+    def signature(command):
+        return " ".join(f"[{arg}]" for arg in command["args"])
+
+    def check_text(self, text):
+        def token(match):
+            word = match.group(1).strip().split(" ")[0].lower()
+            return "\n" if word in ADMIN_MACRO_BREAKS else "x"
+
+        segments = re.sub(r"\{([^}]*)\}", token, text).split("\n")
+        problems = []
+        for index, segment in enumerate(segments):
+            words = segment.split()
+            if not words or not words[0].startswith("/"):
+                continue
+            command = self.get(words[0])
+            if command is None or not command["args"]:
+                continue
+            given = len(words) - 1
+            expected = len(command["args"])
+            if given < expected and index != len(segments) - 1:
+                problems.append(f"{words[0]}: аргументов {given}, ожидается {expected} {self.signature(command)}")
+        return problems
+
+
+def load_admin_catalog(path=ADMIN_COMMANDS_PATH, cache_path=ADMIN_CATALOG_CACHE_PATH):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return AdminCatalog([])
+    key = [stat.st_mtime_ns, stat.st_size]
+    cached = load_json(cache_path, {})
+    if isinstance(cached, dict) and cached.get("key") == key:
+        return AdminCatalog(cached.get("commands", []), key)
+    with open(path, "r", encoding="utf-8") as f:
+        commands = parse_admin_commands(f)
+    try:
+        save_json(cache_path, {"key": key, "commands": commands})
+    except OSError:
+        pass
+    return AdminCatalog(commands, key)
+
+
+def parse_chord(chord):
+    parts = [part.strip().lower() for part in chord.split("+") if part.strip()]
+    if not parts:
+        raise ValueError("сочетание не задано")
+    mask = 0
+    for part in parts[:-1]:
+        bit = MODIFIER_BITS.get(part)
+        if bit is None:
+            raise ValueError(f"неизвестный модификатор «{part}»")
+        mask |= bit
+    key = parts[-1]
+    if key in MODIFIER_BITS:
+        raise ValueError("последней должна быть обычная клавиша")
+    if not mask:
+        raise ValueError("нужен хотя бы один модификатор")
+    return mask, key
+
+
+def format_chord(mask, key):
+    return "+".join([name for bit, name in MODIFIER_NAMES if mask & bit] + [key])
+
+
+def build_chord_table(items):
+    table = {}
+    for item in items:
+        if not isinstance(item, dict) or not item.get("text"):
+            continue
+        try:
+            chord = parse_chord(item.get("hotkey", ""))
+        except ValueError:
+            continue
+        table[chord] = {"text": item["text"], "cursor_back": int(item.get("cursor_back") or 0)}
+    return table
+
+
+def is_param_trigger(trigger):
+    return "{" in trigger
+
+
+def parse_param_trigger(trigger):
+    tokens = []
+    names = set()
+    for word in trigger.split():
+        slot = PARAM_SLOT_RE.fullmatch(word)
+        if slot is None:
+            if "{" in word or "}" in word:
+                raise ValueError(f"аргумент «{word}» должен быть отдельным словом")
+            tokens.append((None, word))
+            continue
+        name, kind = slot.group(1), slot.group(2)
+        kind = kind or (name if name in PARAM_TYPES else "word")
+        if kind not in PARAM_TYPES:
+            raise ValueError(f"неизвестный тип «{kind}», доступны: {', '.join(PARAM_TYPES)}")
+        if name in names:
+            raise ValueError(f"аргумент «{name}» повторяется")
+        if not tokens:
+            raise ValueError("триггер должен начинаться со слова")
+        names.add(name)
+        tokens.append((name, kind))
+    if not names:
+        raise ValueError("в триггере нет аргументов")
+    return tokens
+
+
+def fill_param_text(text, args):
+    return PARAM_SLOT_RE.sub(lambda m: args.get(m.group(1), m.group(0)), text)
+
+
+class ParamMatcher:
+    def __init__(self, entries=(), variants=None):
+        self.variants = variants or exact_layout
+        self.triggers = set()
+        self.root = {}
+        self.sizes = ()
+        self.first_lengths = ()
+        for trigger, payload in entries:
+            self.add(trigger, payload)
+
+    @staticmethod
+    def _node():
+        return {"lit": {}, "slots": [], "end": None}
+
+    def _edge(self, edges, word):
+        keys = self.variants(word)
+        node = next((edges[key] for key in keys if key in edges), None) or self._node()
+        for key in keys:
+            edges.setdefault(key, node)
+        return node
+
+    def add(self, trigger, payload):
+        tokens = parse_param_trigger(trigger)
+        node = self._edge(self.root, tokens[0][1])
+        names = []
+        for name, value in tokens[1:]:
+            if name is None:
+                node = self._edge(node["lit"], value)
+                continue
+            names.append(name)
+            for kind, _regex, child in node["slots"]:
+                if kind == value:
+                    node = child
+                    break
+            else:
+                child = self._node()
+                node["slots"].append((value, PARAM_TYPES[value], child))
+                node = child
+        node["end"] = (trigger, tuple(names), payload)
+        self.triggers.add(trigger)
+        self.sizes = tuple(sorted(set(self.sizes) | {len(tokens)}, reverse=True))
+        self.first_lengths = tuple(sorted(set(self.first_lengths) | {len(tokens[0][1])}, reverse=True))
+
+    def words(self):
+        pending = [self.root]
+        while pending:
+            edges = pending.pop()
+            for word, node in edges.items():
+                yield word
+                pending.append(node["lit"])
+                pending.extend(child["lit"] for _kind, _regex, child in node["slots"])
+
+    def _walk(self, node, tail, pos, args):
+        if pos == len(tail):
+            return (node["end"], args) if node["end"] else None
+        word = tail[pos]
+        child = node["lit"].get(word)
+        if child is not None:
+            found = self._walk(child, tail, pos + 1, args)
+            if found:
+                return found
+        for _kind, regex, child in node["slots"]:
+            if regex.fullmatch(word):
+                found = self._walk(child, tail, pos + 1, args + [word])
+                if found:
+                    return found
+        return None
+
+    def match(self, buffer):
+        if not self.sizes:
+            return None
+        words = buffer.split(" ")
+        for size in self.sizes:
+            if len(words) < size:
+                continue
+            tail = words[-size:]
+            first = tail[0]
+            for length in self.first_lengths:
+                if length > len(first):
+                    continue
+                node = self.root.get(first[-length:])
+                if node is None:
+                    continue
+                found = self._walk(node, tail, 1, [])
+                if found:
+                    (trigger, names, payload), args = found
+                    text = fill_param_text(payload["text"], dict(zip(names, args)))
+                    span = length + sum(len(word) + 1 for word in tail[1:])
+                    return trigger, {"text": text, "cursor_back": payload["cursor_back"]}, span
+        return None
+
+
+def rank_hot_triggers(mapping, usage, recent, variants, size):
+    counts = {}
+    for trigger, uses in usage:
+        if trigger in mapping:
+            counts[trigger] = counts.get(trigger, 0) + uses
+    hot = set()
+    for trigger in sorted(counts, key=lambda key: -counts[key])[:size]:
+        hot.update(key for key in variants(trigger) if key in mapping)
+    for trigger in recent:
+        hot.update(key for key in variants(trigger) if key in mapping)
+    lengths = {len(trigger) for trigger in hot}
+    for trigger in mapping:
+        for length in lengths:
+            if length < len(trigger) and trigger[-length:] in hot:
+                hot.discard(trigger[-length:])
+    return frozenset(hot), tuple(sorted({len(trigger) for trigger in hot}, reverse=True))
+
+
+class BinderSnapshot:
+    __slots__ = (
+        "version",
+        "variants",
+        "map",
+        "lengths",
+        "trie",
+        "params",
+        "variables",
+        "hot",
+        "hot_lengths",
+        "redaction",
+    )
+
+    def __init__(self, version=0, variants=exact_layout, mapping=None, trie=None, params=None, variables=None):
+        self.version = version
+        self.variants = variants
+        self.map = mapping if mapping is not None else {}
+        self.lengths = tuple(sorted({len(trigger) for trigger in self.map}, reverse=True))
+        self.trie = trie if trie is not None else TriggerTrie()
+        self.params = params if params is not None else ParamMatcher(variants=variants)
+        self.variables = variables if variables is not None else VariableIndex()
+        self.hot = frozenset()
+        self.hot_lengths = ()
+        self.redaction = None
+
+    def with_hot(self, hot):
+        clone = BinderSnapshot.__new__(BinderSnapshot)
+        for name in self.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone.hot, clone.hot_lengths = hot
+        return clone
+
+
+def build_redaction_index(snapshot):
+    trie = TriggerTrie(snapshot.map)
+    words = list(snapshot.params.words())
+    for word in words:
+        trie.insert(word)
+    used = any("0" in key for key in snapshot.map) or any("0" in word for word in words)
+    return trie.root, TRACE_REDACT if used else "0"
+
+
+def build_binder_snapshot(version, items, variants, payload_of, libraries=()):
+    mapping = {}
+    originals = {}
+    params = ParamMatcher(variants=variants)
+    for library in libraries:
+        for trigger, payload in library.payloads():
+            if is_param_trigger(trigger):
+                try:
+                    params.add(trigger, payload)
+                except ValueError:
+                    continue
+            else:
+                mapping[trigger] = payload
+    for item in items:
+        payload = payload_of(item)
+        if not payload:
+            continue
+        trigger = item["trigger"]
+        if is_param_trigger(trigger):
+            try:
+                params.add(trigger, payload)
+            except ValueError:
+                continue
+        else:
+            mapping[trigger] = payload
+        originals[trigger] = payload
+    trie = TriggerTrie(mapping)
+    for trigger, payload in list(mapping.items()):
+        for key in variants(trigger)[1:]:
+            mapping.setdefault(key, payload)
+    return BinderSnapshot(version, variants, mapping, trie, params, VariableIndex(originals))
+
+
+def file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(VIEWER_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def patch_binder_snapshot(snapshot, version, items, triggers, payload_of):
+    variants = snapshot.variants
+    keys = set()
+    for trigger in triggers:
+        if not is_param_trigger(trigger):
+            for key in variants(trigger):
+                keys.update(variants(key))
+    params_touched = any(is_param_trigger(trigger) for trigger in triggers)
+    found = {}
+    param_payloads = {}
+    for item in items:
+        trigger = item.get("trigger") if isinstance(item, dict) else None
+        if not trigger:
+            continue
+        if is_param_trigger(trigger):
+            if params_touched:
+                payload = payload_of(item)
+                if payload:
+                    param_payloads[trigger] = payload
+        elif trigger in keys:
+            payload = payload_of(item)
+            if payload:
+                found[trigger] = payload
+
+    mapping = dict(snapshot.map)
+    for key in keys:
+        payload = found.get(key)
+        if payload is None:
+            payload = next((found[other] for other in keys if other in found and key in variants(other)[1:]), None)
+        if payload is None:
+            mapping.pop(key, None)
+        else:
+            mapping[key] = payload
+    trie = snapshot.trie.patched(
+        added=[key for key in keys if key in found],
+        removed=[key for key in keys if key not in found],
+    )
+    variables = snapshot.variables.copy()
+    for key in keys:
+        variables.update(key, found[key]["text"] if key in found else None)
+    params = snapshot.params
+    if params_touched:
+        for trigger in params.triggers:
+            variables.update(trigger, None)
+        params = ParamMatcher(variants=variants)
+        for trigger, payload in param_payloads.items():
+            try:
+                params.add(trigger, payload)
+            except ValueError:
+                continue
+            variables.update(trigger, payload["text"])
+    return BinderSnapshot(version, variants, mapping, trie, params, variables)
+
+
+class StartupCache:
+    def __init__(self, path, sources, snapshot_sources):
+        self.path = path
+        self.sources = sources
+        self.snapshot_sources = snapshot_sources
+        self.keys = {}
+        self.blobs = {}
+        self.fresh = {}
+        self.snapshot = None
+        self.hit = False
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                blob = f.read()
+            if not blob.startswith(STARTUP_CACHE_MAGIC):
+                return False
+            cached = pickle.loads(blob[len(STARTUP_CACHE_MAGIC) :])
+            keys = cached["keys"]
+            for path, key in keys.items():
+                if not self._valid(path, key):
+                    return False
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, KeyError, TypeError, ValueError):
+            return False
+        self.keys = keys
+        self.blobs = cached.get("blobs", {})
+        self.snapshot = cached.get("snapshot")
+        self.hit = True
+        return True
+
+    def _valid(self, path, key):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return key is None
+        if key is None or stat.st_size != key[0]:
+            return False
+        if stat.st_mtime_ns == key[1]:
+            return True
+        return file_digest(path) == key[2]
+
+    def load_json(self, path, default_data):
+        blob = self.blobs.pop(path, None)
+        if blob is not None:
+            return pickle.loads(blob)
+        if self.hit or path not in self.sources or path in self.keys:
+            return load_json(path, default_data)
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+                stat = os.fstat(f.fileno())
+        except FileNotFoundError:
+            self.keys[path] = None
+            self.fresh[path] = pickle.dumps(default_data, pickle.HIGHEST_PROTOCOL)
+            return default_data
+        try:
+            data = json.loads(raw.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            data = default_data
+        self.keys[path] = [stat.st_size, stat.st_mtime_ns, hashlib.blake2b(raw, digest_size=16).hexdigest()]
+        self.fresh[path] = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        return data
+
+    def snapshot_for(self, variants):
+        snapshot, self.snapshot = self.snapshot, None
+        if snapshot is None or snapshot.variants is not variants:
+            return None
+        return snapshot
+
+    def save(self, variants, payload_of):
+        if self.hit or not self.fresh:
+            return
+        threading.Thread(
+            target=self._write,
+            args=(dict(self.keys), dict(self.fresh), variants, payload_of),
+            daemon=True,
+        ).start()
+
+    def _write(self, keys, blobs, variants, payload_of):
+        snapshot = None
+        if all(path in blobs for path in self.snapshot_sources):
+            items = []
+            for path in self.snapshot_sources:
+                data = pickle.loads(blobs[path])
+                if isinstance(data, list):
+                    items.extend(data)
+            snapshot = build_binder_snapshot(0, items, variants, payload_of)
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(STARTUP_CACHE_MAGIC)
+                pickle.dump({"keys": keys, "blobs": blobs, "snapshot": snapshot}, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+class SnapshotBuilder:
+    def __init__(self, payload_of, hot_inputs, publish, report=None):
+        self.payload_of = payload_of
+        self.hot_inputs = hot_inputs
+        self.publish = publish
+        self.report = report
+        self.current = BinderSnapshot()
+        self._version = 0
+        self._variants = None
+        self._libraries = ()
+        self._pending = None
+        self._delta = None
+        self._hot_pending = False
+        self._redaction = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def request(self, items, variants, libraries=()):
+        with self._lock:
+            self._pending = (items, variants, libraries)
+            self._delta = None
+        self._wake.set()
+
+    def request_hot(self):
+        with self._lock:
+            self._hot_pending = True
+        self._wake.set()
+
+    def request_redaction(self, enabled):
+        with self._lock:
+            self._redaction = enabled
+            self._hot_pending = True
+        self._wake.set()
+
+    def request_delta(self, items, triggers):
+        with self._lock:
+            if self._pending is not None:
+                self._pending = (items,) + self._pending[1:]
+            else:
+                touched = set(triggers) | (self._delta[1] if self._delta else set())
+                self._delta = (items, touched)
+        self._wake.set()
+
+    def seed(self, snapshot):
+        with self._lock:
+            self.current = snapshot
+            self._variants = snapshot.variants
+            self._libraries = ()
+        self.request_hot()
+
+    def _loop(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                pending, self._pending = self._pending, None
+                delta, self._delta = self._delta, None
+                hot_pending, self._hot_pending = self._hot_pending, False
+                redaction = self._redaction
+                self._wake.clear()
+            if pending is None and delta is None and not hot_pending:
+                continue
+            try:
+                snapshot = self.current
+                if pending is not None:
+                    self._version += 1
+                    items, variants, libraries = pending
+                    self._variants, self._libraries = variants, libraries
+                    snapshot = build_binder_snapshot(self._version, items, variants, self.payload_of, libraries)
+                elif delta is not None and self._variants is not None:
+                    self._version += 1
+                    items, triggers = delta
+                    if self._libraries:
+                        snapshot = build_binder_snapshot(
+                            self._version, items, self._variants, self.payload_of, self._libraries
+                        )
+                    else:
+                        snapshot = patch_binder_snapshot(snapshot, self._version, items, triggers, self.payload_of)
+                usage, recent, size = self.hot_inputs()
+                snapshot = snapshot.with_hot(rank_hot_triggers(snapshot.map, usage, recent, snapshot.variants, size))
+                if redaction and snapshot.redaction is None:
+                    snapshot.redaction = build_redaction_index(snapshot)
+            except Exception as exc:
+                if self.report is not None:
+                    self.report("Ошибка индекса", f"{type(exc).__name__}: {exc}")
+                continue
+            self.current = snapshot
+            self.publish(snapshot)
+
+
+class TraceRecorder:
+    def __init__(self, path):
+        self.path = path
+        self._names = {}
+        self._buffer = bytearray()
+        self._last = None
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._root = {}
+        self._digit = TRACE_REDACT
+        self._token = ""
+        self._states = ()
+        self._modifiers = 0
+
+    def _index(self, snapshot):
+        if snapshot is self._snapshot:
+            return
+        self._snapshot = snapshot
+        self._root, self._digit = snapshot.redaction or ({}, TRACE_REDACT)
+        self._states = self._scan(self._token)
+
+    def _advance(self, states, ch):
+        return tuple(node[ch] for node in states + (self._root,) if ch in node)
+
+    def _scan(self, token):
+        states = ()
+        for ch in token:
+            states = self._advance(states, ch)
+        return states
+
+    def _redact(self, name, is_up):
+        key = name.lower()
+        bit = MODIFIER_BITS.get(key)
+        if bit:
+            if is_up:
+                self._modifiers &= ~bit
+            else:
+                self._modifiers |= bit
+            return name
+        if len(name) != 1:
+            if is_up:
+                return name
+            if key == "backspace":
+                self._token = self._token[:-1]
+                self._states = self._scan(self._token)
+            elif key in ("space", "tab", "enter"):
+                self._token = ""
+                self._states = ()
+            return name
+        if is_up:
+            return TRACE_REDACT
+        self._token = (self._token + name)[-TRACE_TOKEN_LIMIT:]
+        self._states = self._advance(self._states, name)
+        if self._states or self._modifiers & ~MODIFIER_BITS["shift"]:
+            return name
+        return self._digit if name.isdigit() else TRACE_REDACT
+
+    def record(self, name, is_up, snapshot):
+        now = time.perf_counter_ns() // 1000
+        with self._lock:
+            self._index(snapshot)
+            name = self._redact(name, is_up)
+            delta = 0 if self._last is None else now - self._last
+            self._last = now
+            out = self._buffer
+            _write_varint(out, delta)
+            ident = self._names.get(name)
+            if ident is None:
+                self._names[name] = len(self._names) + 1
+                encoded = name.encode("utf-8")
+                _write_varint(out, int(is_up))
+                _write_varint(out, len(encoded))
+                out.extend(encoded)
+            else:
+                _write_varint(out, (ident << 1) | int(is_up))
+
+    def flush(self):
+        with self._lock:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        if not data:
+            return
+        new = not os.path.exists(self.path)
+        with open(self.path, "ab") as f:
+            if new:
+                f.write(TRACE_MAGIC)
+            f.write(data)
+
+
+def read_trace(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(TRACE_MAGIC):
+        raise ValueError("не файл трассировки")
+    pos = len(TRACE_MAGIC)
+    names = []
+    events = []
+    while pos < len(data):
+        delta, pos = _read_varint(data, pos)
+        code, pos = _read_varint(data, pos)
+        ident = code >> 1
+        if ident == 0:
+            length, pos = _read_varint(data, pos)
+            names.append(data[pos : pos + length].decode("utf-8"))
+            pos += length
+            ident = len(names)
+        events.append((delta, names[ident - 1], bool(code & 1)))
+    return events
+
+
+class FakeKeyboard:
+    def __init__(self):
+        self.output = []
+        self.keystrokes = 0
+
+    def send(self, key):
+        self.output.append(f"{{{key}}}")
+        self.keystrokes += 1
+
+    def write(self, text):
+        self.output.append(text)
+        self.keystrokes += len(text)
+
+
+class InlineRunner:
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+        self.generation = 0
+        self.jobs = []
+
+    def submit(self, job):
+        self.jobs.append((self.generation, job))
+
+    def drain(self):
+        while self.jobs:
+            generation, job = self.jobs.pop(0)
+            job(generation)
+
+    def cancel(self):
+        self.generation += 1
+
+    def cancelled(self, generation):
+        return generation != self.generation
+
+    def sleep(self, generation, ms):
+        if self.realtime and ms:
+            time.sleep(ms / 1000)
+        return generation == self.generation
+
+
+class WindowGuard:
+    def __init__(self, ttl=WINDOW_TITLE_TTL):
+        self.ttl = ttl
+        self.patterns = ()
+        self._hwnd = None
+        self._checked_at = 0.0
+        self._allowed = True
+
+    def set_patterns(self, patterns):
+        self.patterns = tuple(p.strip().lower() for p in patterns if p.strip())
+        self._hwnd = None
+
+    def allowed(self):
+        if not self.patterns or user32 is None:
+            return True
+        hwnd = user32.GetForegroundWindow()
+        now = time.monotonic()
+        if hwnd == self._hwnd and now - self._checked_at < self.ttl:
+            return self._allowed
+        length = user32.GetWindowTextLengthW(hwnd)
+        buffer = ctypes.create_unicode_buffer(length + 1)
+        user32.GetWindowTextW(hwnd, buffer, length + 1)
+        title = buffer.value.lower()
+        self._allowed = any(pattern in title for pattern in self.patterns)
+        self._hwnd = hwnd
+        self._checked_at = now
+        return self._allowed
+
+
+class StallWatchdog:
+    def __init__(self, root, path, threshold_ms, limit=STALL_REPORTS_LIMIT):
+        self.root = root
+        self.path = path
+        self.threshold = threshold_ms / 1000
+        self.interval = STALL_HEARTBEAT_INTERVAL / 1000
+        reports = load_json(path, [])
+        self.reports = deque(reports if isinstance(reports, list) else [], maxlen=limit)
+        self.lock = threading.Lock()
+        self.main_ident = threading.get_ident()
+        self.beat = time.monotonic()
+        self.root.after(STALL_HEARTBEAT_INTERVAL, self._heartbeat)
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def _heartbeat(self):
+        self.beat = time.monotonic()
+        self.root.after(STALL_HEARTBEAT_INTERVAL, self._heartbeat)
+
+    def _loop(self):
+        active = None
+        active_beat = 0.0
+        while True:
+            time.sleep(self.interval)
+            now = time.monotonic()
+            beat = self.beat
+            if active is None:
+                if now - beat > self.threshold:
+                    active = self._capture(now - beat)
+                    active_beat = beat
+            elif beat != active_beat:
+                active["duration_ms"] = round((beat - active_beat - self.interval) * 1000)
+                self._save()
+                active = None
+
+    def _capture(self, lag):
+        frame = sys._current_frames().get(self.main_ident)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        report = {
+            "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_ms": round(lag * 1000),
+            "stack": stack,
+        }
+        with self.lock:
+            self.reports.append(report)
+        self._save()
+        return report
+
+    def _save(self):
+        with self.lock:
+            reports = list(self.reports)
+        try:
+            save_json(self.path, reports)
+        except OSError:
+            pass
+
+    def snapshot(self):
+        with self.lock:
+            return [dict(report) for report in self.reports]
+
+    def clear(self):
+        with self.lock:
+            self.reports.clear()
+        self._save()
+
+
+def analyze_triggers(sources):
+    occurrences = {}
+    for label, items in sources:
+        for idx, item in enumerate(items):
+            if not isinstance(item, dict) or not item.get("trigger"):
+                continue
+            text = item.get("text") or item.get("response") or ""
+            occurrences.setdefault(item["trigger"], []).append((label, idx, text))
+
+    duplicates = []
+    for trigger, places in occurrences.items():
+        if len(places) > 1:
+            duplicates.append((trigger, places))
+
+    root = {}
+    for trigger in occurrences:
+        node = root
+        for ch in reversed(trigger):
+            node = node.setdefault(ch, {})
+        node[""] = trigger
+    shadowed = []
+    stack = [(root, ())]
+    while stack:
+        node, suffixes = stack.pop()
+        trigger = node.get("")
+        if trigger is not None:
+            for shorter in suffixes:
+                shadowed.append((shorter, trigger))
+            suffixes = suffixes + (trigger,)
+        for ch, child in node.items():
+            if ch != "":
+                stack.append((child, suffixes))
+
+    folds = {}
+    for trigger, places in occurrences.items():
+        folds.setdefault(layout_key(trigger), []).append((trigger, places[-1][2]))
+    aliases = []
+    pairs = []
+    for fold, group in folds.items():
+        if len(group) < 2:
+            continue
+        if len({text for _trigger, text in group}) > 1:
+            aliases.append((fold, group))
+        else:
+            pairs.append((fold, group))
+
+    duplicates.sort()
+    shadowed.sort(key=lambda pair: (pair[1], pair[0]))
+    aliases.sort()
+    pairs.sort()
+    return {"duplicates": duplicates, "shadowed": shadowed, "aliases": aliases, "pairs": pairs}
+
+
+def alias_record(source):
+    record = {
+        "trigger": ru_to_en(source["trigger"]),
+        "text": source.get("text") or source.get("response") or "",
+        "alias_of": source["trigger"],
+    }
+    if source.get("cursor_back"):
+        record["cursor_back"] = source["cursor_back"]
+    return record
+
+
+def sync_aliases(items, scope=None):
+    items = list(items)
+    sources = {}
+    owned = set()
+    for item in items:
+        if not isinstance(item, dict) or not item.get("trigger") or item.get("alias_of"):
+            continue
+        owned.add(item["trigger"])
+        if ru_to_en(item["trigger"]) != item["trigger"]:
+            sources[item["trigger"]] = item
+    expected = {ru_to_en(trigger): trigger for trigger in sources}
+    stats = {"added": [], "updated": [], "removed": [], "linked": []}
+
+    for idx, item in enumerate(items):
+        if not isinstance(item, dict) or item.get("alias_of"):
+            continue
+        source = sources.get(expected.get(item.get("trigger")))
+        if scope is not None and (source is None or source["trigger"] not in scope):
+            continue
+        if source is not None and alias_record(source) == dict(item, alias_of=source["trigger"]):
+            items[idx] = dict(item, alias_of=source["trigger"])
+            owned.discard(item["trigger"])
+            stats["linked"].append(item["trigger"])
+
+    result = []
+    present = set()
+    for item in items:
+        source_trigger = item.get("alias_of") if isinstance(item, dict) else None
+        if source_trigger is None or (scope is not None and source_trigger not in scope):
+            result.append(item)
+            if source_trigger is not None:
+                present.add(item.get("trigger"))
+            continue
+        trigger = item.get("trigger")
+        source = sources.get(source_trigger)
+        if source is None or expected.get(trigger) != source_trigger or trigger in present or trigger in owned:
+            stats["removed"].append(trigger)
+            continue
+        record = alias_record(source)
+        if item != record:
+            stats["updated"].append(trigger)
+            item = record
+        present.add(trigger)
+        result.append(item)
+
+    for alias, source_trigger in expected.items():
+        if alias in present or alias in owned:
+            continue
+        if scope is not None and source_trigger not in scope:
+            continue
+        result.append(alias_record(sources[source_trigger]))
+        present.add(alias)
+        stats["added"].append(alias)
+    return result, stats
+
+
+def collapse_layout_pairs(items):
+    sources = {
+        item["trigger"]
+        for item in items
+        if isinstance(item, dict) and item.get("trigger") and not item.get("alias_of")
+    }
+    kept = []
+    removed = []
+    owners = {}
+    for item in items:
+        trigger = item.get("trigger") if isinstance(item, dict) else None
+        if not trigger:
+            kept.append(item)
+            continue
+        if item.get("alias_of") in sources:
+            removed.append(trigger)
+            continue
+        if CYRILLIC_RE.search(trigger):
+            keys = (layout_key(trigger), ru_to_en(trigger))
+        else:
+            keys = (trigger,)
+        pos = next((owners[key] for key in keys if key in owners), None)
+        if pos is None:
+            for key in keys:
+                owners.setdefault(key, len(kept))
+            kept.append(item)
+            continue
+        owner = kept[pos]
+        same_text = (owner.get("text") or owner.get("response")) == (item.get("text") or item.get("response"))
+        if not same_text or owner.get("cursor_back") != item.get("cursor_back"):
+            kept.append(item)
+            continue
+        if owner.get("alias_of") and not item.get("alias_of"):
+            kept[pos] = item
+            removed.append(owner["trigger"])
+        else:
+            removed.append(trigger)
+    return kept, removed
+
+
+def remove_aliases(items):
+    kept = [item for item in items if not (isinstance(item, dict) and item.get("alias_of"))]
+    removed = [item.get("trigger") for item in items if isinstance(item, dict) and item.get("alias_of")]
+    return kept, removed
+
+
+_MISSING = object()
+
+
+def diff_lists(before, after):
+    start = 0
+    limit = min(len(before), len(after))
+    while start < limit and before[start] is after[start]:
+        start += 1
+    end_before = len(before)
+    end_after = len(after)
+    while end_before > start and end_after > start and before[end_before - 1] is after[end_after - 1]:
+        end_before -= 1
+        end_after -= 1
+    if start == end_before and start == end_after:
+        return []
+    old = before[start:end_before]
+    new = after[start:end_after]
+    matcher = difflib.SequenceMatcher(None, [id(x) for x in old], [id(x) for x in new], autojunk=False)
+    return [
+        (start + i1, start + i2, old[i1:i2], start + j1, start + j2, new[j1:j2])
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def diff_dicts(before, after):
+    changes = []
+    for key in before.keys() | after.keys():
+        old = before.get(key, _MISSING)
+        new = after.get(key, _MISSING)
+        if old is not new and old != new:
+            changes.append((key, old, new))
+    return changes
+
+
+class EditHistory:
+    def __init__(self, limit=HISTORY_LIMIT):
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = deque(maxlen=limit)
+
+    def push(self, label, changes):
+        if changes:
+            self.undo_stack.append((label, changes))
+            self.redo_stack.clear()
+
+    @staticmethod
+    def apply(collection, kind, diff, forward):
+        if kind == "list":
+            for i1, i2, old, j1, j2, new in reversed(diff):
+                if forward:
+                    collection[i1:i2] = new
+                else:
+                    collection[j1:j2] = old
+            return
+        for key, old, new in diff:
+            value = new if forward else old
+            if value is _MISSING:
+                collection.pop(key, None)
+            else:
+                collection[key] = value
+
+
 def hex_to_rgb(value):
     value = value.lstrip("#")
     return tuple(int(value[i : i + 2], 16) for i in (0, 2, 4))
@@ -359,14 +2825,38 @@ class BinderApp:
         self.root.configure(bg=THEME["bg"])
         self.root.resizable(False, False)
 
-        self.config = load_config()
+        self.change_log = ChangeLog(LOG_PATH)
+        self._worker_errors = queue.Queue()
+        atexit.register(self.change_log.flush)
+        self.root.after(LOG_FLUSH_INTERVAL, self._flush_change_log)
+        try:
+            self.event_store = EventStore(EVENTS_PATH)
+        except sqlite3.Error as exc:
+            self.event_store = EventStore(":memory:")
+            message = f"Не удалось открыть статистику, события не будут сохранены: {exc}"
+            self.root.after(0, lambda: messagebox.showwarning("Ошибка", message))
+        atexit.register(self.event_store.close)
+        self.root.after(EVENTS_FLUSH_INTERVAL, self._flush_event_store)
+
+        self.startup_cache = StartupCache(
+            STARTUP_CACHE_PATH,
+            (CONFIG_PATH, BINDS_PATH, PHRASES_PATH, AUTOFIX_PATH),
+            (BINDS_PATH, PHRASES_PATH),
+        )
+        self.startup_cache.load()
+        self.config = self.startup_cache.load_json(CONFIG_PATH, {})
+        self.stall_watchdog = StallWatchdog(self.root, STALLS_PATH, self.config.get("stall_threshold_ms", STALL_THRESHOLD_MS))
         self.config.setdefault("auto_alias_ru", True)
         self.config.setdefault("auto_update_info", True)
         self.config.setdefault("binder_enabled", True)
         save_config(self.config)
+        self.history = EditHistory()
+        self._setup_variable_resolvers()
         self.setup_style()
         self.build_ui()
         self._setup_binder_listener()
+        self.refresh_variables_list()
+        self._setup_pack_sync()
 
     def _content_button_chars(self, font, padding):
         char_width = font.measure("0") if font else 7
@@ -383,7 +2873,46 @@ class BinderApp:
         self._binder_buffer = ""
         self._binder_max_len = 64
         self._binder_sending = False
-        self._binder_map = {}
+        self._binder_modifiers = 0
+        self._binder_snapshot = BinderSnapshot()
+        self._binder_recent = deque(maxlen=HOT_RECENT_SIZE)
+        self._binder_stats = {
+            "hot_hits": 0,
+            "hot_ns": 0,
+            "cold_hits": 0,
+            "cold_ns": 0,
+            "misses": 0,
+            "miss_ns": 0,
+        }
+        try:
+            self._binder_usage = self.event_store.trigger_counts()
+        except sqlite3.Error:
+            self._binder_usage = {}
+        self._binder_usage_dirty = False
+        self.root.after(HOT_REBUILD_INTERVAL, self._periodic_hot_rebuild)
+        self._snapshot_builder = SnapshotBuilder(
+            self._binder_payload, self._binder_hot_inputs, self._publish_binder_snapshot, self._report_worker_error
+        )
+        self._completion_dirty = False
+        self._completion_matches = ()
+        self._completion_index = 0
+        self._completion_token = ""
+        self._completion_window = None
+        self._completion_keys = self._completion_key_table()
+        self.macro_runner = MacroRunner(self._report_worker_error)
+        self._trace = None
+        self._configure_trace()
+        self.window_guard = WindowGuard()
+        self.window_guard.set_patterns(self.config.get("window_filters", {}).get(self.config.get("active_profile"), []))
+        self._libraries = {}
+        self._mount_libraries()
+        variants = layout_variants if self.config.get("layout_fold", False) else exact_layout
+        snapshot = self.startup_cache.snapshot_for(variants)
+        if snapshot is not None and not self._libraries:
+            self._snapshot_builder.seed(snapshot)
+        else:
+            self._reload_binder_map()
+        self.startup_cache.save(variants, self._binder_payload)
         if not self.config.get("binder_enabled", True):
             return
         if keyboard is None:
@@ -392,98 +2921,456 @@ class BinderApp:
                 "Не найден модуль keyboard.\nУстановите: pip install keyboard",
             )
             return
-        self._reload_binder_map()
-        keyboard.hook(self._on_binder_key)
+        keyboard.hook(self._on_binder_key, suppress=True)
         keyboard.on_press_key("space", self._on_binder_space, suppress=True)
+        keyboard.add_hotkey(self.config.get("macro_cancel_hotkey", MACRO_CANCEL_HOTKEY), self.macro_runner.cancel)
+        self.root.after(COMPLETION_POLL_INTERVAL, self._poll_completion)
+
+    def _binder_payload(self, item):
+        if not isinstance(item, dict):
+            return None
+        if not item.get("trigger") or not isinstance(item["trigger"], str):
+            return None
+        text = self.bind_get_text(item)
+        if not text or not isinstance(text, str):
+            return None
+        try:
+            cursor_back = max(0, int(item.get("cursor_back") or 0))
+        except (TypeError, ValueError):
+            cursor_back = 0
+        return {
+            "trigger": item["trigger"],
+            "text": text,
+            "cursor_back": cursor_back,
+        }
+
+    def _configure_trace(self):
+        self._snapshot_builder.request_redaction(self.config.get("trace_enabled", False))
+        if self.config.get("trace_enabled", False):
+            if self._trace is None:
+                os.makedirs(TRACES_DIR, exist_ok=True)
+                name = datetime.now().strftime("trace-%Y%m%d-%H%M%S.bin")
+                self._trace = TraceRecorder(os.path.join(TRACES_DIR, name))
+                atexit.register(self._trace.flush)
+                self.root.after(TRACE_FLUSH_INTERVAL, self._flush_trace)
+        elif self._trace is not None:
+            trace, self._trace = self._trace, None
+            trace.flush()
+
+    def _flush_trace(self):
+        trace = self._trace
+        if trace is None:
+            return
+        try:
+            trace.flush()
+        except OSError:
+            pass
+        self.root.after(TRACE_FLUSH_INTERVAL, self._flush_trace)
 
     def _reload_binder_map(self):
-        items = []
-        items.extend(load_json(BINDS_PATH, []))
-        items.extend(load_json(PHRASES_PATH, []))
-        mapping = {}
-        for item in items:
-            trigger = item.get("trigger")
-            if not trigger:
-                continue
-            text = self.bind_get_text(item)
-            if not text:
+        variants = layout_variants if self.config.get("layout_fold", False) else exact_layout
+        self._snapshot_builder.request(
+            list(self.commands_data) + list(self.phrases_data), variants, tuple(self._libraries.values())
+        )
+
+    def get_libraries(self):
+        return list(self.config.get("libraries", {}).get(self.active_profile, []))
+
+    def set_libraries(self, paths):
+        self.config.setdefault("libraries", {})[self.active_profile] = list(paths)
+        save_config(self.config)
+
+    def _mount_libraries(self):
+        mounted = {}
+        for path in self.get_libraries():
+            library = self._libraries.get(path)
+            if library is None:
+                try:
+                    library = MappedLibrary(path)
+                except (OSError, ValueError, UnicodeDecodeError, struct.error) as exc:
+                    self.append_log("Библиотека", f"{path}: ошибка {exc}")
+                    continue
+            mounted[path] = library
+        for path, library in self._libraries.items():
+            if path not in mounted:
+                self.root.after(LIBRARY_CLOSE_DELAY, library.close)
+        self._libraries = mounted
+
+    def _refresh_binder_triggers(self, triggers):
+        if triggers:
+            self._snapshot_builder.request_delta(list(self.commands_data) + list(self.phrases_data), triggers)
+
+    def _publish_binder_snapshot(self, snapshot):
+        self._binder_snapshot = snapshot
+        self._completion_dirty = True
+
+    def _binder_hot_inputs(self):
+        size = int(self.config.get("hot_cache_size", HOT_CACHE_SIZE))
+        return list(self._binder_usage.items()), list(self._binder_recent), size
+
+    def _periodic_hot_rebuild(self):
+        if self._binder_usage_dirty:
+            self._binder_usage_dirty = False
+            self._snapshot_builder.request_hot()
+        self.root.after(HOT_REBUILD_INTERVAL, self._periodic_hot_rebuild)
+
+    def _match_binder_trigger(self, snapshot, buffer):
+        stats = self._binder_stats
+        started = time.perf_counter_ns()
+        mapping = snapshot.map
+        hot = snapshot.hot
+        for length in snapshot.hot_lengths:
+            candidate = buffer[-length:]
+            if candidate in hot:
+                payload = mapping.get(candidate)
+                if payload:
+                    stats["hot_hits"] += 1
+                    stats["hot_ns"] += time.perf_counter_ns() - started
+                    return candidate, payload
+        for length in snapshot.lengths:
+            if length > len(buffer):
                 continue
-            mapping[trigger] = {
-                "text": text,
-                "cursor_back": int(item.get("cursor_back") or 0),
-            }
-        self._binder_map = dict(sorted(mapping.items(), key=lambda kv: len(kv[0]), reverse=True))
+            payload = mapping.get(buffer[-length:])
+            if payload:
+                stats["cold_hits"] += 1
+                stats["cold_ns"] += time.perf_counter_ns() - started
+                return buffer[-length:], payload
+        stats["misses"] += 1
+        stats["miss_ns"] += time.perf_counter_ns() - started
+        return None
+
+    def _note_binder_usage(self, trigger):
+        self._binder_usage[trigger] = self._binder_usage.get(trigger, 0) + 1
+        self._binder_recent.append(trigger)
+        self._binder_usage_dirty = True
 
     def _on_binder_key(self, event):
+        if self._trace is not None and not self._binder_sending:
+            self._trace.record(event.name or "", event.event_type == "up", self._binder_snapshot)
+        key = (event.name or "").lower()
+        bit = MODIFIER_BITS.get(key)
+        if bit:
+            if event.event_type == "down":
+                self._binder_modifiers |= bit
+            else:
+                self._binder_modifiers &= ~bit
+            return True
         if self._binder_sending or event.event_type != "down":
-            return
-        key = event.name
+            return True
+        if self._binder_modifiers:
+            action = self._completion_keys.get((self._binder_modifiers, key))
+            if action is not None and self._completion_matches:
+                action()
+                return False
+            payload = self._chord_table.get((self._binder_modifiers, key))
+            if payload is not None and self.window_guard.allowed():
+                self.event_store.record(EVENT_EXPAND, format_chord(self._binder_modifiers, key), self.active_profile)
+                self._emit_binder_expansion(0, dict(payload, chord=True), trailing_space=False)
+                return False
         if key == "backspace":
             self._binder_buffer = self._binder_buffer[:-1]
-            return
+            self._completion_dirty = True
+            return True
         if len(key) == 1:
-            self._binder_buffer += key
+            self._binder_buffer += event.name
         elif key in ("tab",):
             self._binder_buffer += "\t"
         if len(self._binder_buffer) > self._binder_max_len:
             self._binder_buffer = self._binder_buffer[-self._binder_max_len :]
+        self._completion_dirty = True
+        return True
 
     def _on_binder_space(self, _event):
         if self._binder_sending:
             return
-        match = None
-        for trigger, payload in self._binder_map.items():
-            if self._binder_buffer.endswith(trigger):
-                match = (trigger, payload)
-                break
+        buffer = self._binder_buffer
+        snapshot = self._binder_snapshot
+        match = self._match_binder_trigger(snapshot, buffer)
         if match:
-            trigger, payload = match
-            self._binder_sending = True
-            try:
-                for _ in range(len(trigger)):
-                    keyboard.send("backspace")
-                text = self._expand_binder_text(payload["text"])
-                self._send_binder_text(text)
-                if payload["cursor_back"]:
-                    for _ in range(payload["cursor_back"]):
-                        keyboard.send("left")
-                keyboard.send("space")
-            finally:
-                self._binder_sending = False
-            self._binder_buffer = ""
+            key, payload = match
+            trigger = payload["trigger"]
+            erase_count = len(key)
+        else:
+            trigger, payload, erase_count = snapshot.params.match(buffer) or (None, None, 0)
+        if trigger and self.window_guard.allowed():
+            self.event_store.record(EVENT_EXPAND, trigger, self.active_profile)
+            self._note_binder_usage(trigger)
+            self._emit_binder_expansion(erase_count, payload)
             return
         self._binder_sending = True
         try:
             keyboard.send("space")
         finally:
             self._binder_sending = False
+        self._binder_buffer = (buffer + " ")[-self._binder_max_len :]
+        self._completion_dirty = True
+
+    def _emit_binder_expansion(self, erase_count, payload, trailing_space=True):
+        self._binder_sending = True
         self._binder_buffer = ""
+        self._completion_dirty = True
+        self.macro_runner.submit(
+            lambda generation: self._run_binder_program(erase_count, payload, trailing_space, generation)
+        )
+
+    def _compile_binder_text(self, text, trigger=""):
+        try:
+            return compile_macro(text)
+        except ValueError as exc:
+            self._report_worker_error("Ошибка макроса", f"{trigger}: {exc}, текст отправлен без разбора")
+        ops = []
+        for number, line in enumerate(text.replace("\r\n", "\n").split("\n")):
+            if number:
+                ops.append((MACRO_KEY, "enter"))
+            if line:
+                ops.append((MACRO_WRITE, line))
+        return tuple(ops)
+
+    def _expand_binder_ops(self, ops, resolved):
+        return tuple(
+            (MACRO_WRITE, self._expand_binder_text(op[1], resolved, static=False)) if op[0] == MACRO_WRITE else op
+            for op in ops
+        )
+
+    def _write_binder_chars(self, text, generation):
+        runner = self.macro_runner
+        for ch in text:
+            if runner.cancelled(generation):
+                return
+            keyboard.write(ch)
+
+    def _run_binder_program(self, erase_count, payload, trailing_space, generation):
+        runner = self.macro_runner
+        resolved = {}
+        try:
+            waited = 0
+            while payload.get("chord") and self._binder_modifiers and waited < CHORD_RELEASE_TIMEOUT:
+                if not runner.sleep(generation, 10):
+                    return
+                waited += 10
+            if runner.cancelled(generation):
+                return
+            template = self._expand_binder_text(payload["text"], resolved, dynamic=False)
+            ops = self._expand_binder_ops(self._compile_binder_text(template, payload.get("trigger", "")), resolved)
+            for _ in range(erase_count):
+                keyboard.send("backspace")
+            completed = run_macro(
+                ops,
+                write=lambda text: self._write_binder_chars(text, generation),
+                send=keyboard.send,
+                wait=lambda ms: runner.sleep(generation, ms),
+                check=lambda name: self._macro_condition(name, resolved),
+                cancelled=lambda: runner.cancelled(generation),
+            )
+            if completed and not runner.cancelled(generation):
+                for _ in range(payload["cursor_back"]):
+                    keyboard.send("left")
+                if trailing_space:
+                    keyboard.send("space")
+        finally:
+            self._binder_sending = False
+
+    def admin_catalog(self):
+        catalog = getattr(self, "_admin_catalog", None)
+        try:
+            stat = os.stat(ADMIN_COMMANDS_PATH)
+            key = [stat.st_mtime_ns, stat.st_size]
+        except OSError:
+            key = None
+        if catalog is None or catalog.key != key:
+            catalog = load_admin_catalog()
+            self._admin_catalog = catalog
+        return catalog
+
+    def _completion_enabled(self):
+        return self.config.get("completion_enabled", False)
+
+    def _completion_key_table(self):
+        if not self._completion_enabled():
+            return {}
+        table = {}
+        for chord, action in (
+            (self.config.get("completion_hotkey", COMPLETION_HOTKEY), self._on_completion_pick),
+            (COMPLETION_NEXT_HOTKEY, lambda: self._on_completion_move(1)),
+            (COMPLETION_PREV_HOTKEY, lambda: self._on_completion_move(-1)),
+        ):
+            try:
+                table[parse_chord(chord)] = action
+            except ValueError:
+                continue
+        return table
+
+    def _current_binder_token(self):
+        buffer = self._binder_buffer
+        cut = max(buffer.rfind(" "), buffer.rfind("\t"))
+        return buffer[cut + 1 :]
+
+    def _poll_completion(self):
+        self.root.after(COMPLETION_POLL_INTERVAL, self._poll_completion)
+        if not self._completion_dirty:
+            return
+        self._completion_dirty = False
+        token = self._current_binder_token() if self._completion_enabled() else ""
+        matches = ()
+        if len(token) >= COMPLETION_MIN_PREFIX:
+            snapshot = self._binder_snapshot
+            matches = ()
+            for variant in snapshot.variants(token):
+                matches += tuple(
+                    t
+                    for t in snapshot.trie.complete(variant, COMPLETION_LIMIT + 1)
+                    if t != variant and t not in matches
+                )
+            if token.startswith("/"):
+                matches += tuple(
+                    name
+                    for name in self.admin_catalog().complete(token, COMPLETION_LIMIT + 1)
+                    if name != token and name not in matches
+                )
+            matches = matches[:COMPLETION_LIMIT]
+        if token == self._completion_token and matches == self._completion_matches:
+            return
+        self._completion_token = token
+        self._completion_index = 0
+        self._completion_matches = matches
+        self._render_completion()
+
+    def _render_completion(self):
+        matches = self._completion_matches
+        if not matches:
+            if self._completion_window is not None:
+                self._completion_window.withdraw()
+            return
+        if self._completion_window is None:
+            win = tk.Toplevel(self.root)
+            win.overrideredirect(True)
+            win.attributes("-topmost", True)
+            win.configure(bg=THEME["border"])
+            listbox = tk.Listbox(win, width=56, height=COMPLETION_LIMIT)
+            listbox.pack(fill="both", expand=True, padx=1, pady=1)
+            style_listbox(listbox)
+            self._completion_window = win
+            self._completion_list = listbox
+        listbox = self._completion_list
+        listbox.delete(0, tk.END)
+        catalog = self.admin_catalog()
+        mapping = self._binder_snapshot.map
+        for trigger in matches:
+            payload = mapping.get(trigger)
+            command = catalog.get(trigger) if payload is None else None
+            if command is not None:
+                preview = f'{catalog.signature(command)} {command["desc"]} (ур. {command["level"]})'.strip()
+            else:
+                preview = " ".join((payload or {}).get("text", "").split())
+            if len(preview) > 40:
+                preview = preview[:39] + "…"
+            listbox.insert(tk.END, f'{(payload or {}).get("trigger", trigger)}  —  {preview}')
+        listbox.configure(height=len(matches))
+        listbox.selection_clear(0, tk.END)
+        listbox.selection_set(self._completion_index)
+        x, y = self.root.winfo_pointerxy()
+        self._completion_window.geometry(f"+{x + 16}+{y + 20}")
+        self._completion_window.deiconify()
+        self._completion_window.lift()
+
+    def _on_completion_move(self, step):
+        matches = self._completion_matches
+        if not matches:
+            return
+        self._completion_index = (self._completion_index + step) % len(matches)
+        self._completion_token = None
+        self._completion_dirty = True
+
+    def _on_completion_pick(self):
+        matches = self._completion_matches
+        if not matches or self._binder_sending:
+            return
+        trigger = matches[min(self._completion_index, len(matches) - 1)]
+        payload = self._binder_snapshot.map.get(trigger)
+        if payload is None and self.admin_catalog().get(trigger):
+            payload = {"text": f"{trigger} ", "cursor_back": 0}
+        if not payload or not self.window_guard.allowed():
+            return
+        trigger = payload.get("trigger", trigger)
+        self.event_store.record(EVENT_EXPAND, trigger, self.active_profile)
+        self._note_binder_usage(trigger)
+        self._completion_matches = ()
+        self._emit_binder_expansion(len(self._current_binder_token()), payload, trailing_space=False)
+
+    def _macro_condition(self, name, resolved):
+        placeholder = f"%{name}%"
+        value = self._expand_binder_text(placeholder, resolved)
+        return value != placeholder and bool(value.strip())
+
+    def _setup_variable_resolvers(self):
+        resolvers = VariableResolvers()
+        for name, config_key in (("qdis", "discord_me"), ("gadis", "discord_ga"), ("zgadis", "discord_zga")):
+            resolvers.register(name, lambda _arg, config_key=config_key: self.config.get(config_key, ""), static=True)
+        resolvers.register("time", lambda _arg: datetime.now().strftime("%H:%M"))
+        resolvers.register("date", lambda _arg: datetime.now().strftime("%d.%m.%Y"))
+        resolvers.register("clipboard", self._resolve_clipboard)
+        resolvers.register("counter", self._resolve_counter, prefix=True)
+        self.variable_resolvers = resolvers
+        self._counters = dict(self.config.get("counters", {}))
+        self._counters_lock = threading.Lock()
+        self._counters_dirty = False
+        self._clipboard_text = ""
+        self.root.after(COUNTERS_FLUSH_INTERVAL, self._flush_counters)
+        self.root.after(CLIPBOARD_POLL_INTERVAL, self._poll_clipboard)
+
+    def _poll_clipboard(self):
+        self.root.after(CLIPBOARD_POLL_INTERVAL, self._poll_clipboard)
+        snapshot = getattr(self, "_binder_snapshot", None)
+        if snapshot is None or "clipboard" not in snapshot.variables.users:
+            return
+        try:
+            self._clipboard_text = self.root.clipboard_get()
+        except tk.TclError:
+            self._clipboard_text = ""
+
+    def _resolve_clipboard(self, _arg):
+        return self._clipboard_text
+
+    def _resolve_counter(self, name):
+        with self._counters_lock:
+            value = int(self._counters.get(name, 0)) + 1
+            self._counters[name] = value
+            self._counters_dirty = True
+        return value
+
+    def _flush_counters(self):
+        with self._counters_lock:
+            dirty, self._counters_dirty = self._counters_dirty, False
+            counters = dict(self._counters)
+        if dirty:
+            self.config["counters"] = counters
+            save_config(self.config)
+        self.root.after(COUNTERS_FLUSH_INTERVAL, self._flush_counters)
 
-    def _expand_binder_text(self, text):
+    def _expand_binder_text(self, text, resolved=None, static=True, dynamic=True):
+        if "%" not in text:
+            return text
         variables = self.config.get("variables", {})
-        replacements = {
-            "qdis": self.config.get("discord_me", ""),
-            "gadis": self.config.get("discord_ga", ""),
-            "zgadis": self.config.get("discord_zga", ""),
-        }
+        resolvers = self.variable_resolvers
+        if resolved is None:
+            resolved = {}
+
         def repl(match):
             key = match.group(1)
-            if key in replacements:
-                return replacements[key]
-            return str(variables.get(key, match.group(0)))
-        return re.sub(r"%([^%]+)%", repl, text)
-
-    def _send_binder_text(self, text):
-        parts = re.split(r"(\{[^}]+\})", text)
-        for part in parts:
-            if not part:
-                continue
-            if part.startswith("{") and part.endswith("}"):
-                key = part[1:-1].strip()
-                if key:
-                    keyboard.send(key.lower())
-            else:
-                keyboard.write(part)
+            if key in resolvers.static or key in variables:
+                if not static:
+                    return match.group(0)
+                if key in resolvers.static:
+                    return str(resolvers.resolve(key))
+                return str(variables[key])
+            if not dynamic:
+                return match.group(0)
+            if key not in resolved:
+                resolved[key] = resolvers.resolve(key)
+            value = resolved[key]
+            return match.group(0) if value is _MISSING else str(value)
+
+        return VARIABLE_RE.sub(repl, text)
 
     def _show_variables_form(self, clear=False):
         if not getattr(self, "variables_form_visible", False):
@@ -654,6 +3541,8 @@ class BinderApp:
         self.build_commands_screen()
         self.build_phrases_screen()
         self.build_autofix_screen()
+        self.build_teleports_screen()
+        self.build_hotkeys_screen()
         self.build_variables_screen()
         self.build_profiles_screen()
         self.build_import_export_screen()
@@ -662,7 +3551,11 @@ class BinderApp:
 
         self.show_screen("Команды")
         self.update_info_files()
+        self.run_trigger_analysis()
         self.root.bind_all("<Control-f>", self.focus_search)
+        self.root.bind_all("<Control-z>", self.history_undo)
+        self.root.bind_all("<Control-y>", self.history_redo)
+        self.root.bind_all("<Control-Z>", self.history_redo)
 
     def on_resize(self, _event):
         if hasattr(self, "header_canvas"):
@@ -728,6 +3621,8 @@ class BinderApp:
                 btn.set_colors(THEME["button"], THEME["accent_alt"], THEME["accent"])
         self.update_manage_switcher(name)
         self.active_screen = name
+        if name == "Телепорты":
+            self.refresh_teleport_catalog()
 
     def build_screen_shell(self, screen_name, title, subtitle=None):
         parent = self.screens[screen_name]
@@ -768,11 +3663,27 @@ class BinderApp:
             command=lambda: self.show_screen("Автоисправление"),
             kind="switcher",
         )
-        btn_autofix.pack(side="left")
+        btn_autofix.pack(side="left", padx=(0, 6))
+        btn_teleports = self.create_button(
+            switcher,
+            text="Телепорты",
+            command=lambda: self.show_screen("Телепорты"),
+            kind="switcher",
+        )
+        btn_teleports.pack(side="left", padx=(0, 6))
+        btn_hotkeys = self.create_button(
+            switcher,
+            text="Горячие клавиши",
+            command=lambda: self.show_screen("Горячие клавиши"),
+            kind="switcher",
+        )
+        btn_hotkeys.pack(side="left")
         self.manage_switcher = {
             "Команды": btn_commands,
             "Фразы": btn_phrases,
             "Автоисправление": btn_autofix,
+            "Телепорты": btn_teleports,
+            "Горячие клавиши": btn_hotkeys,
         }
 
     def update_manage_switcher(self, active_name):
@@ -851,11 +3762,11 @@ class BinderApp:
         )
 
     def load_list(self, path):
-        data = load_json(path, [])
+        data = self.startup_cache.load_json(path, [])
         return data if isinstance(data, list) else []
 
     def load_dict(self, path, default_data):
-        data = load_json(path, default_data)
+        data = self.startup_cache.load_json(path, default_data)
         return data if isinstance(data, dict) else default_data
 
     def bind_get_text(self, item):
@@ -871,26 +3782,110 @@ class BinderApp:
         if "response" in item:
             item["response"] = value
 
-    def maybe_add_alias(self, data_list, trigger, text, cursor_back, label):
-        if not self.config.get("auto_alias_ru", True):
-            return False
-        alias = ru_to_en(trigger)
-        if alias == trigger:
-            return False
-        if any(item.get("trigger") == alias for item in data_list):
-            return False
-        alias_item = {"trigger": alias, "text": text}
-        if cursor_back:
-            alias_item["cursor_back"] = cursor_back
-        data_list.append(alias_item)
-        self.append_log("Добавлено", f"{label} (алиас): {alias} -> {text}")
-        return True
+    def sync_command_aliases(self, scope=None, force=False):
+        if not force and not self.config.get("auto_alias_ru", True):
+            return set()
+        items, stats = sync_aliases(self.commands_data, scope)
+        self.commands_data[:] = items
+        for trigger in stats["added"]:
+            self.append_log("Добавлено", f"Команды (алиас): {trigger}", trigger=trigger)
+        for trigger in stats["updated"]:
+            self.append_log("Изменено", f"Команды (алиас): {trigger}", trigger=trigger)
+        for trigger in stats["removed"]:
+            self.append_log("Удалено", f"Команды (алиас): {trigger}", trigger=trigger)
+        return set(stats["added"]) | set(stats["updated"]) | set(stats["removed"]) | set(stats["linked"])
+
+    def aliases_regenerate(self):
+        snapshot = self.history_begin()
+        touched = self.sync_command_aliases(force=True)
+        self._apply_alias_changes(touched)
+        self.history_commit("Алиасы: пересборка", snapshot)
+        messagebox.showinfo("Готово", f"Алиасы обновлены: {len(touched)}.")
+
+    def aliases_remove_all(self):
+        if not messagebox.askyesno("Подтвердите", "Удалить все авто-алиасы RU→EN?"):
+            return
+        snapshot = self.history_begin()
+        items, removed = remove_aliases(self.commands_data)
+        self.commands_data[:] = items
+        if removed:
+            self.append_log("Удалено", f"Команды (алиасы): {len(removed)}")
+        self._apply_alias_changes(set(removed))
+        self.history_commit("Алиасы: удаление", snapshot)
+        messagebox.showinfo("Готово", f"Удалено алиасов: {len(removed)}.")
+
+    def collapse_layout_aliases(self):
+        if not messagebox.askyesno(
+            "Подтвердите",
+            "Удалить RU/EN-пары с одинаковым текстом и включить поиск триггеров без учёта раскладки?\n"
+            "Авто-алиасы будут отключены.",
+        ):
+            return
+        snapshot = self.history_begin()
+        removed = []
+        uis = []
+        for ui in (self.commands_ui, self.phrases_ui):
+            data_list = getattr(self, ui["data_ref"])
+            kept, dropped = collapse_layout_pairs(data_list)
+            if dropped:
+                data_list[:] = kept
+                removed.extend(dropped)
+                uis.append(ui)
+        self.config["auto_alias_ru"] = False
+        self.config["layout_fold"] = True
+        self.auto_alias_state = False
+        self.layout_fold_state = True
+        self.auto_alias_toggle.set(False)
+        self.layout_fold_toggle.set(True)
+        save_config(self.config)
+        if uis:
+            for ui in uis:
+                save_json(ui["path"], getattr(self, ui["data_ref"]))
+                self.refresh_bind_list(ui, getattr(self, ui["data_ref"]))
+            self.update_info_files()
+            self.run_trigger_analysis()
+        self._reload_binder_map()
+        self.history_commit(f"Раскладка: схлопнуто пар ({len(removed)})", snapshot)
+        self.append_log("Удалено", f"Раскладка: схлопнуто пар {len(removed)}")
+        messagebox.showinfo("Готово", f"Удалено дублей: {len(removed)}.")
 
-    def append_log(self, action, details):
+    def _apply_alias_changes(self, touched):
+        if not touched:
+            return
+        save_json(BINDS_PATH, self.commands_data)
+        self._refresh_binder_triggers(touched)
+        self.update_info_files()
+        self.run_trigger_analysis()
+        self.refresh_bind_list(self.commands_ui, self.commands_data)
+
+    def append_log(self, action, details, trigger=None):
         ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         line = f"[{ts}] {action}: {details}\n"
-        with open(LOG_PATH, "a", encoding="utf-8") as f:
-            f.write(line)
+        self.change_log.write(line)
+        self.event_store.record(action, trigger, getattr(self, "active_profile", None), details)
+
+    def _flush_event_store(self):
+        try:
+            self.event_store.flush()
+        except sqlite3.Error:
+            pass
+        self.root.after(EVENTS_FLUSH_INTERVAL, self._flush_event_store)
+
+    def _report_worker_error(self, action, details):
+        self._worker_errors.put((action, details))
+
+    def _flush_change_log(self):
+        while True:
+            try:
+                action, details = self._worker_errors.get_nowait()
+            except queue.Empty:
+                break
+            self.append_log(action, details)
+        try:
+            self.change_log.flush()
+        except OSError:
+            pass
+        self.root.after(LOG_FLUSH_INTERVAL, self._flush_change_log)
 
     def should_update_info(self):
         return self.config.get("auto_update_info", True)
@@ -988,22 +3983,253 @@ class BinderApp:
         self.write_info_file("teleport.txt", teleports, title="Телепорты")
 
     def open_log_window(self):
+        self.change_log.flush()
+        segments = self.change_log.segments()
+        names = ["Текущий"] + [f"Архив {number}" for number in range(1, len(segments))]
+        self.open_paged_viewer("Log", segments, names=names, start_at_end=True, append_only=True)
+
+    def open_paged_viewer(self, title, paths, names=None, start_at_end=False, append_only=False):
         win = tk.Toplevel(self.root)
-        win.title("Log")
+        win.title(title)
         win.geometry("640x460")
         win.configure(bg=THEME["bg"])
 
-        text = tk.Text(win, wrap="word")
-        text.pack(fill="both", expand=True, padx=10, pady=10)
+        bar = ttk.Frame(win)
+        bar.pack(fill="x", padx=10, pady=(10, 0))
+        segment_var = tk.StringVar(value=names[0] if names else "")
+        if names and len(names) > 1:
+            segment_box = ttk.Combobox(bar, textvariable=segment_var, values=names, state="readonly", width=12)
+            segment_box.pack(side="left", padx=(0, 8))
+        search_entry = tk.Entry(bar, width=28)
+        search_entry.pack(side="left")
+        style_entry(search_entry)
+        find_btn = self.create_button(bar, text="Найти", command=None)
+        find_btn.pack(side="left", padx=6)
+        status = ttk.Label(bar, text="", style="Muted.TLabel")
+        status.pack(side="right")
+
+        body = ttk.Frame(win)
+        body.pack(fill="both", expand=True, padx=10, pady=10)
+        text = tk.Text(body, wrap="word")
+        scrollbar = ttk.Scrollbar(body, orient="vertical")
+        scrollbar.pack(side="right", fill="y")
+        text.pack(side="left", fill="both", expand=True)
         style_text(text)
+        text.tag_configure("match", background=THEME["accent"], foreground=THEME["bg"])
+        linespace = tkfont.Font(font=text.cget("font")).metrics("linespace") or 16
+        state = {"path": paths[0], "top": 0, "match": -1, "index": None, "end": start_at_end}
 
+        def load_index():
+            try:
+                state["index"] = open_line_index(state["path"], append_only=append_only and state["path"] == paths[0])
+            except (OSError, EOFError):
+                state["index"] = None
+            return state["index"]
+
+        def visible_rows():
+            return max(1, text.winfo_height() // linespace)
+
+        def render():
+            index = load_index()
+            text.config(state="normal")
+            text.delete("1.0", tk.END)
+            if index is None or not len(index):
+                text.insert("1.0", "Файл не найден" if index is None else "Файл пуст.")
+                text.config(state="disabled")
+                scrollbar.set(0.0, 1.0)
+                status.config(text="")
+                return
+            total = len(index)
+            rows = visible_rows()
+            if state["end"]:
+                state["top"] = total - rows
+                state["end"] = False
+            state["top"] = max(0, min(state["top"], total - rows))
+            top = state["top"]
+            text.insert("1.0", index.read(top, top + rows))
+            needle = search_entry.get()
+            if needle:
+                pos = "1.0"
+                while True:
+                    pos = text.search(needle, pos, stopindex=tk.END, nocase=True)
+                    if not pos:
+                        break
+                    end = f"{pos}+{len(needle)}c"
+                    text.tag_add("match", pos, end)
+                    pos = end
+            text.config(state="disabled")
+            scrollbar.set(top / total, min(1.0, (top + rows) / total))
+            status.config(text=f"{top + 1}–{min(total, top + rows)} из {total}")
+
+        def scroll(delta):
+            state["top"] += delta
+            render()
+
+        def on_scrollbar(action, value, unit=None):
+            index = state["index"]
+            if index is None:
+                return
+            if action == "moveto":
+                state["top"] = int(float(value) * len(index))
+                render()
+            elif action == "scroll":
+                scroll(int(value) * (visible_rows() if unit == "pages" else 1))
+
+        def on_wheel(event):
+            if getattr(event, "num", None) in (4, 5):
+                scroll(-3 if event.num == 4 else 3)
+            else:
+                scroll(-3 if event.delta > 0 else 3)
+            return "break"
+
+        def find_next(_event=None):
+            index = state["index"] or load_index()
+            needle = search_entry.get()
+            if index is None or not needle:
+                render()
+                return
+            start = state["match"] + 1 if state["match"] >= 0 else state["top"]
+            line = index.find(needle, start)
+            if line == -1:
+                status.config(text="Не найдено")
+                return
+            state["match"] = line
+            state["top"] = line
+            render()
+
+        def on_segment(_event=None):
+            state["path"] = paths[names.index(segment_var.get())]
+            state["top"] = 0
+            state["match"] = -1
+            state["end"] = start_at_end
+            render()
+
+        scrollbar.configure(command=on_scrollbar)
+        find_btn.set_command(find_next)
+        search_entry.bind("<Return>", find_next)
+        if names and len(names) > 1:
+            segment_box.bind("<<ComboboxSelected>>", on_segment)
+        text.bind("<MouseWheel>", on_wheel)
+        text.bind("<Button-4>", on_wheel)
+        text.bind("<Button-5>", on_wheel)
+        for key, delta in (("<Up>", -1), ("<Down>", 1)):
+            text.bind(key, lambda _e, d=delta: scroll(d) or "break")
+        text.bind("<Prior>", lambda _e: scroll(-visible_rows()) or "break")
+        text.bind("<Next>", lambda _e: scroll(visible_rows()) or "break")
+        text.bind("<Configure>", lambda _e: render())
+        render()
+
+    def open_stats_window(self):
         try:
-            with open(LOG_PATH, "r", encoding="utf-8") as f:
-                text.insert("1.0", f.read())
-        except FileNotFoundError:
-            text.insert("1.0", "Log пуст.")
+            self.event_store.flush()
+            top = self.event_store.top_triggers(limit=50)
+            counts = self.event_store.trigger_counts()
+            hours = self.event_store.hourly_usage()
+        except sqlite3.Error as exc:
+            messagebox.showwarning("Ошибка", f"Не удалось прочитать статистику: {exc}")
+            return
 
-        text.config(state="disabled")
+        win = tk.Toplevel(self.root)
+        win.title("Статистика")
+        win.geometry("860x480")
+        win.configure(bg=THEME["bg"])
+
+        body = ttk.Frame(win)
+        body.pack(fill="both", expand=True, padx=10, pady=10)
+
+        def column(title):
+            frame = ttk.Frame(body)
+            frame.pack(side="left", fill="both", expand=True, padx=(0, 10))
+            ttk.Label(frame, text=title).pack(anchor="w", pady=(0, 6))
+            listbox = tk.Listbox(frame)
+            listbox.pack(fill="both", expand=True)
+            style_listbox(listbox)
+            return listbox
+
+        top_list = column("Популярные триггеры")
+        for trigger, uses in top:
+            top_list.insert(tk.END, f"{uses:>6}  {trigger}")
+
+        unused = []
+        seen = set()
+        for item in list(self.commands_data) + list(self.phrases_data):
+            trigger = item.get("trigger") if isinstance(item, dict) else None
+            if trigger and trigger not in seen and trigger not in counts:
+                seen.add(trigger)
+                unused.append(trigger)
+        unused_list = column(f"Не использовались ({len(unused)})")
+        for trigger in unused:
+            unused_list.insert(tk.END, trigger)
+
+        hours_list = column("По часам")
+        peak = max(hours) or 1
+        for hour, count in enumerate(hours):
+            bar = "█" * round(20 * count / peak)
+            hours_list.insert(tk.END, f"{hour:02d}:00  {bar} {count}")
+
+        stats = dict(getattr(self, "_binder_stats", {}))
+
+        def average(hits, total_ns):
+            return f"{stats.get(total_ns, 0) / stats[hits] / 1000:.1f} мкс" if stats.get(hits) else "—"
+
+        hot = self._binder_snapshot.hot if hasattr(self, "_binder_snapshot") else frozenset()
+        ttk.Label(
+            win,
+            text=(
+                f"Горячий кэш ({len(hot)}): {stats.get('hot_hits', 0)} попаданий, {average('hot_hits', 'hot_ns')} | "
+                f"полный поиск: {stats.get('cold_hits', 0)}, {average('cold_hits', 'cold_ns')} | "
+                f"без совпадения: {stats.get('misses', 0)}, {average('misses', 'miss_ns')}"
+            ),
+            style="Muted.TLabel",
+        ).pack(anchor="w", padx=10, pady=(0, 10))
+
+    def open_stalls_window(self):
+        win = tk.Toplevel(self.root)
+        win.title("Зависания интерфейса")
+        win.geometry("900x480")
+        win.configure(bg=THEME["bg"])
+
+        ttk.Label(
+            win,
+            text=f"Паузы главного потока дольше {round(self.stall_watchdog.threshold * 1000)} мс (последние {STALL_REPORTS_LIMIT}).",
+            style="Muted.TLabel",
+        ).pack(anchor="w", padx=10, pady=(10, 6))
+
+        body = ttk.Frame(win)
+        body.pack(fill="both", expand=True, padx=10)
+        listbox = tk.Listbox(body, width=32)
+        listbox.pack(side="left", fill="y", padx=(0, 10))
+        style_listbox(listbox)
+        text = tk.Text(body, wrap="none")
+        text.pack(side="left", fill="both", expand=True)
+        style_text(text)
+
+        reports = []
+
+        def refresh():
+            reports[:] = reversed(self.stall_watchdog.snapshot())
+            listbox.delete(0, tk.END)
+            for report in reports:
+                listbox.insert(tk.END, f"{report.get('at', '')}  {report.get('duration_ms', 0)} мс")
+            text.delete("1.0", tk.END)
+
+        def show(_event=None):
+            selection = listbox.curselection()
+            if not selection:
+                return
+            text.delete("1.0", tk.END)
+            text.insert("1.0", reports[selection[0]].get("stack", ""))
+
+        def clear():
+            self.stall_watchdog.clear()
+            refresh()
+
+        listbox.bind("<<ListboxSelect>>", show)
+        btns = ttk.Frame(win)
+        btns.pack(pady=10)
+        self.create_button(btns, text="Обновить", command=refresh).pack(side="left", padx=4)
+        self.create_button(btns, text="Очистить", command=clear).pack(side="left", padx=4)
+        refresh()
 
     def build_info_screen(self):
         card = self.build_screen_shell(
@@ -1023,22 +4249,7 @@ class BinderApp:
             self.pack_content_button(btn, pady=4)
 
     def open_text_window(self, title, path):
-        win = tk.Toplevel(self.root)
-        win.title(title)
-        win.geometry("620x460")
-        win.configure(bg=THEME["bg"])
-
-        text = tk.Text(win, wrap="word")
-        text.pack(fill="both", expand=True, padx=10, pady=10)
-        style_text(text)
-
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                text.insert("1.0", f.read())
-        except FileNotFoundError:
-            text.insert("1.0", "Файл не найден")
-
-        text.config(state="disabled")
+        self.open_paged_viewer(title, [path])
 
     def build_commands_screen(self):
         self.commands_data = self.load_list(BINDS_PATH)
@@ -1087,7 +4298,7 @@ class BinderApp:
         )
         reset_btn.pack(side="left", padx=(6, 0))
 
-        listbox = tk.Listbox(main, width=26)
+        listbox = tk.Listbox(main, width=26, selectmode=tk.EXTENDED, exportselection=False)
         listbox.pack(in_=list_panel, fill="y")
         style_listbox(listbox)
 
@@ -1142,12 +4353,81 @@ class BinderApp:
         self.create_button(btns, text="Удалить", command=lambda: self.bind_delete(ui)).pack(
             side="left", padx=4
         )
+        self.create_button(btns, text="Анализ", command=self.open_trigger_report).pack(side="left", padx=4)
+
+        bulk_btns = ttk.Frame(right, style="CardBody.TFrame")
+        bulk_btns.pack(pady=(0, 8), anchor="w")
+        other = "Фразы" if title == "Команды" else "Команды"
+        self.create_button(bulk_btns, text=f"Переместить в «{other}»", command=lambda: self.bind_move(ui)).pack(
+            side="left", padx=4
+        )
+        self.create_button(bulk_btns, text="Найти и заменить", command=lambda: self.open_bind_replace(ui)).pack(
+            side="left", padx=4
+        )
+        self.create_button(bulk_btns, text="Отменить", command=self.history_undo).pack(side="left", padx=4)
+        self.create_button(bulk_btns, text="Повторить", command=self.history_redo).pack(side="left", padx=4)
+
+        issues_label = ttk.Label(right, text="", style="CardMuted.TLabel")
+        issues_label.pack(anchor="w")
+        ui["issues"] = issues_label
 
         listbox.bind("<<ListboxSelect>>", lambda e: self.bind_on_select(ui))
         search_entry.bind("<KeyRelease>", lambda e: self.apply_bind_filter(ui))
         reset_btn.set_command(lambda: self.clear_bind_filter(ui))
         return ui
 
+    def run_trigger_analysis(self):
+        self.trigger_report = analyze_triggers(
+            [("Команды", self.commands_data), ("Фразы", self.phrases_data)]
+        )
+        report = self.trigger_report
+        summary = (
+            f'Дубликаты: {len(report["duplicates"])}, '
+            f'перекрытия: {len(report["shadowed"])}, '
+            f'RU/EN-коллизии: {len(report["aliases"])}, '
+            f'RU/EN-пары: {len(report["pairs"])}'
+        )
+        for ui in (self.commands_ui, self.phrases_ui):
+            ui["issues"].config(text=summary)
+
+    def format_trigger_report(self):
+        report = self.trigger_report
+        lines = []
+        if report["duplicates"]:
+            lines.append("Дубликаты (срабатывает последний):")
+            for trigger, places in report["duplicates"]:
+                where = ", ".join(f"{label} #{idx + 1}" for label, idx, _text in places)
+                lines.append(f"  {trigger}: {where}")
+            lines.append("")
+        if report["shadowed"]:
+            lines.append("Перекрытия по окончанию (длинный триггер скрывает короткий):")
+            for shorter, longer in report["shadowed"]:
+                lines.append(f"  {shorter} ⊂ {longer}")
+            lines.append("")
+        if report["aliases"]:
+            lines.append("RU/EN-коллизии (одинаковая раскладка, разный текст):")
+            for fold, group in report["aliases"]:
+                lines.append(f"  {fold}: " + ", ".join(trigger for trigger, _text in group))
+            lines.append("")
+        if report["pairs"]:
+            lines.append("RU/EN-пары (одинаковый текст, можно схлопнуть):")
+            for fold, group in report["pairs"]:
+                lines.append(f"  {fold}: " + ", ".join(trigger for trigger, _text in group))
+            lines.append("")
+        return "\n".join(lines) or "Конфликтов не найдено."
+
+    def open_trigger_report(self):
+        self.run_trigger_analysis()
+        win = tk.Toplevel(self.root)
+        win.title("Анализ триггеров")
+        win.geometry("620x460")
+        win.configure(bg=THEME["bg"])
+        text = tk.Text(win, wrap="word")
+        text.pack(fill="both", expand=True, padx=10, pady=10)
+        style_text(text)
+        text.insert("1.0", self.format_trigger_report())
+        text.config(state="disabled")
+
     def focus_search(self, _event=None):
         screen = getattr(self, "active_screen", None)
         if not screen or not hasattr(self, "search_entries"):
@@ -1180,6 +4460,9 @@ class BinderApp:
         data_list = getattr(self, ui["data_ref"])
         self.refresh_bind_list(ui, data_list)
 
+    def get_selected_indices(self, ui):
+        return [ui["index_map"][pos] for pos in ui["listbox"].curselection() if pos < len(ui["index_map"])]
+
     def get_selected_index(self, ui):
         selection = ui["listbox"].curselection()
         if not selection:
@@ -1215,19 +4498,40 @@ class BinderApp:
         if cursor_raw and not cursor_raw.isdigit():
             messagebox.showwarning("Проверьте данные", "Сдвиг курсора должен быть числом.")
             return
+        try:
+            compile_macro(text)
+        except ValueError as exc:
+            messagebox.showwarning("Проверьте данные", f"Ошибка в макросе: {exc}.")
+            return
+        if is_param_trigger(trigger):
+            try:
+                parse_param_trigger(trigger)
+            except ValueError as exc:
+                messagebox.showwarning("Проверьте данные", f"Ошибка в триггере: {exc}.")
+                return
+        problems = self.admin_catalog().check_text(text)
+        if problems and not messagebox.askyesno(
+            "Проверка команд",
+            "\n".join(problems) + "\n\nСохранить всё равно?",
+        ):
+            return
         cursor_back = int(cursor_raw) if cursor_raw else 0
         data_list = getattr(self, ui["data_ref"])
         item = {"trigger": trigger, "text": text}
         if cursor_back:
             item["cursor_back"] = cursor_back
         original_index = len(data_list)
+        snapshot = self.history_begin()
         data_list.append(item)
+        touched = {trigger}
         if ui["label"] == "Команды":
-            self.maybe_add_alias(data_list, trigger, text, cursor_back, ui["label"])
+            touched |= self.sync_command_aliases({trigger})
         save_json(ui["path"], data_list)
-        self._reload_binder_map()
-        self.append_log("Добавлено", f'{ui["label"]}: {trigger} -> {text}')
+        self.history_commit(f'{ui["label"]}: добавление {trigger}', snapshot)
+        self._refresh_binder_triggers(touched)
+        self.append_log("Добавлено", f'{ui["label"]}: {trigger} -> {text}', trigger=trigger)
         self.update_info_files()
+        self.run_trigger_analysis()
         self.refresh_bind_list(ui, data_list)
         if original_index in ui["index_map"]:
             ui["listbox"].selection_clear(0, tk.END)
@@ -1247,55 +4551,266 @@ class BinderApp:
         if cursor_raw and not cursor_raw.isdigit():
             messagebox.showwarning("Проверьте данные", "Сдвиг курсора должен быть числом.")
             return
+        try:
+            compile_macro(text)
+        except ValueError as exc:
+            messagebox.showwarning("Проверьте данные", f"Ошибка в макросе: {exc}.")
+            return
+        if is_param_trigger(trigger):
+            try:
+                parse_param_trigger(trigger)
+            except ValueError as exc:
+                messagebox.showwarning("Проверьте данные", f"Ошибка в триггере: {exc}.")
+                return
+        problems = self.admin_catalog().check_text(text)
+        if problems and not messagebox.askyesno(
+            "Проверка команд",
+            "\n".join(problems) + "\n\nСохранить всё равно?",
+        ):
+            return
         cursor_back = int(cursor_raw) if cursor_raw else 0
         data_list = getattr(self, ui["data_ref"])
         if idx >= len(data_list):
             return
-        item = data_list[idx]
+        snapshot = self.history_begin()
+        item = dict(data_list[idx])
         old_trigger = item.get("trigger", "")
         old_text = self.bind_get_text(item)
         item["trigger"] = trigger
         self.bind_set_text(item, text)
+        item.pop("alias_of", None)
         if cursor_back:
             item["cursor_back"] = cursor_back
         else:
             item.pop("cursor_back", None)
+        data_list[idx] = item
+        touched = {trigger, old_trigger}
         if ui["label"] == "Команды":
-            self.maybe_add_alias(data_list, trigger, text, cursor_back, ui["label"])
+            touched |= self.sync_command_aliases({trigger, old_trigger})
+            idx = next((pos for pos, other in enumerate(data_list) if other is item), idx)
         save_json(ui["path"], data_list)
-        self._reload_binder_map()
+        self.history_commit(f'{ui["label"]}: изменение {old_trigger}', snapshot)
+        self._refresh_binder_triggers(touched)
         self.append_log(
             "Изменено",
             f'{ui["label"]}: {old_trigger} -> {old_text} | {trigger} -> {text}',
+            trigger=trigger,
         )
         self.update_info_files()
+        self.run_trigger_analysis()
         self.refresh_bind_list(ui, data_list)
         if idx in ui["index_map"]:
             ui["listbox"].selection_clear(0, tk.END)
             ui["listbox"].selection_set(ui["index_map"].index(idx))
 
+    def _history_collection(self, ref):
+        if ref.startswith("autofix:"):
+            return self.autofix_data.setdefault(ref.split(":", 1)[1], [])
+        if ref == "variables":
+            return self.config.setdefault("variables", {})
+        return getattr(self, ref)
+
+    def history_begin(self):
+        snapshot = {}
+        for ref in HISTORY_REFS:
+            collection = self._history_collection(ref)
+            snapshot[ref] = dict(collection) if isinstance(collection, dict) else list(collection)
+        return snapshot
+
+    def history_commit(self, label, snapshot):
+        changes = []
+        for ref, before in snapshot.items():
+            after = self._history_collection(ref)
+            if isinstance(before, dict):
+                diff = diff_dicts(before, after)
+                kind = "dict"
+            else:
+                diff = diff_lists(before, after)
+                kind = "list"
+            if diff:
+                changes.append((ref, kind, diff))
+        self.history.push(label, changes)
+
+    def history_undo(self, event=None):
+        if event is not None and isinstance(event.widget, (tk.Entry, tk.Text)):
+            return
+        self._history_step(self.history.undo_stack, self.history.redo_stack, forward=False)
+
+    def history_redo(self, event=None):
+        if event is not None and isinstance(event.widget, (tk.Entry, tk.Text)):
+            return
+        self._history_step(self.history.redo_stack, self.history.undo_stack, forward=True)
+
+    def _history_step(self, source, target, forward):
+        if not source:
+            return
+        label, changes = source.pop()
+        touched = set()
+        refs = set()
+        for ref, kind, diff in changes:
+            EditHistory.apply(self._history_collection(ref), kind, diff, forward)
+            refs.add(ref)
+            if kind == "list" and ref in ("commands_data", "phrases_data"):
+                for _i1, _i2, old, _j1, _j2, new in diff:
+                    touched.update(item.get("trigger", "") for item in old + new if isinstance(item, dict))
+        target.append((label, changes))
+
+        uis = [ui for ui in (self.commands_ui, self.phrases_ui) if ui["data_ref"] in refs]
+        for ui in uis:
+            save_json(ui["path"], getattr(self, ui["data_ref"]))
+            self.refresh_bind_list(ui, getattr(self, ui["data_ref"]))
+        if touched:
+            self._refresh_binder_triggers(touched)
+            self.run_trigger_analysis()
+        autofix_keys = [ref.split(":", 1)[1] for ref in refs if ref.startswith("autofix:")]
+        if autofix_keys:
+            save_json(AUTOFIX_PATH, self.autofix_data)
+            for key in autofix_keys:
+                self.refresh_autofix_list(key)
+        if "variables" in refs:
+            save_config(self.config)
+            self.refresh_variables_list()
+        if "hotkeys_data" in refs:
+            self._apply_hotkeys_change()
+        self.update_info_files()
+        self.append_log("Повтор" if forward else "Отмена", label)
+
+    def apply_bind_transaction(self, touched, uis):
+        touched = set(touched)
+        if "Команды" in {ui["label"] for ui in uis}:
+            touched |= self.sync_command_aliases(touched)
+        for ui in uis:
+            save_json(ui["path"], getattr(self, ui["data_ref"]))
+        self._refresh_binder_triggers(touched)
+        self.update_info_files()
+        self.run_trigger_analysis()
+        for ui in uis:
+            self.refresh_bind_list(ui, getattr(self, ui["data_ref"]))
+
     def bind_delete(self, ui):
-        idx = self.get_selected_index(ui)
-        if idx is None:
+        indices = self.get_selected_indices(ui)
+        if not indices:
             messagebox.showwarning("Нет выбора", "Выберите элемент для удаления.")
             return
         data_list = getattr(self, ui["data_ref"])
-        if idx >= len(data_list):
-            return
-        if not messagebox.askyesno("Подтвердите", "Удалить выбранный элемент?"):
+        question = "Удалить выбранный элемент?" if len(indices) == 1 else f"Удалить выбранные элементы ({len(indices)})?"
+        if not messagebox.askyesno("Подтвердите", question):
             return
-        item = data_list[idx]
-        old_trigger = item.get("trigger", "")
-        old_text = self.bind_get_text(item)
-        data_list.pop(idx)
-        save_json(ui["path"], data_list)
-        self._reload_binder_map()
-        self.append_log("Удалено", f'{ui["label"]}: {old_trigger} -> {old_text}')
-        self.update_info_files()
-        self.refresh_bind_list(ui, data_list)
+        snapshot = self.history_begin()
+        selected = set(indices)
+        removed = [data_list[idx] for idx in indices]
+        data_list[:] = [item for idx, item in enumerate(data_list) if idx not in selected]
+        for item in removed:
+            old_trigger = item.get("trigger", "")
+            self.append_log(
+                "Удалено",
+                f'{ui["label"]}: {old_trigger} -> {self.bind_get_text(item)}',
+                trigger=old_trigger,
+            )
+        self.apply_bind_transaction({item.get("trigger", "") for item in removed}, [ui])
+        self.history_commit(f'{ui["label"]}: удаление ({len(removed)})', snapshot)
         ui["trigger"].delete(0, tk.END)
         ui["text"].delete("1.0", tk.END)
 
+    def bind_move(self, ui):
+        indices = self.get_selected_indices(ui)
+        if not indices:
+            messagebox.showwarning("Нет выбора", "Выберите элементы для перемещения.")
+            return
+        target = self.phrases_ui if ui is self.commands_ui else self.commands_ui
+        source_list = getattr(self, ui["data_ref"])
+        target_list = getattr(self, target["data_ref"])
+        selected = set(indices)
+        moved = [source_list[idx] for idx in indices if not source_list[idx].get("alias_of")]
+        if not moved:
+            messagebox.showwarning("Нет выбора", "Авто-алиасы перемещаются вместе с командой.")
+            return
+        snapshot = self.history_begin()
+        source_list[:] = [item for idx, item in enumerate(source_list) if idx not in selected or item.get("alias_of")]
+        target_list.extend(moved)
+        for item in moved:
+            self.append_log(
+                "Изменено",
+                f'{ui["label"]} -> {target["label"]}: {item.get("trigger", "")}',
+                trigger=item.get("trigger"),
+            )
+        self.apply_bind_transaction({item.get("trigger", "") for item in moved}, [ui, target])
+        self.history_commit(f'{ui["label"]} -> {target["label"]}: перемещение ({len(moved)})', snapshot)
+
+    def open_bind_replace(self, ui):
+        win = tk.Toplevel(self.root)
+        win.title(f'Найти и заменить — {ui["label"]}')
+        win.geometry("460x260")
+        win.configure(bg=THEME["bg"])
+
+        ttk.Label(win, text="Найти (регулярное выражение)").pack(anchor="w", padx=12, pady=(12, 0))
+        pattern_entry = tk.Entry(win)
+        pattern_entry.pack(fill="x", padx=12, pady=(2, 8))
+        style_entry(pattern_entry)
+
+        ttk.Label(win, text="Заменить на").pack(anchor="w", padx=12)
+        replace_entry = tk.Entry(win)
+        replace_entry.pack(fill="x", padx=12, pady=(2, 8))
+        style_entry(replace_entry)
+
+        only_selected = tk.BooleanVar(value=bool(ui["listbox"].curselection()))
+        ttk.Checkbutton(win, text="Только выделенные", variable=only_selected, style="Muted.TCheckbutton").pack(
+            anchor="w", padx=12
+        )
+
+        def apply():
+            try:
+                pattern = re.compile(pattern_entry.get())
+            except re.error as exc:
+                messagebox.showwarning("Проверьте данные", f"Ошибка в выражении: {exc}", parent=win)
+                return
+            if not pattern.pattern:
+                messagebox.showwarning("Проверьте данные", "Введите выражение.", parent=win)
+                return
+            replacement = replace_entry.get()
+            if only_selected.get():
+                indices = self.get_selected_indices(ui)
+            else:
+                indices = range(len(getattr(self, ui["data_ref"])))
+            if self.bind_replace(ui, indices, pattern, replacement, parent=win):
+                win.destroy()
+
+        self.create_button(win, text="Заменить", command=apply, kind="primary").pack(pady=12)
+
+    def bind_replace(self, ui, indices, pattern, replacement, parent=None):
+        data_list = getattr(self, ui["data_ref"])
+        changes = []
+        for idx in indices:
+            item = data_list[idx]
+            if item.get("alias_of"):
+                continue
+            old_text = self.bind_get_text(item)
+            try:
+                new_text = pattern.sub(replacement, old_text)
+            except (re.error, IndexError) as exc:
+                messagebox.showwarning("Проверьте данные", f"Ошибка в замене: {exc}", parent=parent)
+                return False
+            if new_text != old_text and new_text.strip():
+                changes.append((idx, old_text, new_text))
+        if not changes:
+            messagebox.showinfo("Найти и заменить", "Совпадений не найдено.", parent=parent)
+            return False
+        if not messagebox.askyesno("Подтвердите", f"Изменить элементов: {len(changes)}?", parent=parent):
+            return False
+        snapshot = self.history_begin()
+        for idx, old_text, new_text in changes:
+            item = dict(data_list[idx])
+            self.bind_set_text(item, new_text)
+            data_list[idx] = item
+            self.append_log(
+                "Изменено",
+                f'{ui["label"]}: {item.get("trigger", "")} -> {old_text} | {item.get("trigger", "")} -> {new_text}',
+                trigger=item.get("trigger"),
+            )
+        self.apply_bind_transaction({data_list[idx].get("trigger", "") for idx, _old, _new in changes}, [ui])
+        self.history_commit(f'{ui["label"]}: замена ({len(changes)})', snapshot)
+        return True
+
     def build_autofix_screen(self):
         card = self.build_screen_shell(
             "Автоисправление",
@@ -1392,9 +4907,11 @@ class BinderApp:
         if not from_val or not to_val:
             messagebox.showwarning("Проверьте данные", "Заполните оба поля.")
             return
+        snapshot = self.history_begin()
         items = self.autofix_data.setdefault(ui["key"], [])
         items.append({"from": from_val, "to": to_val})
         save_json(AUTOFIX_PATH, self.autofix_data)
+        self.history_commit(f'{ui["label"]}: добавление {from_val}', snapshot)
         self.append_log("Добавлено", f'{ui["label"]} ({ui["key"]}): {from_val} -> {to_val}')
         self.update_info_files()
         self.refresh_autofix_list(ui["key"])
@@ -1415,9 +4932,11 @@ class BinderApp:
         items = self.autofix_data.get(ui["key"], [])
         if idx >= len(items):
             return
+        snapshot = self.history_begin()
         old = items[idx]
         items[idx] = {"from": from_val, "to": to_val}
         save_json(AUTOFIX_PATH, self.autofix_data)
+        self.history_commit(f'{ui["label"]}: изменение {old.get("from")}', snapshot)
         self.append_log(
             "Изменено",
             f'{ui["label"]} ({ui["key"]}): {old.get("from")} -> {old.get("to")} | {from_val} -> {to_val}',
@@ -1438,8 +4957,10 @@ class BinderApp:
             return
         if not messagebox.askyesno("Подтвердите", "Удалить выбранный элемент?"):
             return
+        snapshot = self.history_begin()
         old = items.pop(idx)
         save_json(AUTOFIX_PATH, self.autofix_data)
+        self.history_commit(f'{ui["label"]}: удаление {old.get("from")}', snapshot)
         self.append_log(
             "Удалено",
             f'{ui["label"]} ({ui["key"]}): {old.get("from")} -> {old.get("to")}',
@@ -1449,6 +4970,303 @@ class BinderApp:
         ui["from"].delete(0, tk.END)
         ui["to"].delete(0, tk.END)
 
+    def build_hotkeys_screen(self):
+        card = self.build_screen_shell(
+            "Горячие клавиши",
+            "Горячие клавиши",
+            "Сочетания клавиш, которые отправляют текст или макрос.",
+        )
+        self.add_manage_switcher(card)
+
+        self.hotkeys_data = self.load_list(HOTKEYS_PATH)
+        self._chord_table = build_chord_table(self.hotkeys_data)
+
+        main = ttk.Frame(card, style="CardBody.TFrame")
+        main.pack(fill="both", expand=True)
+
+        self.hotkeys_list = tk.Listbox(main, width=34)
+        self.hotkeys_list.pack(side="left", fill="y", padx=(0, 12))
+        style_listbox(self.hotkeys_list)
+
+        right = ttk.Frame(main, style="CardBody.TFrame")
+        right.pack(fill="both", expand=True)
+
+        ttk.Label(right, text="Сочетание (например ctrl+alt+1)", style="Card.TLabel").pack(anchor="w")
+        self.hotkey_entry = tk.Entry(right)
+        self.hotkey_entry.pack(fill="x", pady=(2, 10))
+        style_entry(self.hotkey_entry)
+
+        ttk.Label(right, text="Текст", style="Card.TLabel").pack(anchor="w")
+        self.hotkey_text = tk.Text(right, height=6, wrap="word")
+        self.hotkey_text.pack(fill="x", pady=(2, 10))
+        style_text(self.hotkey_text)
+
+        btns = ttk.Frame(right, style="CardBody.TFrame")
+        btns.pack(pady=6)
+        self.create_button(btns, text="Добавить", command=self.hotkeys_add).pack(side="left", padx=4)
+        self.create_button(btns, text="Изменить", command=self.hotkeys_update).pack(side="left", padx=4)
+        self.create_button(btns, text="Удалить", command=self.hotkeys_delete).pack(side="left", padx=4)
+
+        self.hotkeys_list.bind("<<ListboxSelect>>", self.hotkeys_on_select)
+        self.refresh_hotkeys_list()
+
+    def refresh_hotkeys_list(self):
+        self.hotkeys_list.delete(0, tk.END)
+        for item in self.hotkeys_data:
+            preview = " ".join(item.get("text", "").split())
+            if len(preview) > 24:
+                preview = preview[:23] + "…"
+            self.hotkeys_list.insert(tk.END, f'{item.get("hotkey", "")}  —  {preview}')
+
+    def hotkeys_on_select(self, _):
+        selection = self.hotkeys_list.curselection()
+        if not selection or selection[0] >= len(self.hotkeys_data):
+            return
+        item = self.hotkeys_data[selection[0]]
+        self.hotkey_entry.delete(0, tk.END)
+        self.hotkey_entry.insert(0, item.get("hotkey", ""))
+        self.hotkey_text.delete("1.0", tk.END)
+        self.hotkey_text.insert("1.0", item.get("text", ""))
+
+    def _read_hotkey_form(self, skip=None):
+        chord_raw = self.hotkey_entry.get().strip()
+        text = self.hotkey_text.get("1.0", tk.END).strip()
+        if not chord_raw or not text:
+            messagebox.showwarning("Проверьте данные", "Заполните сочетание и текст.")
+            return None
+        try:
+            chord = parse_chord(chord_raw)
+            compile_macro(text)
+        except ValueError as exc:
+            messagebox.showwarning("Проверьте данные", f"Ошибка: {exc}.")
+            return None
+        for idx, item in enumerate(self.hotkeys_data):
+            if idx == skip:
+                continue
+            try:
+                other = parse_chord(item.get("hotkey", ""))
+            except ValueError:
+                continue
+            if other == chord:
+                messagebox.showwarning("Дубликат", "Такое сочетание уже назначено.")
+                return None
+        return {"hotkey": format_chord(*chord), "text": text}
+
+    def _apply_hotkeys_change(self):
+        save_json(HOTKEYS_PATH, self.hotkeys_data)
+        self._chord_table = build_chord_table(self.hotkeys_data)
+        self.refresh_hotkeys_list()
+
+    def hotkeys_add(self):
+        item = self._read_hotkey_form()
+        if item is None:
+            return
+        snapshot = self.history_begin()
+        self.hotkeys_data.append(item)
+        self._apply_hotkeys_change()
+        self.history_commit(f'Горячие клавиши: добавление {item["hotkey"]}', snapshot)
+        self.append_log("Добавлено", f'Горячие клавиши: {item["hotkey"]} -> {item["text"]}')
+
+    def hotkeys_update(self):
+        selection = self.hotkeys_list.curselection()
+        if not selection:
+            messagebox.showwarning("Нет выбора", "Выберите элемент для изменения.")
+            return
+        idx = selection[0]
+        item = self._read_hotkey_form(skip=idx)
+        if item is None:
+            return
+        snapshot = self.history_begin()
+        old = self.hotkeys_data[idx]
+        self.hotkeys_data[idx] = item
+        self._apply_hotkeys_change()
+        self.history_commit(f'Горячие клавиши: изменение {old.get("hotkey", "")}', snapshot)
+        self.append_log(
+            "Изменено",
+            f'Горячие клавиши: {old.get("hotkey", "")} -> {old.get("text", "")} | {item["hotkey"]} -> {item["text"]}',
+        )
+
+    def hotkeys_delete(self):
+        selection = self.hotkeys_list.curselection()
+        if not selection:
+            messagebox.showwarning("Нет выбора", "Выберите элемент для удаления.")
+            return
+        if not messagebox.askyesno("Подтвердите", "Удалить сочетание?"):
+            return
+        snapshot = self.history_begin()
+        old = self.hotkeys_data.pop(selection[0])
+        self._apply_hotkeys_change()
+        self.history_commit(f'Горячие клавиши: удаление {old.get("hotkey", "")}', snapshot)
+        self.append_log("Удалено", f'Горячие клавиши: {old.get("hotkey", "")} -> {old.get("text", "")}')
+        self.hotkey_entry.delete(0, tk.END)
+        self.hotkey_text.delete("1.0", tk.END)
+
+    def build_teleports_screen(self):
+        card = self.build_screen_shell(
+            "Телепорты",
+            "Телепорты",
+            "Каталог /ctp-команд: поиск по координатам и дубликаты.",
+        )
+        self.add_manage_switcher(card)
+        self.teleport_catalog = TeleportCatalog()
+
+        search_row = ttk.Frame(card, style="CardBody.TFrame")
+        search_row.pack(fill="x", pady=(0, 8))
+        search_entry = tk.Entry(search_row)
+        search_entry.pack(side="left", fill="x", expand=True)
+        style_entry(search_entry)
+        reset_btn = self.create_button(search_row, text="Сброс", command=None, kind="switcher")
+        reset_btn.pack(side="left", padx=(6, 0))
+
+        coords_row = ttk.Frame(card, style="CardBody.TFrame")
+        coords_row.pack(fill="x", pady=(0, 8))
+        coord_entries = []
+        for label in ("X", "Y", "Z", "Радиус"):
+            ttk.Label(coords_row, text=label, style="Card.TLabel").pack(side="left", padx=(0, 4))
+            entry = tk.Entry(coords_row, width=9)
+            entry.pack(side="left", padx=(0, 8))
+            style_entry(entry)
+            coord_entries.append(entry)
+        coord_entries[3].insert(0, "500")
+
+        btns = ttk.Frame(card, style="CardBody.TFrame")
+        btns.pack(fill="x", pady=(0, 8))
+
+        listbox = tk.Listbox(card)
+        listbox.pack(fill="both", expand=True)
+        style_listbox(listbox)
+
+        self.teleports_ui = {
+            "listbox": listbox,
+            "search": search_entry,
+            "coords": coord_entries,
+            "rows": [],
+        }
+        self.search_entries["Телепорты"] = search_entry
+
+        self.create_button(btns, text="Ближайший", command=self.teleports_nearest).pack(side="left", padx=4)
+        self.create_button(btns, text="В радиусе", command=self.teleports_within).pack(side="left", padx=4)
+        self.create_button(btns, text="Дубликаты", command=self.teleports_show_duplicates).pack(
+            side="left", padx=4
+        )
+        self.create_button(btns, text="Удалить дубликаты", command=self.teleports_remove_duplicates).pack(
+            side="left", padx=4
+        )
+
+        listbox.bind("<<ListboxSelect>>", lambda e: self.teleports_on_select())
+        search_entry.bind("<KeyRelease>", lambda e: self.refresh_teleport_list())
+        reset_btn.set_command(self.clear_teleport_filter)
+
+    def refresh_teleport_catalog(self):
+        self.teleport_catalog = TeleportCatalog(self.commands_data)
+        self.refresh_teleport_list()
+
+    def format_teleport_row(self, idx, dist=None):
+        trigger, (x, y, z), _text = self.teleport_catalog.entries[idx]
+        suffix = f"  [{dist:.1f} м]" if dist is not None else ""
+        return f"{trigger}  ({x:g}, {y:g}, {z:g}){suffix}"
+
+    def show_teleport_rows(self, rows):
+        ui = self.teleports_ui
+        ui["listbox"].delete(0, tk.END)
+        ui["rows"] = []
+        for idx, dist in rows:
+            if idx is None:
+                ui["listbox"].insert(tk.END, dist)
+            else:
+                ui["listbox"].insert(tk.END, self.format_teleport_row(idx, dist))
+            ui["rows"].append(idx)
+
+    def refresh_teleport_list(self):
+        query = self.teleports_ui["search"].get().strip().lower()
+        rows = []
+        for idx, (trigger, _coords, text) in enumerate(self.teleport_catalog.entries):
+            if query and query not in trigger.lower() and query not in text.lower():
+                continue
+            rows.append((idx, None))
+        self.show_teleport_rows(rows)
+
+    def clear_teleport_filter(self):
+        self.teleports_ui["search"].delete(0, tk.END)
+        self.refresh_teleport_list()
+
+    def teleports_on_select(self):
+        ui = self.teleports_ui
+        selection = ui["listbox"].curselection()
+        if not selection or selection[0] >= len(ui["rows"]):
+            return
+        idx = ui["rows"][selection[0]]
+        if idx is None:
+            return
+        for entry, value in zip(ui["coords"], self.teleport_catalog.entries[idx][1]):
+            entry.delete(0, tk.END)
+            entry.insert(0, f"{value:g}")
+
+    def get_teleport_query(self):
+        values = []
+        for entry in self.teleports_ui["coords"]:
+            raw = entry.get().strip().replace(",", ".")
+            try:
+                values.append(float(raw))
+            except ValueError:
+                messagebox.showwarning("Проверьте данные", "Координаты и радиус должны быть числами.")
+                return None
+        return tuple(values[:3]), values[3]
+
+    def teleports_nearest(self):
+        query = self.get_teleport_query()
+        if query is None:
+            return
+        coords, _radius = query
+        self.show_teleport_rows([(idx, dist) for dist, idx in self.teleport_catalog.nearest(coords, count=10)])
+
+    def teleports_within(self):
+        query = self.get_teleport_query()
+        if query is None:
+            return
+        coords, radius = query
+        self.show_teleport_rows([(idx, dist) for dist, idx in self.teleport_catalog.within(coords, radius)])
+
+    def teleports_show_duplicates(self):
+        groups = self.teleport_catalog.duplicate_groups()
+        rows = []
+        for num, group in enumerate(groups, 1):
+            rows.append((None, f"Группа {num}"))
+            first = self.teleport_catalog.entries[group[0]][1]
+            for idx in group:
+                rows.append((idx, TeleportCatalog.distance(first, self.teleport_catalog.entries[idx][1])))
+        if not rows:
+            rows.append((None, "Дубликатов не найдено."))
+        self.show_teleport_rows(rows)
+
+    def teleports_remove_duplicates(self):
+        groups = self.teleport_catalog.duplicate_groups()
+        extra = {self.teleport_catalog.entries[idx][0] for group in groups for idx in group[1:]}
+        keep = {self.teleport_catalog.entries[group[0]][0] for group in groups}
+        extra -= keep
+        if not extra:
+            messagebox.showinfo("Телепорты", "Дубликатов не найдено.")
+            return
+        if not messagebox.askyesno("Подтвердите", f"Удалить дубликаты ({len(extra)})?"):
+            return
+        removed = [
+            item
+            for item in self.commands_data
+            if item.get("trigger") in extra and parse_teleport(item.get("text", ""))
+        ]
+        snapshot = self.history_begin()
+        removed_ids = {id(item) for item in removed}
+        self.commands_data[:] = [item for item in self.commands_data if id(item) not in removed_ids]
+        for item in removed:
+            self.append_log(
+                "Удалено",
+                f'Телепорты (дубликат): {item.get("trigger", "")} -> {item.get("text", "")}',
+                trigger=item.get("trigger"),
+            )
+        self.apply_bind_transaction(extra, [self.commands_ui])
+        self.refresh_teleport_catalog()
+        self.history_commit(f"Телепорты: удаление дубликатов ({len(removed)})", snapshot)
+
     def build_variables_screen(self):
         card = self.build_screen_shell(
             "Переменные",
@@ -1457,8 +5275,13 @@ class BinderApp:
         )
 
         ttk.Label(card, text="Discord-переменные задаются в настройках.", style="CardMuted.TLabel").pack(
-            anchor="w", pady=(0, 10)
+            anchor="w", pady=(0, 2)
         )
+        ttk.Label(
+            card,
+            text="Динамические: " + " ".join(self.variable_resolvers.names()),
+            style="CardMuted.TLabel",
+        ).pack(anchor="w", pady=(0, 10))
 
         main = ttk.Frame(card, style="CardBody.TFrame")
         main.pack(fill="both", expand=True)
@@ -1493,6 +5316,9 @@ class BinderApp:
         self.var_value.pack(fill="x", pady=(2, 10))
         style_entry(self.var_value)
 
+        self.var_usage = ttk.Label(self.variables_form, text="", style="CardMuted.TLabel", wraplength=520)
+        self.var_usage.pack(anchor="w", pady=(0, 10))
+
         btns = ttk.Frame(right, style="CardBody.TFrame")
         btns.pack(pady=6)
 
@@ -1506,8 +5332,11 @@ class BinderApp:
     def refresh_variables_list(self):
         self.variables = self.config.get("variables", {})
         self.variables_list.delete(0, tk.END)
+        index = self._binder_snapshot.variables if hasattr(self, "_binder_snapshot") else None
         for key in sorted(self.variables.keys()):
-            self.variables_list.insert(tk.END, f"{key} = {self.variables[key]}")
+            users = len(index.users.get(key, ())) if index else 0
+            suffix = f"  [{users}]" if users else ""
+            self.variables_list.insert(tk.END, f"{key} = {self.variables[key]}{suffix}")
 
     def variables_on_select(self, _):
         selection = self.variables_list.curselection()
@@ -1519,6 +5348,39 @@ class BinderApp:
         self.var_key.insert(0, key)
         self.var_value.delete(0, tk.END)
         self.var_value.insert(0, str(self.variables.get(key, "")))
+        users = self._binder_snapshot.variables.triggers(key)
+        if users:
+            shown = ", ".join(users[:20]) + (" …" if len(users) > 20 else "")
+            self.var_usage.configure(text=f"Используется в биндах ({len(users)}): {shown}")
+        else:
+            self.var_usage.configure(text="Не используется в биндах.")
+
+    def rename_variable_refs(self, old, new):
+        users = set(self._binder_snapshot.variables.users.get(old, ()))
+        if not users:
+            return set()
+        pattern = f"%{old}%"
+        replacement = f"%{new}%"
+        uis = []
+        for ui in (self.commands_ui, self.phrases_ui):
+            data_list = getattr(self, ui["data_ref"])
+            changed = False
+            for idx, item in enumerate(data_list):
+                if not isinstance(item, dict) or item.get("trigger") not in users:
+                    continue
+                text = self.bind_get_text(item)
+                if pattern not in text:
+                    continue
+                item = dict(item)
+                self.bind_set_text(item, text.replace(pattern, replacement))
+                data_list[idx] = item
+                changed = True
+            if changed:
+                uis.append(ui)
+        if uis:
+            self.apply_bind_transaction(users, uis)
+            self.append_log("Изменено", f"Переменные: {pattern} -> {replacement} в биндах ({len(users)})")
+        return users
 
     def variables_add(self):
         if not self.variables_form_visible:
@@ -1529,8 +5391,10 @@ class BinderApp:
         if not key or not value:
             messagebox.showwarning("Проверьте данные", "Заполните оба поля.")
             return
+        snapshot = self.history_begin()
         self.config.setdefault("variables", {})[key] = value
         save_config(self.config)
+        self.history_commit(f"Переменные: добавление {key}", snapshot)
         self.append_log("Добавлено", f"Переменные: {key} = {value}")
         self.update_info_files()
         self.refresh_variables_list()
@@ -1550,11 +5414,20 @@ class BinderApp:
             return
         original_key = sorted(self.variables.keys())[selection[0]]
         old_value = self.variables.get(original_key, "")
+        users = self._binder_snapshot.variables.triggers(original_key) if key != original_key else []
+        rename_refs = bool(users) and messagebox.askyesno(
+            "Переименование",
+            f"Заменить %{original_key}% на %{key}% в биндах ({len(users)})?",
+        )
+        snapshot = self.history_begin()
+        if rename_refs:
+            self.rename_variable_refs(original_key, key)
         if key != original_key:
             self.variables.pop(original_key, None)
         self.variables[key] = value
         self.config["variables"] = self.variables
         save_config(self.config)
+        self.history_commit(f"Переменные: изменение {original_key}", snapshot)
         self.append_log(
             "Изменено",
             f"Переменные: {original_key} = {old_value} | {key} = {value}",
@@ -1570,9 +5443,11 @@ class BinderApp:
         key = sorted(self.variables.keys())[selection[0]]
         if not messagebox.askyesno("Подтвердите", "Удалить переменную?"):
             return
+        snapshot = self.history_begin()
         old_value = self.variables.pop(key, None)
         self.config["variables"] = self.variables
         save_config(self.config)
+        self.history_commit(f"Переменные: удаление {key}", snapshot)
         self.append_log("Удалено", f"Переменные: {key} = {old_value}")
         self.update_info_files()
         self.refresh_variables_list()
@@ -1619,6 +5494,16 @@ class BinderApp:
         self.profile_entry.pack(fill="x", pady=(2, 10))
         style_entry(self.profile_entry)
 
+        ttk.Label(right, text="Окна профиля (части заголовка через запятую)", style="Card.TLabel").pack(anchor="w")
+        self.profile_windows_entry = tk.Entry(right)
+        self.profile_windows_entry.pack(fill="x", pady=(2, 4))
+        style_entry(self.profile_windows_entry)
+        ttk.Label(
+            right,
+            text="Пусто — бинды срабатывают в любом окне.",
+            style="CardMuted.TLabel",
+        ).pack(anchor="w", pady=(0, 10))
+
         btns = ttk.Frame(right, style="CardBody.TFrame")
         btns.pack(pady=6)
 
@@ -1627,6 +5512,9 @@ class BinderApp:
         self.create_button(btns, text="Сделать активным", command=self.profiles_set_active).pack(
             side="left", padx=4
         )
+        self.create_button(btns, text="Сохранить окна", command=self.profiles_save_windows).pack(
+            side="left", padx=4
+        )
 
         self.profiles_list.bind("<<ListboxSelect>>", self.profiles_on_select)
         self.refresh_profiles_list()
@@ -1645,6 +5533,28 @@ class BinderApp:
             return
         self.profile_entry.delete(0, tk.END)
         self.profile_entry.insert(0, self.profiles_data[idx])
+        self.profile_windows_entry.delete(0, tk.END)
+        self.profile_windows_entry.insert(0, ", ".join(self.profile_window_filters(self.profiles_data[idx])))
+
+    def profile_window_filters(self, name):
+        return list(self.config.get("window_filters", {}).get(name, []))
+
+    def profiles_save_windows(self):
+        selection = self.profiles_list.curselection()
+        if not selection or selection[0] >= len(self.profiles_data):
+            messagebox.showwarning("Нет выбора", "Выберите профиль.")
+            return
+        name = self.profiles_data[selection[0]]
+        patterns = [part.strip() for part in self.profile_windows_entry.get().split(",") if part.strip()]
+        filters = self.config.setdefault("window_filters", {})
+        if patterns:
+            filters[name] = patterns
+        else:
+            filters.pop(name, None)
+        save_config(self.config)
+        if name == self.active_profile:
+            self.window_guard.set_patterns(patterns)
+        self.append_log("Изменено", f"Профили: окна {name} -> {', '.join(patterns) or '—'}")
 
     def profiles_add(self):
         name = self.profile_entry.get().strip()
@@ -1692,8 +5602,12 @@ class BinderApp:
         self.config["active_profile"] = self.active_profile
         save_config(self.config)
         self.profile_label.config(text=f"Активный профиль: {self.active_profile}")
+        self.window_guard.set_patterns(self.profile_window_filters(self.active_profile))
         self.append_log("Изменено", f"Профили: активный {old} -> {self.active_profile}")
         self.update_info_files()
+        self._mount_libraries()
+        self._reload_binder_map()
+        self.start_pack_sync()
 
     def build_import_export_screen(self):
         card = self.build_screen_shell(
@@ -1706,12 +5620,16 @@ class BinderApp:
         self.pack_content_button(btn_export, pady=6)
         btn_import = self.create_button(card, text="Импортировать данные", command=self.import_data, expand_x=True)
         self.pack_content_button(btn_import, pady=6)
+        btn_packs = self.create_button(card, text="Подписки на паки", command=self.open_subscriptions_window, expand_x=True)
+        self.pack_content_button(btn_packs, pady=6)
+        btn_libraries = self.create_button(card, text="Библиотеки (только чтение)", command=self.open_libraries_window, expand_x=True)
+        self.pack_content_button(btn_libraries, pady=6)
 
     def export_data(self):
         path = filedialog.asksaveasfilename(
             title="Экспорт данных",
             defaultextension=".json",
-            filetypes=[("JSON files", "*.json")],
+            filetypes=[("JSON files", "*.json"), ("Binder bundle", f"*{BUNDLE_EXT}")],
         )
         if not path:
             return
@@ -1722,54 +5640,384 @@ class BinderApp:
             "autofix": load_json(AUTOFIX_PATH, {"layout": [], "custom": []}),
             "profiles": load_json(PROFILES_PATH, ["default"]),
         }
-        save_json(path, payload)
+        if path.lower().endswith(BUNDLE_EXT):
+            save_bundle(path, payload)
+        else:
+            save_json(path, payload)
         messagebox.showinfo("Готово", "Данные экспортированы.")
 
+    def ask_import_policy(self):
+        win = tk.Toplevel(self.root)
+        win.title("Импорт")
+        win.geometry("420x220")
+        win.configure(bg=THEME["bg"])
+        win.transient(self.root)
+
+        ttk.Label(win, text="Совпадающие триггеры:").pack(anchor="w", padx=16, pady=(14, 6))
+        choice = tk.StringVar(value=IMPORT_KEEP_MINE)
+        for value, label in IMPORT_POLICIES:
+            tk.Radiobutton(
+                win,
+                text=label,
+                value=value,
+                variable=choice,
+                bg=THEME["bg"],
+                fg=THEME["fg"],
+                selectcolor=THEME["input"],
+                activebackground=THEME["bg"],
+                activeforeground=THEME["fg"],
+                font=(FONT_FAMILY, BASE_FONT_SIZE),
+            ).pack(anchor="w", padx=16)
+
+        result = {"policy": None}
+
+        def accept():
+            result["policy"] = choice.get()
+            win.destroy()
+
+        self.create_button(win, text="Импортировать", command=accept, kind="primary").pack(pady=12)
+        win.grab_set()
+        self.root.wait_window(win)
+        return result["policy"]
+
+    def import_bundle(self, path, policy):
+        return self.import_entries(iter_bundle(path), policy, label=f"Импорт: {os.path.basename(path)}")
+
+    def import_entries(self, entries, policy, sections=None, label="Импорт"):
+        snapshot = self.history_begin()
+        commands = RecordMerger(self.commands_data, "trigger", normalize_bind_entry, policy)
+        phrases = RecordMerger(self.phrases_data, "trigger", normalize_bind_entry, policy)
+        autofix = {
+            key: RecordMerger(
+                self.autofix_data.get(key, []),
+                "from",
+                normalize_autofix_entry,
+                policy,
+                allow_suffix=False,
+            )
+            for key in ("layout", "custom")
+        }
+        profiles = list(self.profiles_data)
+        config = None
+        config_conflicts = []
+
+        for section, value in entries:
+            if sections is not None and section not in sections:
+                continue
+            if section == "binds":
+                commands.add(value)
+            elif section == "phrases":
+                phrases.add(value)
+            elif section == "profiles":
+                if isinstance(value, str) and value.strip() and value not in profiles:
+                    profiles.append(value)
+            elif section == "autofix" and isinstance(value, dict):
+                for key, merger in autofix.items():
+                    items = value.get(key, [])
+                    for item in items if isinstance(items, list) else []:
+                        merger.add(item)
+            elif section == "config" and isinstance(value, dict):
+                config, config_conflicts = merge_config(self.config, value, policy)
+
+        if commands.changed:
+            self.commands_data = commands.items
+            save_json(BINDS_PATH, self.commands_data)
+            self.refresh_bind_list(self.commands_ui, self.commands_data)
+        if phrases.changed:
+            self.phrases_data = phrases.items
+            save_json(PHRASES_PATH, self.phrases_data)
+            self.refresh_bind_list(self.phrases_ui, self.phrases_data)
+        if any(merger.changed for merger in autofix.values()):
+            for key, merger in autofix.items():
+                self.autofix_data[key] = merger.items
+            save_json(AUTOFIX_PATH, self.autofix_data)
+            self.refresh_autofix_list("layout")
+            self.refresh_autofix_list("custom")
+        if profiles != self.profiles_data:
+            self.profiles_data = profiles
+            save_json(PROFILES_PATH, self.profiles_data)
+            self.refresh_profiles_list()
+        if config is not None:
+            self.config = config
+            with self._counters_lock:
+                self._counters = dict(self.config.get("counters", {}))
+                self._counters_dirty = False
+            if self.config.get("active_profile") not in self.profiles_data:
+                self.config["active_profile"] = self.active_profile
+            self.active_profile = self.config["active_profile"]
+            save_config(self.config)
+            self.refresh_variables_list()
+            self.profile_label.config(text=f"Активный профиль: {self.active_profile}")
+
+        self._refresh_binder_triggers(commands.touched | phrases.touched)
+        self.history_commit(label, snapshot)
+        return {
+            "Команды": commands,
+            "Фразы": phrases,
+            "Автоисправление (layout)": autofix["layout"],
+            "Автоисправление (custom)": autofix["custom"],
+        }, config_conflicts
+
+    def format_import_summary(self, summary, config_conflicts, limit=10):
+        lines = []
+        conflicts = []
+        for label, merger in summary.items():
+            stats = merger.stats
+            if not any(stats.values()):
+                continue
+            lines.append(
+                f"{label}: добавлено {stats['added']}, заменено {stats['replaced']}, "
+                f"с суффиксом {stats['renamed']}, пропущено {stats['skipped']}, "
+                f"без изменений {stats['unchanged']}, некорректных {stats['invalid']}"
+            )
+            conflicts.extend(key for key, _old, _new in merger.conflicts)
+        conflicts.extend(f"%{name}%" for name, _old, _new in config_conflicts)
+        if conflicts:
+            lines.append("")
+            lines.append(f"Конфликты ({len(conflicts)}):")
+            lines.extend(conflicts[:limit])
+            if len(conflicts) > limit:
+                lines.append(f"... и ещё {len(conflicts) - limit}")
+        return "\n".join(lines) or "Нет изменений."
+
     def import_data(self):
         path = filedialog.askopenfilename(
             title="Импорт данных",
-            filetypes=[("JSON files", "*.json")],
+            filetypes=[
+                ("Binder files", f"*.json *{BUNDLE_EXT}"),
+                ("JSON files", "*.json"),
+                ("Binder bundle", f"*{BUNDLE_EXT}"),
+            ],
         )
         if not path:
             return
-        data = load_json(path, {})
-        if not isinstance(data, dict):
+        policy = self.ask_import_policy()
+        if policy is None:
+            return
+        try:
+            summary, config_conflicts = self.import_bundle(path, policy)
+        except (OSError, UnicodeDecodeError, ValueError) + ZSTD_ERRORS:
             messagebox.showwarning("Ошибка", "Файл импорта повреждён.")
             return
-        if "config" in data:
-            save_json(CONFIG_PATH, data["config"])
-            self.config = load_config()
-            self.refresh_variables_list()
-            self.active_profile = self.config.get("active_profile", self.active_profile)
-        if "binds" in data:
-            save_json(BINDS_PATH, data["binds"])
-            self.commands_data = self.load_list(BINDS_PATH)
-            self.refresh_bind_list(self.commands_ui, self.commands_data)
-        if "phrases" in data:
-            save_json(PHRASES_PATH, data["phrases"])
-            self.phrases_data = self.load_list(PHRASES_PATH)
-            self.refresh_bind_list(self.phrases_ui, self.phrases_data)
-        if "autofix" in data:
-            save_json(AUTOFIX_PATH, data["autofix"])
-            self.autofix_data = self.load_dict(AUTOFIX_PATH, {"layout": [], "custom": []})
-            self.refresh_autofix_list("layout")
-            self.refresh_autofix_list("custom")
-        if "profiles" in data:
-            save_json(PROFILES_PATH, data["profiles"])
-            self.profiles_data = self.load_list(PROFILES_PATH)
-            if not self.profiles_data:
-                self.profiles_data = ["default"]
-                save_json(PROFILES_PATH, self.profiles_data)
-            if self.active_profile not in self.profiles_data:
-                self.active_profile = self.profiles_data[0]
-                self.config["active_profile"] = self.active_profile
-                save_config(self.config)
-            self.refresh_profiles_list()
-        self.profile_label.config(text=f"Активный профиль: {self.active_profile}")
-        self._reload_binder_map()
         self.update_info_files()
-        self.append_log("Импорт", f"Данные из {os.path.basename(path)}")
-        messagebox.showinfo("Готово", "Данные импортированы.")
+        self.run_trigger_analysis()
+        self.append_log("Импорт", f"Данные из {os.path.basename(path)} ({policy})")
+        messagebox.showinfo("Готово", self.format_import_summary(summary, config_conflicts))
+
+    def _setup_pack_sync(self):
+        self._pack_sync_running = False
+        self._pack_sync_again = None
+        self._pack_sync_after = None
+        self._pack_results = None
+        self._pack_index = self.load_dict(PACKS_INDEX_PATH, {})
+        self._pack_sync_after = self.root.after(1000, self.start_pack_sync)
+
+    def get_subscriptions(self):
+        return list(self.config.get("subscriptions", {}).get(self.active_profile, []))
+
+    def set_subscriptions(self, sources):
+        self.config.setdefault("subscriptions", {})[self.active_profile] = list(sources)
+        save_config(self.config)
+
+    def start_pack_sync(self, force=False):
+        if self._pack_sync_after:
+            self.root.after_cancel(self._pack_sync_after)
+            self._pack_sync_after = None
+        if self._pack_sync_running:
+            self._pack_sync_again = bool(self._pack_sync_again) or force
+            return
+        sources = self.get_subscriptions()
+        if not sources:
+            self._schedule_pack_sync()
+            return
+        index = dict(self._pack_index)
+        if force:
+            for source in sources:
+                index.pop(source, None)
+        self._pack_results = queue.Queue()
+        self._pack_sync_running = True
+        threading.Thread(
+            target=sync_packs,
+            args=(sources, index, self._pack_results),
+            daemon=True,
+        ).start()
+        self.root.after(200, self._poll_pack_sync)
+
+    def _schedule_pack_sync(self):
+        interval = int(self.config.get("subscription_interval", SUBSCRIPTION_INTERVAL))
+        self._pack_sync_after = self.root.after(max(60, interval) * 1000, self.start_pack_sync)
+
+    def _poll_pack_sync(self):
+        changed = False
+        while True:
+            try:
+                result = self._pack_results.get_nowait()
+            except queue.Empty:
+                break
+            if result is None:
+                self._pack_sync_running = False
+                save_json(PACKS_INDEX_PATH, self._pack_index)
+                if changed:
+                    self.update_info_files()
+                    self.run_trigger_analysis()
+                again, self._pack_sync_again = self._pack_sync_again, None
+                if again is not None:
+                    self.start_pack_sync(force=again)
+                else:
+                    self._schedule_pack_sync()
+                return
+            source, meta, entries, error = result
+            if error:
+                self.append_log("Подписка", f"{source}: ошибка {error}")
+                continue
+            self._pack_index[source] = meta
+            if entries is None:
+                continue
+            policy = self.config.get("subscription_policy", IMPORT_TAKE_THEIRS)
+            summary, _ = self.import_entries(entries, policy, SUBSCRIPTION_SECTIONS, f"Подписка: {source}")
+            counts = {}
+            for merger in summary.values():
+                for key, value in merger.stats.items():
+                    counts[key] = counts.get(key, 0) + value
+            changed = True
+            self.append_log(
+                "Подписка",
+                f"{source}: добавлено {counts['added']}, заменено {counts['replaced']}, "
+                f"пропущено {counts['skipped']}, некорректных {counts['invalid']}",
+            )
+        if changed:
+            self.update_info_files()
+        self.root.after(200, self._poll_pack_sync)
+
+    def open_libraries_window(self):
+        win = tk.Toplevel(self.root)
+        win.title("Библиотеки")
+        win.geometry("560x380")
+        win.configure(bg=THEME["bg"])
+
+        ttk.Label(win, text=f"Библиотеки профиля: {self.active_profile}", style="Muted.TLabel").pack(
+            anchor="w", padx=12, pady=(10, 6)
+        )
+        listbox = tk.Listbox(win, height=10)
+        listbox.pack(fill="both", expand=True, padx=12, pady=(0, 8))
+        style_listbox(listbox)
+
+        def refresh():
+            listbox.delete(0, tk.END)
+            for path in self.get_libraries():
+                library = self._libraries.get(path)
+                count = f"{len(library.triggers)} триггеров" if library else "не загружена"
+                listbox.insert(tk.END, f"{os.path.basename(path)} — {count}")
+
+        def add():
+            source = filedialog.askopenfilename(
+                parent=win,
+                title="Подключить библиотеку",
+                filetypes=[
+                    ("Binder files", f"*{LIBRARY_EXT} *{BUNDLE_EXT} *.json"),
+                    ("Binder library", f"*{LIBRARY_EXT}"),
+                ],
+            )
+            if not source:
+                return
+            path = source
+            try:
+                if not is_library(source):
+                    name = os.path.splitext(os.path.basename(source))[0]
+                    path = os.path.join(PACKS_DIR, f"{name}{LIBRARY_EXT}")
+                    write_library(path, iter_bundle(source))
+            except (OSError, UnicodeDecodeError, ValueError):
+                messagebox.showwarning("Ошибка", "Файл библиотеки повреждён.", parent=win)
+                return
+            paths = self.get_libraries()
+            if path in paths:
+                messagebox.showwarning("Дубликат", "Эта библиотека уже подключена.", parent=win)
+                return
+            paths.append(path)
+            self.set_libraries(paths)
+            self._mount_libraries()
+            self._reload_binder_map()
+            self.append_log("Добавлено", f"Библиотеки ({self.active_profile}): {path}")
+            refresh()
+
+        def delete():
+            selection = listbox.curselection()
+            if not selection:
+                messagebox.showwarning("Нет выбора", "Выберите библиотеку.", parent=win)
+                return
+            paths = self.get_libraries()
+            path = paths.pop(selection[0])
+            self.set_libraries(paths)
+            self._mount_libraries()
+            self._reload_binder_map()
+            self.append_log("Удалено", f"Библиотеки ({self.active_profile}): {path}")
+            refresh()
+
+        btns = ttk.Frame(win)
+        btns.pack(pady=(0, 10))
+        self.create_button(btns, text="Подключить", command=add).pack(side="left", padx=4)
+        self.create_button(btns, text="Отключить", command=delete).pack(side="left", padx=4)
+        refresh()
+
+    def open_subscriptions_window(self):
+        win = tk.Toplevel(self.root)
+        win.title("Подписки")
+        win.geometry("560x380")
+        win.configure(bg=THEME["bg"])
+
+        ttk.Label(win, text=f"Паки профиля: {self.active_profile}", style="Muted.TLabel").pack(
+            anchor="w", padx=12, pady=(10, 6)
+        )
+        listbox = tk.Listbox(win, height=10)
+        listbox.pack(fill="both", expand=True, padx=12)
+        style_listbox(listbox)
+
+        entry = tk.Entry(win)
+        entry.pack(fill="x", padx=12, pady=8)
+        style_entry(entry)
+
+        def refresh():
+            listbox.delete(0, tk.END)
+            for source in self.get_subscriptions():
+                listbox.insert(tk.END, source)
+
+        def add():
+            source = entry.get().strip()
+            sources = self.get_subscriptions()
+            if not source:
+                messagebox.showwarning("Проверьте данные", "Введите URL или путь к паку.", parent=win)
+                return
+            if source in sources:
+                messagebox.showwarning("Дубликат", "Такая подписка уже есть.", parent=win)
+                return
+            sources.append(source)
+            self.set_subscriptions(sources)
+            self.append_log("Добавлено", f"Подписки ({self.active_profile}): {source}")
+            entry.delete(0, tk.END)
+            refresh()
+            self.start_pack_sync()
+
+        def delete():
+            selection = listbox.curselection()
+            if not selection:
+                messagebox.showwarning("Нет выбора", "Выберите подписку.", parent=win)
+                return
+            sources = self.get_subscriptions()
+            source = sources.pop(selection[0])
+            self.set_subscriptions(sources)
+            self._pack_index.pop(source, None)
+            save_json(PACKS_INDEX_PATH, self._pack_index)
+            self.append_log("Удалено", f"Подписки ({self.active_profile}): {source}")
+            refresh()
+
+        btns = ttk.Frame(win)
+        btns.pack(pady=(0, 10))
+        self.create_button(btns, text="Добавить", command=add).pack(side="left", padx=4)
+        self.create_button(btns, text="Удалить", command=delete).pack(side="left", padx=4)
+        self.create_button(btns, text="Обновить сейчас", command=lambda: self.start_pack_sync(force=True)).pack(
+            side="left", padx=4
+        )
+        refresh()
 
     def build_settings_screen(self):
         card = self.build_screen_shell(
@@ -1803,12 +6051,19 @@ class BinderApp:
         self.pack_content_button(btn_autofix, pady=4)
         btn_log = self.create_button(card, text="Log", command=self.open_log_window, expand_x=True)
         self.pack_content_button(btn_log, pady=4)
+        btn_stats = self.create_button(card, text="Статистика", command=self.open_stats_window, expand_x=True)
+        self.pack_content_button(btn_stats, pady=4)
+        btn_stalls = self.create_button(card, text="Зависания", command=self.open_stalls_window, expand_x=True)
+        self.pack_content_button(btn_stalls, pady=4)
 
         options = ttk.Frame(card, style="CardBody.TFrame")
         options.pack(fill="x", pady=(16, 0))
 
         self.auto_alias_state = self.config.get("auto_alias_ru", True)
         self.auto_info_state = self.config.get("auto_update_info", True)
+        self.completion_state = self.config.get("completion_enabled", False)
+        self.layout_fold_state = self.config.get("layout_fold", False)
+        self.trace_state = self.config.get("trace_enabled", False)
 
         toggle_row1 = ttk.Frame(options, style="CardBody.TFrame")
         toggle_row1.pack(anchor="w", pady=4, fill="x")
@@ -1818,11 +6073,18 @@ class BinderApp:
             command=lambda v: setattr(self, "auto_alias_state", v),
         )
         toggle1.pack(side="left")
+        self.auto_alias_toggle = toggle1
         ttk.Label(
             toggle_row1,
             text="Авто-алиасы RU→EN для команд",
             style="CardMuted.TLabel",
         ).pack(side="left", padx=10)
+        self.create_button(toggle_row1, text="Пересобрать", command=self.aliases_regenerate, kind="switcher").pack(
+            side="left", padx=(0, 6)
+        )
+        self.create_button(toggle_row1, text="Удалить все", command=self.aliases_remove_all, kind="switcher").pack(
+            side="left"
+        )
 
         toggle_row2 = ttk.Frame(options, style="CardBody.TFrame")
         toggle_row2.pack(anchor="w", pady=4, fill="x")
@@ -1838,6 +6100,52 @@ class BinderApp:
             style="CardMuted.TLabel",
         ).pack(side="left", padx=10)
 
+        toggle_row3 = ttk.Frame(options, style="CardBody.TFrame")
+        toggle_row3.pack(anchor="w", pady=4, fill="x")
+        toggle3 = ToggleSwitch(
+            toggle_row3,
+            value=self.completion_state,
+            command=lambda v: setattr(self, "completion_state", v),
+        )
+        toggle3.pack(side="left")
+        ttk.Label(
+            toggle_row3,
+            text="Подсказки триггеров при вводе (Ctrl+Enter — вставить)",
+            style="CardMuted.TLabel",
+        ).pack(side="left", padx=10)
+
+        toggle_row4 = ttk.Frame(options, style="CardBody.TFrame")
+        toggle_row4.pack(anchor="w", pady=4, fill="x")
+        toggle4 = ToggleSwitch(
+            toggle_row4,
+            value=self.layout_fold_state,
+            command=lambda v: setattr(self, "layout_fold_state", v),
+        )
+        toggle4.pack(side="left")
+        self.layout_fold_toggle = toggle4
+        ttk.Label(
+            toggle_row4,
+            text="Триггеры без учёта раскладки RU/EN",
+            style="CardMuted.TLabel",
+        ).pack(side="left", padx=10)
+        self.create_button(toggle_row4, text="Схлопнуть пары", command=self.collapse_layout_aliases, kind="switcher").pack(
+            side="left"
+        )
+
+        toggle_row5 = ttk.Frame(options, style="CardBody.TFrame")
+        toggle_row5.pack(anchor="w", pady=4, fill="x")
+        toggle5 = ToggleSwitch(
+            toggle_row5,
+            value=self.trace_state,
+            command=lambda v: setattr(self, "trace_state", v),
+        )
+        toggle5.pack(side="left")
+        ttk.Label(
+            toggle_row5,
+            text="Запись нажатий для бенчмарков (текст скрыт, data/traces)",
+            style="CardMuted.TLabel",
+        ).pack(side="left", padx=10)
+
         self.create_button(options, text="Сохранить настройки", command=self.save_settings_options).pack(
             anchor="w", pady=(8, 0)
         )
@@ -1884,7 +6192,18 @@ class BinderApp:
         old_info = self.config.get("auto_update_info", True)
         self.config["auto_alias_ru"] = bool(self.auto_alias_state)
         self.config["auto_update_info"] = bool(self.auto_info_state)
+        self.config["completion_enabled"] = bool(self.completion_state)
+        self._completion_keys = self._completion_key_table()
+        old_fold = self.config.get("layout_fold", False)
+        self.config["layout_fold"] = bool(self.layout_fold_state)
+        self.config["trace_enabled"] = bool(self.trace_state)
+        if hasattr(self, "_trace"):
+            self._configure_trace()
+        self._completion_dirty = True
         save_config(self.config)
+        if old_fold != self.config["layout_fold"]:
+            self.append_log("Изменено", f"Настройки: триггеры без учёта раскладки -> {self.config['layout_fold']}")
+            self._reload_binder_map()
         if old_alias != self.config["auto_alias_ru"]:
             self.append_log("Изменено", f"Настройки: авто-алиасы RU→EN -> {self.config['auto_alias_ru']}")
         if old_info != self.config["auto_update_info"]:
@@ -1894,7 +6213,112 @@ class BinderApp:
         messagebox.showinfo("Готово", "Настройки сохранены.")
 
 
+def replay_trace(events, realtime=False, expected=None, items=None, libraries=()):
+    global keyboard
+    fake = FakeKeyboard()
+    saved_keyboard = keyboard
+    keyboard = fake
+    try:
+        app = BinderApp.__new__(BinderApp)
+        app.root = SimpleNamespace(after=lambda *_args: None, clipboard_get=lambda: "")
+        app.config = json.loads(json.dumps(load_config()))
+        fired = []
+        app.event_store = SimpleNamespace(
+            record=lambda kind, trigger, _profile=None, _details=None: fired.append(trigger)
+            if kind == EVENT_EXPAND
+            else None
+        )
+        app.active_profile = app.config.get("active_profile")
+        app._setup_variable_resolvers()
+        app.variable_resolvers.register("time", lambda _arg: TRACE_REPLAY_TIME)
+        app.variable_resolvers.register("date", lambda _arg: TRACE_REPLAY_DATE)
+        app.variable_resolvers.register("clipboard", lambda _arg: "")
+        app._binder_buffer = ""
+        app._binder_max_len = 64
+        app._binder_sending = False
+        app._binder_modifiers = 0
+        app._binder_recent = deque(maxlen=HOT_RECENT_SIZE)
+        app._binder_usage = {}
+        app._binder_usage_dirty = False
+        app._binder_stats = dict.fromkeys(("hot_hits", "hot_ns", "cold_hits", "cold_ns", "misses", "miss_ns"), 0)
+        app._completion_dirty = False
+        app._completion_matches = ()
+        app._completion_keys = {}
+        app._trace = None
+        app._worker_errors = queue.Queue()
+        app._chord_table = build_chord_table(load_json(HOTKEYS_PATH, []))
+        app.window_guard = WindowGuard()
+        runner = InlineRunner(realtime)
+        app.macro_runner = runner
+        if items is None:
+            items = load_json(BINDS_PATH, []) + load_json(PHRASES_PATH, [])
+        variants = layout_variants if app.config.get("layout_fold", False) else exact_layout
+        app._binder_snapshot = build_binder_snapshot(1, items, variants, app._binder_payload, libraries)
+
+        costs = []
+        expansions = []
+        for delta, name, is_up in events:
+            if realtime and delta:
+                time.sleep(delta / 1_000_000)
+            event = SimpleNamespace(name=name, event_type="up" if is_up else "down")
+            started = time.perf_counter_ns()
+            app._on_binder_key(event)
+            if name == "space" and not is_up:
+                app._on_binder_space(event)
+            costs.append(time.perf_counter_ns() - started)
+            if runner.jobs:
+                mark = len(fake.output)
+                trigger = fired[-1] if fired else None
+                runner.drain()
+                expansions.append([trigger, "".join(fake.output[mark:])])
+    finally:
+        keyboard = saved_keyboard
+
+    costs.sort()
+    count = len(costs)
+    mismatches = []
+    if expected is not None:
+        for index in range(max(len(expected), len(expansions))):
+            want = expected[index] if index < len(expected) else None
+            got = expansions[index] if index < len(expansions) else None
+            if want != got:
+                mismatches.append({"index": index, "expected": want, "got": got})
+    report = {
+        "events": count,
+        "hook_ns_mean": sum(costs) // count if count else 0,
+        "hook_ns_p50": costs[count // 2] if count else 0,
+        "hook_ns_p99": costs[min(count - 1, int(count * 0.99))] if count else 0,
+        "hook_ns_max": costs[-1] if count else 0,
+        "expansions": len(expansions),
+        "keystrokes": fake.keystrokes,
+        "matcher": app._binder_stats,
+        "mismatches": mismatches,
+    }
+    return report, expansions
+
+
+def run_replay_cli(argv):
+    parser = argparse.ArgumentParser(prog="main.py --replay", description="Прогон трассировки нажатий через движок биндера.")
+    parser.add_argument("trace", help="файл из data/traces")
+    parser.add_argument("--realtime", action="store_true", help="соблюдать исходные паузы между нажатиями")
+    parser.add_argument("--expect", help="JSON с ожидаемыми срабатываниями")
+    parser.add_argument("--save-expect", help="сохранить срабатывания как ожидание")
+    parser.add_argument("--library", action="append", default=[], help=f"подключить библиотеку {LIBRARY_EXT}")
+    args = parser.parse_args(argv)
+    expected = load_json(args.expect, {}).get("expansions") if args.expect else None
+    libraries = [MappedLibrary(path) for path in args.library]
+    report, expansions = replay_trace(
+        read_trace(args.trace), realtime=args.realtime, expected=expected, libraries=libraries
+    )
+    if args.save_expect:
+        save_json(args.save_expect, {"expansions": expansions})
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 1 if report["mismatches"] else 0
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--replay":
+        sys.exit(run_replay_cli(sys.argv[2:]))
     ensure_dirs()
     root = tk.Tk()
     app = BinderApp(root)
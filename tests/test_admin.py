@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+import main
+
+
+LINES = [
+    "=====",
+    "   admin level 1",
+    "/a [text]        — админ чат",
+    "/esp | /esp3    — esp",
+    "заметка без команды",
+    "   Admin Level 3",
+    "/ban [id] [days reason] — бан",
+    "/a [другое]     — повтор",
+]
+
+
+class ParseAdminCommandsTest(unittest.TestCase):
+    def test_parse(self):
+        commands = main.parse_admin_commands(LINES)
+        self.assertEqual([command["name"] for command in commands], ["/a", "/esp", "/esp3", "/ban", "/a"])
+        self.assertEqual(commands[0], {"name": "/a", "args": ["text"], "level": 1, "desc": "админ чат"})
+        self.assertEqual(commands[2]["args"], [])
+        self.assertEqual(commands[3]["args"], ["id", "days", "reason"])
+        self.assertEqual(commands[3]["level"], 3)
+
+    def test_shipped_reference_parses(self):
+        commands = main.parse_admin_commands(open(main.ADMIN_COMMANDS_PATH, encoding="utf-8"))
+        self.assertTrue(commands)
+        self.assertTrue(all(command["name"].startswith("/") for command in commands))
+
+
+class AdminCatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.catalog = main.AdminCatalog(main.parse_admin_commands(LINES))
+
+    def test_first_definition_wins(self):
+        self.assertEqual(self.catalog.get("/A")["args"], ["text"])
+        self.assertIsNone(self.catalog.get("/nope"))
+
+    def test_complete(self):
+        self.assertEqual(self.catalog.complete("/ES"), ["/esp", "/esp3"])
+        self.assertEqual(self.catalog.complete("/", limit=2), ["/a", "/ban"])
+        self.assertEqual(self.catalog.complete("/z"), [])
+
+    def test_signature(self):
+        self.assertEqual(main.AdminCatalog.signature(self.catalog.get("/ban")), "[id] [days] [reason]")
+
+    def test_check_text(self):
+        self.assertEqual(self.catalog.check_text("/ban 5 3 читы"), [])
+        self.assertEqual(self.catalog.check_text("/ban "), [])
+        problems = self.catalog.check_text("/ban 5{enter}/esp")
+        self.assertEqual(problems, ["/ban: аргументов 1, ожидается 3 [id] [days] [reason]"])
+
+    def test_check_text_counts_placeholders_as_arguments(self):
+        self.assertEqual(self.catalog.check_text("/ban {id} {arg} причина{enter}"), [])
+
+
+class LoadAdminCatalogTest(unittest.TestCase):
+    def test_cache_is_used_until_source_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "admins.txt")
+            cache = os.path.join(tmp, "cache.json")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(LINES))
+            first = main.load_admin_catalog(path, cache)
+            self.assertIn("/ban", first.commands)
+            data = main.load_json(cache, {})
+            data["commands"] = [{"name": "/cached", "args": [], "level": 1, "desc": ""}]
+            main.save_json(cache, data)
+            self.assertEqual(main.load_admin_catalog(path, cache).names, ["/cached"])
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n/new — новая\n")
+            self.assertIn("/new", main.load_admin_catalog(path, cache).commands)
+
+    def test_missing_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = main.load_admin_catalog(os.path.join(tmp, "none.txt"), os.path.join(tmp, "c.json"))
+            self.assertEqual(catalog.names, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import main
+
+
+class SyncAliasesTest(unittest.TestCase):
+    def test_adds_alias_for_cyrillic_triggers(self):
+        items = [{"trigger": ".привет", "text": "Здравствуйте", "cursor_back": 2}, {"trigger": ".hi", "text": "hi"}]
+        result, stats = main.sync_aliases(items)
+        self.assertEqual(stats["added"], [".ghbdtn"])
+        self.assertEqual(result[-1], {"trigger": ".ghbdtn", "text": "Здравствуйте", "alias_of": ".привет", "cursor_back": 2})
+        self.assertEqual(len(result), 3)
+
+    def test_is_idempotent(self):
+        result, _ = main.sync_aliases([{"trigger": ".привет", "text": "a"}])
+        again, stats = main.sync_aliases(result)
+        self.assertEqual(again, result)
+        self.assertEqual(stats, {"added": [], "updated": [], "removed": [], "linked": []})
+
+    def test_updates_and_removes(self):
+        items = [
+            {"trigger": ".привет", "text": "новый"},
+            {"trigger": ".ghbdtn", "text": "старый", "alias_of": ".привет"},
+            {"trigger": ".gjrf", "text": "пока", "alias_of": ".пока"},
+        ]
+        result, stats = main.sync_aliases(items)
+        self.assertEqual(stats["updated"], [".ghbdtn"])
+        self.assertEqual(stats["removed"], [".gjrf"])
+        self.assertEqual(result[1]["text"], "новый")
+        self.assertEqual(len(result), 2)
+
+    def test_links_matching_manual_bind(self):
+        items = [{"trigger": ".привет", "text": "a"}, {"trigger": ".ghbdtn", "text": "a"}]
+        result, stats = main.sync_aliases(items)
+        self.assertEqual(stats["linked"], [".ghbdtn"])
+        self.assertEqual(result[1]["alias_of"], ".привет")
+        self.assertEqual(len(result), 2)
+
+    def test_does_not_shadow_manual_bind(self):
+        items = [{"trigger": ".привет", "text": "a"}, {"trigger": ".ghbdtn", "text": "другое"}]
+        result, stats = main.sync_aliases(items)
+        self.assertEqual(stats["added"], [])
+        self.assertEqual(result, items)
+
+    def test_scope_limits_changes(self):
+        items = [{"trigger": ".привет", "text": "a"}, {"trigger": ".пока", "text": "b"}]
+        result, stats = main.sync_aliases(items, scope={".пока"})
+        self.assertEqual(stats["added"], [".gjrf"])
+        self.assertEqual([item["trigger"] for item in result], [".привет", ".пока", ".gjrf"])
+
+
+class RemoveAliasesTest(unittest.TestCase):
+    def test_removes_only_generated(self):
+        items = [
+            {"trigger": ".привет", "text": "a"},
+            {"trigger": ".ghbdtn", "text": "a", "alias_of": ".привет"},
+            {"trigger": ".hi", "text": "hi"},
+        ]
+        kept, removed = main.remove_aliases(items)
+        self.assertEqual([item["trigger"] for item in kept], [".привет", ".hi"])
+        self.assertEqual(removed, [".ghbdtn"])
+
+
+if __name__ == "__main__":
+    unittest.main()
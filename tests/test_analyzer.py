@@ -0,0 +1,35 @@
+import unittest
+
+import main
+
+
+def analyze(*items):
+    return main.analyze_triggers([("Команды", list(items))])
+
+
+class AnalyzeTriggersTest(unittest.TestCase):
+    def test_duplicates(self):
+        report = analyze({"trigger": ".а", "text": "1"}, {"trigger": ".а", "text": "2"})
+        self.assertEqual(report["duplicates"], [(".а", [("Команды", 0, "1"), ("Команды", 1, "2")])])
+
+    def test_shadowed_by_suffix(self):
+        report = analyze({"trigger": "ет", "text": "1"}, {"trigger": ".ет", "text": "2"})
+        self.assertEqual(report["shadowed"], [("ет", ".ет")])
+
+    def test_layout_collision_uses_physical_keys(self):
+        report = analyze({"trigger": ".ет", "text": "a"}, {"trigger": "/tn", "text": "b"})
+        self.assertEqual(report["aliases"], [("/tn", [(".ет", "a"), ("/tn", "b")])])
+        self.assertEqual(report["pairs"], [])
+
+    def test_layout_pair_with_same_text(self):
+        report = analyze({"trigger": ".ет", "text": "/tempname"}, {"trigger": "/tn", "text": "/tempname"})
+        self.assertEqual(report["aliases"], [])
+        self.assertEqual(len(report["pairs"]), 1)
+
+    def test_ru_to_en_spelling_is_not_a_collision(self):
+        report = analyze({"trigger": ".ет", "text": "a"}, {"trigger": ".tn", "text": "b"})
+        self.assertEqual(report["aliases"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import re
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import main
+
+
+class BulkEditTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        binds = os.path.join(self.tmp.name, "binds.json")
+        phrases = os.path.join(self.tmp.name, "phrases.json")
+        app = main.BinderApp.__new__(main.BinderApp)
+        app.config = {"auto_alias_ru": True, "variables": {}}
+        app.commands_data, _stats = main.sync_aliases(
+            [{"trigger": ".привет", "text": "Привет, друг"}, {"trigger": ".hi", "text": "hi друг"}]
+        )
+        app.phrases_data = [{"trigger": ".пока", "text": "Пока"}]
+        app.autofix_data = {}
+        app.hotkeys_data = []
+        app.history = main.EditHistory()
+        self.refreshed = []
+        app._refresh_binder_triggers = self.refreshed.append
+        for name in ("append_log", "update_info_files", "run_trigger_analysis", "refresh_bind_list"):
+            setattr(app, name, lambda *_args, **_kwargs: None)
+        field = SimpleNamespace(delete=lambda *_args: None)
+        app.commands_ui = {"data_ref": "commands_data", "path": binds, "label": "Команды", "trigger": field, "text": field}
+        app.phrases_ui = {"data_ref": "phrases_data", "path": phrases, "label": "Фразы", "trigger": field, "text": field}
+        self.app = app
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def select(self, ui, indices):
+        ui["index_map"] = list(range(len(getattr(self.app, ui["data_ref"]))))
+        ui["listbox"] = SimpleNamespace(curselection=lambda: tuple(indices))
+
+    def triggers(self, items):
+        return [item["trigger"] for item in items]
+
+    def test_delete_takes_aliases_along(self):
+        ui = self.app.commands_ui
+        self.select(ui, [0, 1])
+        with mock.patch.object(main.messagebox, "askyesno", return_value=True):
+            self.app.bind_delete(ui)
+        self.assertEqual(self.app.commands_data, [])
+        self.assertEqual(main.load_json(ui["path"], None), [])
+        self.assertEqual(self.refreshed[-1], {".привет", ".hi", ".ghbdtn"})
+        self.assertEqual(len(self.app.history.undo_stack), 1)
+
+    def test_move_to_phrases(self):
+        ui = self.app.commands_ui
+        self.select(ui, [0, 2])
+        with mock.patch.object(main.messagebox, "askyesno", return_value=True):
+            self.app.bind_move(ui)
+        self.assertEqual(self.triggers(self.app.commands_data), [".hi"])
+        self.assertEqual(self.triggers(self.app.phrases_data), [".пока", ".привет"])
+        self.assertEqual(main.load_json(self.app.phrases_ui["path"], None), self.app.phrases_data)
+        self.assertEqual(len(self.app.history.undo_stack), 1)
+
+    def test_move_only_aliases_warns(self):
+        ui = self.app.commands_ui
+        self.select(ui, [2])
+        with mock.patch.object(main.messagebox, "showwarning") as warning:
+            self.app.bind_move(ui)
+        warning.assert_called_once()
+        self.assertEqual(len(self.app.commands_data), 3)
+
+    def test_regex_replace_updates_aliases(self):
+        ui = self.app.commands_ui
+        original = self.app.commands_data[0]
+        with mock.patch.object(main.messagebox, "askyesno", return_value=True):
+            self.assertTrue(self.app.bind_replace(ui, range(3), re.compile(r"друг"), "товарищ"))
+        self.assertEqual([item["text"] for item in self.app.commands_data], ["Привет, товарищ", "hi товарищ", "Привет, товарищ"])
+        self.assertEqual(original["text"], "Привет, друг")
+        self.assertIn(".ghbdtn", self.refreshed[-1])
+
+    def test_regex_replace_without_matches(self):
+        ui = self.app.commands_ui
+        with mock.patch.object(main.messagebox, "showinfo") as info:
+            self.assertFalse(self.app.bind_replace(ui, range(3), re.compile("нет"), "x"))
+        info.assert_called_once()
+        self.assertEqual(self.refreshed, [])
+
+    def test_bad_group_reference_is_reported(self):
+        ui = self.app.commands_ui
+        with mock.patch.object(main.messagebox, "showwarning") as warning:
+            self.assertFalse(self.app.bind_replace(ui, range(3), re.compile("друг"), r"\2"))
+        warning.assert_called_once()
+        self.assertEqual(self.app.commands_data[0]["text"], "Привет, друг")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+import main
+
+
+PAYLOAD = {
+    "config": {"active_profile": "Основной"},
+    "binds": [
+        {"trigger": ".лспд", "text": "/ctp 429 -980 30.50"},
+        {"trigger": ".привет", "text": "Доброго дня, %name%!", "cursor_back": 2},
+    ],
+    "phrases": [{"trigger": ".пока", "text": "Доброго дня, до встречи"}],
+    "autofix": {group: [{"from": "првиет", "to": "привет"}] for group in main.BUNDLE_AUTOFIX_GROUPS[:1]},
+    "profiles": ["Основной", "Запасной"],
+}
+
+
+class VarintTest(unittest.TestCase):
+    def test_roundtrip(self):
+        out = bytearray()
+        values = [0, 1, 127, 128, 300, 2**32 + 5]
+        for value in values:
+            main._write_varint(out, value)
+        pos = 0
+        for value in values:
+            decoded, pos = main._read_varint(bytes(out), pos)
+            self.assertEqual(decoded, value)
+        self.assertEqual(pos, len(out))
+
+
+class StringTableTest(unittest.TestCase):
+    def test_repeated_fragments_are_shared(self):
+        table = main.BundleStringTable(["/me кивает %name%", "/me машет %name%", "один раз"])
+        self.assertIn("%name%", table.entries)
+        self.assertNotIn("один раз", table.entries)
+        self.assertNotIn("%name%", table.encode("/me кивает %name%"))
+
+    def test_placeholder_in_input_disables_table(self):
+        marker = chr(main.BUNDLE_PLACEHOLDER_BASE)
+        table = main.BundleStringTable(["%name% %name%", f"x{marker}"])
+        self.assertEqual(table.entries, [])
+        self.assertEqual(table.encode("%name%"), "%name%")
+
+
+class BundleTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, f"data{main.BUNDLE_EXT}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def roundtrip(self, payload, codec=main.BUNDLE_CODEC_GZIP):
+        main.save_bundle(self.path, payload, codec)
+        return list(main.iter_bundle(self.path))
+
+    def test_roundtrip(self):
+        entries = self.roundtrip(PAYLOAD)
+        self.assertEqual(entries[0], ("config", PAYLOAD["config"]))
+        self.assertEqual([item for section, item in entries if section == "binds"], PAYLOAD["binds"])
+        self.assertEqual([item for section, item in entries if section == "phrases"], PAYLOAD["phrases"])
+        self.assertEqual([item for section, item in entries if section == "profiles"], PAYLOAD["profiles"])
+        group = main.BUNDLE_AUTOFIX_GROUPS[0]
+        self.assertIn(("autofix", {group: PAYLOAD["autofix"][group]}), entries)
+
+    @unittest.skipIf(main.zstandard is None, "нужен модуль zstandard")
+    def test_roundtrip_zstd(self):
+        self.assertEqual(self.roundtrip(PAYLOAD, main.BUNDLE_CODEC_ZSTD), self.roundtrip(PAYLOAD))
+
+    def test_placeholder_characters_survive(self):
+        marker = chr(main.BUNDLE_PLACEHOLDER_BASE)
+        payload = dict(PAYLOAD, profiles=[f"A{marker}B"], config={"note": f"x{marker}y"})
+        entries = self.roundtrip(payload)
+        self.assertIn(("profiles", f"A{marker}B"), entries)
+        self.assertIn(("config", {"note": f"x{marker}y"}), entries)
+
+    def test_corrupt_body_raises_value_error(self):
+        data = main.encode_bundle(PAYLOAD, main.BUNDLE_CODEC_GZIP)
+        with open(self.path, "wb") as f:
+            f.write(data[: main.BUNDLE_HEADER.size + 8])
+        with self.assertRaises(ValueError):
+            list(main.iter_bundle(self.path))
+
+    def test_bad_header_raises_value_error(self):
+        with open(self.path, "wb") as f:
+            f.write(main.BUNDLE_MAGIC)
+        with self.assertRaises(ValueError):
+            list(main.iter_bundle(self.path))
+
+    def test_field_block_is_little_endian(self):
+        writer = main.BundleWriter(main.BundleStringTable([]))
+        writer.add("profiles", ["ab"])
+        self.assertTrue(writer.body().endswith(b"\x02\x00\x00\x00ab"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import main
+
+
+class ChangeLogTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "log.txt")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_segment_path(self):
+        self.assertEqual(main.log_segment_path("/d/log.txt", 3), "/d/log.3.txt.gz")
+
+    def test_buffers_until_flush(self):
+        log = main.ChangeLog(self.path)
+        log.write("первая\n")
+        self.assertFalse(os.path.exists(self.path))
+        log.flush()
+        self.assertEqual(self.read(), "первая\n")
+        log.flush()
+        self.assertEqual(self.read(), "первая\n")
+
+    def test_flushes_when_buffer_full(self):
+        log = main.ChangeLog(self.path)
+        with mock.patch.object(main, "LOG_BUFFER_LINES", 3):
+            for n in range(3):
+                log.write(f"{n}\n")
+        self.assertEqual(self.read(), "0\n1\n2\n")
+
+    def test_rotation_keeps_backup_count(self):
+        log = main.ChangeLog(self.path, max_bytes=10, backup_count=2)
+        for n in range(4):
+            log.write(f"строка {n}\n")
+            log.flush()
+        self.assertEqual(self.read(), "")
+        segments = log.segments()
+        self.assertEqual(segments, [self.path, main.log_segment_path(self.path, 1), main.log_segment_path(self.path, 2)])
+        self.assertFalse(os.path.exists(main.log_segment_path(self.path, 3)))
+        with gzip.open(segments[1], "rt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "строка 3\n")
+        with gzip.open(segments[2], "rt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "строка 2\n")
+
+    def test_segments_without_rotation(self):
+        log = main.ChangeLog(self.path)
+        self.assertEqual(log.segments(), [self.path])
+
+
+if __name__ == "__main__":
+    unittest.main()
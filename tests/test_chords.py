@@ -0,0 +1,85 @@
+import unittest
+from types import SimpleNamespace
+
+import main
+
+
+class ParseChordTest(unittest.TestCase):
+    def test_parse_and_format(self):
+        self.assertEqual(main.parse_chord("Ctrl + Shift + F1"), (5, "f1"))
+        self.assertEqual(main.parse_chord("left alt+1"), (2, "1"))
+        self.assertEqual(main.format_chord(15, "x"), "ctrl+alt+shift+windows+x")
+        self.assertEqual(main.format_chord(*main.parse_chord("shift+ctrl+q")), "ctrl+shift+q")
+
+    def test_invalid(self):
+        for chord in ("", "+", "f1", "ctrl+shift", "hyper+f1"):
+            with self.assertRaises(ValueError):
+                main.parse_chord(chord)
+
+    def test_table_skips_invalid_items(self):
+        table = main.build_chord_table(
+            [
+                {"hotkey": "ctrl+1", "text": "Привет", "cursor_back": "2"},
+                {"hotkey": "f1", "text": "нет модификатора"},
+                {"hotkey": "ctrl+2", "text": ""},
+                "строка",
+                {"hotkey": "Ctrl+1", "text": "позже"},
+            ]
+        )
+        self.assertEqual(table, {(1, "1"): {"text": "позже", "cursor_back": 0}})
+
+
+class ChordDispatchTest(unittest.TestCase):
+    def setUp(self):
+        app = main.BinderApp.__new__(main.BinderApp)
+        app._trace = None
+        app._binder_sending = False
+        app._binder_modifiers = 0
+        app._binder_buffer = ""
+        app._binder_max_len = 16
+        app._completion_keys = {}
+        app._completion_matches = ()
+        app._completion_dirty = False
+        app._chord_table = main.build_chord_table([{"hotkey": "ctrl+shift+1", "text": "Привет"}])
+        app.window_guard = main.WindowGuard()
+        app.event_store = main.EventStore(":memory:")
+        app.active_profile = "Основной"
+        self.emitted = []
+        app._emit_binder_expansion = lambda erase, payload, trailing_space=True: self.emitted.append(
+            (erase, payload, trailing_space)
+        )
+        self.app = app
+        self.addCleanup(app.event_store.close)
+
+    def key(self, name, event_type="down"):
+        return self.app._on_binder_key(SimpleNamespace(name=name, event_type=event_type))
+
+    def test_chord_fires_and_is_swallowed(self):
+        self.key("left ctrl")
+        self.key("shift")
+        self.assertFalse(self.key("1"))
+        self.assertEqual(self.emitted, [(0, {"text": "Привет", "cursor_back": 0, "chord": True}, False)])
+        self.app.event_store.flush()
+        self.assertEqual(self.app.event_store.trigger_counts(), {"ctrl+shift+1": 1})
+        self.assertEqual(self.app._binder_buffer, "")
+
+    def test_released_modifier_types_normally(self):
+        self.key("ctrl")
+        self.key("shift")
+        self.key("shift", "up")
+        self.assertTrue(self.key("1"))
+        self.key("ctrl", "up")
+        self.assertTrue(self.key("1"))
+        self.assertEqual(self.emitted, [])
+        self.assertEqual(self.app._binder_buffer, "11")
+
+    def test_blocked_window_passes_key_through(self):
+        self.app.window_guard.allowed = lambda: False
+        self.key("ctrl")
+        self.key("shift")
+        self.assertTrue(self.key("1"))
+        self.assertEqual(self.emitted, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from types import SimpleNamespace
+
+import main
+
+
+class TriggerTrieTest(unittest.TestCase):
+    def test_insert_remove_complete(self):
+        trie = main.TriggerTrie([".бол", ".бал", ".лспд"])
+        self.assertEqual(sorted(trie.complete(".б")), [".бал", ".бол"])
+        trie.remove(".бол")
+        self.assertEqual(trie.complete(".б"), [".бал"])
+        trie.remove(".нет")
+        self.assertEqual(trie.complete(".х"), [])
+        self.assertEqual(len(trie.complete(".", limit=1)), 1)
+
+    def test_patched_keeps_original(self):
+        trie = main.TriggerTrie([".бол", ".бал"])
+        clone = trie.patched(added=[".бар"], removed=[".бол"])
+        self.assertEqual(sorted(trie.complete(".б")), [".бал", ".бол"])
+        self.assertEqual(sorted(clone.complete(".б")), [".бал", ".бар"])
+        self.assertEqual(clone.root, main.TriggerTrie([".бал", ".бар"]).root)
+
+
+class CompletionTest(unittest.TestCase):
+    def make_app(self, enabled=True):
+        app = main.BinderApp.__new__(main.BinderApp)
+        app.root = SimpleNamespace(after=lambda *_args: None)
+        app.config = {"completion_enabled": enabled}
+        items = [{"trigger": ".лспд", "text": "/ctp 1 2 3"}, {"trigger": ".лсд", "text": "x"}]
+        app._binder_snapshot = main.build_binder_snapshot(1, items, main.exact_layout, lambda item: item)
+        app._binder_buffer = ""
+        app._binder_modifiers = 0
+        app._binder_sending = False
+        app._binder_max_len = 64
+        app._trace = None
+        app._chord_table = {}
+        app._completion_dirty = True
+        app._completion_token = ""
+        app._completion_index = 0
+        app._completion_matches = ()
+        app._render_completion = lambda: None
+        app._completion_keys = app._completion_key_table()
+        return app
+
+    def key(self, app, name, event_type="down"):
+        return app._on_binder_key(SimpleNamespace(name=name, event_type=event_type))
+
+    def test_key_table_follows_setting(self):
+        self.assertEqual(self.make_app(enabled=False)._completion_keys, {})
+        keys = self.make_app()._completion_keys
+        self.assertIn(main.parse_chord(main.COMPLETION_HOTKEY), keys)
+        self.assertIn(main.parse_chord(main.COMPLETION_NEXT_HOTKEY), keys)
+
+    def test_matches_for_token(self):
+        app = self.make_app()
+        app._binder_buffer = "привет .лс"
+        app._poll_completion()
+        self.assertEqual(sorted(app._completion_matches), [".лсд", ".лспд"])
+
+    def test_keys_pass_through_without_suggestions(self):
+        app = self.make_app()
+        self.key(app, "ctrl")
+        self.assertTrue(self.key(app, "down"))
+        self.assertTrue(self.key(app, "enter"))
+
+    def test_keys_are_swallowed_while_suggestions_show(self):
+        app = self.make_app()
+        app._binder_buffer = ".лс"
+        app._poll_completion()
+        self.key(app, "ctrl")
+        self.assertFalse(self.key(app, "down"))
+        self.assertEqual(app._completion_index, 1)
+        self.key(app, "ctrl", "up")
+        self.assertTrue(self.key(app, "down"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+import main
+
+
+class EventStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store = main.EventStore(":memory:")
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_record_is_queued_until_flush(self):
+        self.store.record(main.EVENT_EXPAND, ".a", "Основной")
+        self.assertEqual(self.store.trigger_counts(), {})
+        self.assertEqual(self.store.flush(), 1)
+        self.assertEqual(self.store.flush(), 0)
+        self.assertEqual(self.store.trigger_counts(), {".a": 1})
+
+    def test_counts_and_top(self):
+        for trigger, profile in ((".a", "p1"), (".a", "p2"), (".b", "p1"), (".a", "p1")):
+            self.store.record(main.EVENT_EXPAND, trigger, profile)
+        self.store.record("edit", ".b", "p1")
+        self.store.record(main.EVENT_EXPAND, None, "p1")
+        self.store.flush()
+        self.assertEqual(self.store.trigger_counts(), {".a": 3, ".b": 1})
+        self.assertEqual(self.store.trigger_counts(profile="p1"), {".a": 2, ".b": 1})
+        self.assertEqual(self.store.trigger_counts(action="edit"), {".b": 1})
+        self.assertEqual(self.store.top_triggers(limit=1), [(".a", 3)])
+
+    def test_hourly_usage(self):
+        self.store.record(main.EVENT_EXPAND, ".a")
+        self.store.flush()
+        hours = self.store.hourly_usage()
+        self.assertEqual(len(hours), 24)
+        self.assertEqual(hours[time.localtime().tm_hour], 1)
+        self.assertEqual(sum(self.store.hourly_usage(since=time.time() + 60)), 0)
+
+    def test_prune_by_age_and_rows(self):
+        store = main.EventStore(":memory:", max_age_days=1, max_rows=2)
+        try:
+            now = time.time()
+            store._queue.extend([
+                (now - 3 * 86400, main.EVENT_EXPAND, ".old", None, None),
+                (now, main.EVENT_EXPAND, ".a", None, None),
+                (now, main.EVENT_EXPAND, ".b", None, None),
+                (now, main.EVENT_EXPAND, ".c", None, None),
+            ])
+            store.flush()
+            self.assertEqual(store.prune(), 2)
+            self.assertEqual(store.trigger_counts(), {".b": 1, ".c": 1})
+        finally:
+            store.close()
+
+
+class EventStoreFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "events.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_persists_between_opens(self):
+        store = main.EventStore(self.path)
+        store.record(main.EVENT_EXPAND, ".a")
+        store.close()
+        store = main.EventStore(self.path)
+        try:
+            self.assertEqual(store.trigger_counts(), {".a": 1})
+        finally:
+            store.close()
+
+    def test_corrupt_file_raises(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a database" * 100)
+        with self.assertRaises(sqlite3.Error):
+            main.EventStore(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import main
+
+
+class FakeUser32:
+    def __init__(self):
+        self.hwnd = 1
+        self.titles = {1: "GTA5 — Majestic RP", 2: "Блокнот"}
+        self.reads = 0
+
+    def GetForegroundWindow(self):
+        return self.hwnd
+
+    def GetWindowTextLengthW(self, hwnd):
+        return len(self.titles[hwnd])
+
+    def GetWindowTextW(self, hwnd, buffer, size):
+        self.reads += 1
+        buffer.value = self.titles[hwnd][: size - 1]
+
+
+class WindowGuardTest(unittest.TestCase):
+    def setUp(self):
+        self.user32 = FakeUser32()
+        patcher = mock.patch.object(main, "user32", self.user32)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_no_patterns_allows_everything(self):
+        guard = main.WindowGuard()
+        guard.set_patterns(["  ", ""])
+        self.assertTrue(guard.allowed())
+        self.assertEqual(self.user32.reads, 0)
+
+    def test_matches_title_case_insensitively(self):
+        guard = main.WindowGuard(ttl=60)
+        guard.set_patterns([" majestic "])
+        self.assertTrue(guard.allowed())
+        self.user32.hwnd = 2
+        self.assertFalse(guard.allowed())
+
+    def test_title_is_cached_per_window(self):
+        guard = main.WindowGuard(ttl=60)
+        guard.set_patterns(["majestic"])
+        guard.allowed()
+        guard.allowed()
+        self.assertEqual(self.user32.reads, 1)
+        guard.set_patterns(["блокнот"])
+        self.assertFalse(guard.allowed())
+        self.assertEqual(self.user32.reads, 2)
+
+    def test_without_user32_allows(self):
+        guard = main.WindowGuard()
+        guard.set_patterns(["majestic"])
+        with mock.patch.object(main, "user32", None):
+            self.assertTrue(guard.allowed())
+
+
+class MacroCancelTest(unittest.TestCase):
+    def test_cancel_interrupts_sleep_and_skips_queued_jobs(self):
+        runner = main.MacroRunner()
+        started = threading.Event()
+        done = threading.Event()
+        results = []
+
+        def slow(generation):
+            started.set()
+            results.append(("slow", runner.sleep(generation, 10000)))
+
+        def queued(generation):
+            results.append(("queued", runner.cancelled(generation)))
+            done.set()
+
+        runner.submit(slow)
+        runner.submit(queued)
+        self.assertTrue(started.wait(5))
+        began = time.monotonic()
+        runner.cancel()
+        self.assertTrue(done.wait(5))
+        self.assertLess(time.monotonic() - began, 5)
+        self.assertEqual(results, [("slow", False), ("queued", True)])
+
+    def test_jobs_after_cancel_run(self):
+        runner = main.MacroRunner()
+        runner.cancel()
+        done = threading.Event()
+        results = []
+
+        def job(generation):
+            results.append((runner.cancelled(generation), runner.sleep(generation, 0)))
+            done.set()
+
+        runner.submit(job)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(results, [(False, True)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import tkinter as tk
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import main
+
+
+class EditHistoryTest(unittest.TestCase):
+    def test_list_undo_redo(self):
+        first, second, third = {"trigger": ".a"}, {"trigger": ".b"}, {"trigger": ".c"}
+        before = [first, second]
+        after = [first, third]
+        diff = main.diff_lists(before, after)
+        history = main.EditHistory()
+        history.push("edit", [("binds", "list", diff)])
+
+        items = list(after)
+        main.EditHistory.apply(items, "list", diff, False)
+        self.assertEqual(items, before)
+        main.EditHistory.apply(items, "list", diff, True)
+        self.assertEqual(items, after)
+        self.assertEqual(len(history.undo_stack), 1)
+
+    def test_dict_undo_redo(self):
+        before = {"name": "Иван", "rank": "1"}
+        after = {"name": "Пётр", "badge": "7"}
+        diff = main.diff_dicts(before, after)
+        values = dict(after)
+        main.EditHistory.apply(values, "dict", diff, False)
+        self.assertEqual(values, before)
+        main.EditHistory.apply(values, "dict", diff, True)
+        self.assertEqual(values, after)
+
+    def test_push_clears_redo_and_limits(self):
+        history = main.EditHistory(limit=2)
+        history.redo_stack.append(("old", [1]))
+        for label in ("a", "b", "c"):
+            history.push(label, [1])
+        history.push("empty", [])
+        self.assertEqual([label for label, _changes in history.undo_stack], ["b", "c"])
+        self.assertFalse(history.redo_stack)
+
+
+class AppHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        paths = {
+            name: os.path.join(self.tmp.name, os.path.basename(getattr(main, name)))
+            for name in ("BINDS_PATH", "PHRASES_PATH", "AUTOFIX_PATH", "PROFILES_PATH", "CONFIG_PATH")
+        }
+        patcher = mock.patch.multiple(main, **paths)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+        app = main.BinderApp.__new__(main.BinderApp)
+        app.config = {"variables": {}, "active_profile": "Основной"}
+        app.active_profile = "Основной"
+        app.commands_data = [{"trigger": ".a", "text": "1"}, {"trigger": ".b", "text": "2"}]
+        app.phrases_data = []
+        app.autofix_data = {"layout": [], "custom": []}
+        app.hotkeys_data = []
+        app.profiles_data = ["Основной"]
+        app.history = main.EditHistory()
+        app.commands_ui = {"data_ref": "commands_data", "path": main.BINDS_PATH, "label": "Команды"}
+        app.phrases_ui = {"data_ref": "phrases_data", "path": main.PHRASES_PATH, "label": "Фразы"}
+        for name in (
+            "refresh_bind_list",
+            "refresh_autofix_list",
+            "refresh_profiles_list",
+            "refresh_variables_list",
+            "_refresh_binder_triggers",
+            "update_info_files",
+            "run_trigger_analysis",
+            "append_log",
+        ):
+            setattr(app, name, lambda *_args, **_kwargs: None)
+        self.app = app
+
+    def test_import_is_undoable(self):
+        app = self.app
+        before = list(app.commands_data)
+        entries = [("binds", {"trigger": ".b", "text": "новый"}), ("binds", {"trigger": ".c", "text": "3"})]
+        app.import_entries(entries, main.IMPORT_TAKE_THEIRS, label="Подписка: тест")
+        self.assertEqual([item["text"] for item in app.commands_data], ["1", "новый", "3"])
+        self.assertEqual(app.history.undo_stack[-1][0], "Подписка: тест")
+
+        app.history_undo()
+        self.assertEqual(app.commands_data, before)
+        self.assertEqual(main.load_json(main.BINDS_PATH, None), before)
+        app.history_redo()
+        self.assertEqual([item["text"] for item in app.commands_data], ["1", "новый", "3"])
+
+    def test_undo_after_import_keeps_imported_rows(self):
+        app = self.app
+        snapshot = app.history_begin()
+        app.commands_data.append({"trigger": ".d", "text": "4"})
+        app.history_commit("добавление", snapshot)
+        app.import_entries([("binds", {"trigger": ".a", "text": "из пакета"})], main.IMPORT_TAKE_THEIRS)
+
+        app.history_undo()
+        app.history_undo()
+        self.assertEqual(app.commands_data, [{"trigger": ".a", "text": "1"}, {"trigger": ".b", "text": "2"}])
+
+    def test_shortcuts_ignore_text_fields(self):
+        app = self.app
+        snapshot = app.history_begin()
+        app.commands_data.append({"trigger": ".d", "text": "4"})
+        app.history_commit("добавление", snapshot)
+        for widget_class in (tk.Entry, tk.Text):
+            app.history_undo(SimpleNamespace(widget=widget_class.__new__(widget_class)))
+            self.assertEqual(len(app.commands_data), 3)
+        app.history_undo(SimpleNamespace(widget=None))
+        self.assertEqual(len(app.commands_data), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import main
+
+
+def plain(item):
+    return {"trigger": item["trigger"], "text": item["text"], "cursor_back": 0}
+
+
+def exact(trigger):
+    return (trigger,)
+
+
+class RankHotTriggersTest(unittest.TestCase):
+    def setUp(self):
+        self.mapping = dict.fromkeys((".a", ".b", ".c", ".bb"), {})
+
+    def test_top_usage_and_recent(self):
+        usage = [(".a", 5), (".c", 1), (".b", 3), (".gone", 100)]
+        hot, lengths = main.rank_hot_triggers(self.mapping, usage, [".c"], exact, 1)
+        self.assertEqual(hot, frozenset({".a", ".c"}))
+        self.assertEqual(lengths, (2,))
+
+    def test_usage_is_summed(self):
+        usage = [(".c", 2), (".a", 3), (".c", 2)]
+        hot, _ = main.rank_hot_triggers(self.mapping, usage, [], exact, 1)
+        self.assertEqual(hot, frozenset({".c"}))
+
+    def test_shadowed_suffix_is_dropped(self):
+        mapping = dict.fromkeys(("b", ".b", ".ab"), {})
+        hot, lengths = main.rank_hot_triggers(mapping, [("b", 9), (".ab", 1)], [], exact, 2)
+        self.assertEqual(hot, frozenset({".ab"}))
+        self.assertEqual(lengths, (3,))
+
+    def test_variants_are_included(self):
+        mapping = {}
+        for trigger in main.layout_variants(".тест"):
+            mapping[trigger] = {}
+        hot, _ = main.rank_hot_triggers(mapping, [(".тест", 1)], [], main.layout_variants, 4)
+        self.assertEqual(hot, frozenset(mapping))
+
+
+class HotMatchTest(unittest.TestCase):
+    def setUp(self):
+        self.app = main.BinderApp.__new__(main.BinderApp)
+        self.app._binder_stats = dict.fromkeys(("hot_hits", "hot_ns", "cold_hits", "cold_ns", "misses", "miss_ns"), 0)
+        items = [{"trigger": trigger, "text": trigger.upper()} for trigger in (".a", ".b", "x.a", ".cd")]
+        snapshot = main.build_binder_snapshot(1, items, exact, plain)
+        self.snapshot = snapshot.with_hot(main.rank_hot_triggers(snapshot.map, [(".a", 3), (".cd", 1)], [], exact, 4))
+
+    def match(self, buffer):
+        found = self.app._match_binder_trigger(self.snapshot, buffer)
+        return found and found[0]
+
+    def test_hot_and_cold_hits(self):
+        self.assertEqual(self.match("x.cd"), ".cd")
+        self.assertEqual(self.match("x.b"), ".b")
+        self.assertIsNone(self.match("x.z"))
+        stats = self.app._binder_stats
+        self.assertEqual((stats["hot_hits"], stats["cold_hits"], stats["misses"]), (1, 1, 1))
+
+    def test_longer_cold_trigger_wins_over_hot_suffix(self):
+        self.assertNotIn(".a", self.snapshot.hot)
+        self.assertEqual(self.match("qx.a"), "x.a")
+        self.assertEqual(self.match("q.a"), ".a")
+
+    def test_hot_matches_agree_with_cold(self):
+        cold = self.snapshot.with_hot((frozenset(), ()))
+        for buffer in ("", ".a", "x.a", "q.cd", ".b.a", "zz"):
+            expected = self.app._match_binder_trigger(cold, buffer)
+            self.assertEqual(self.app._match_binder_trigger(self.snapshot, buffer), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+import unittest
+
+import main
+
+
+class IterJsonBundleTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "bundle.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(data)
+
+    def test_lists_stream_per_record(self):
+        payload = {
+            "config": {"variables": {"name": "Иван"}},
+            "binds": [{"trigger": f".t{n}", "text": "x" * 50} for n in range(40)],
+            "phrases": [],
+            "autofix": {"layout": [], "custom": []},
+        }
+        self.write(json.dumps(payload, ensure_ascii=False))
+        items = list(main.iter_json_bundle(self.path, chunk_size=16))
+        self.assertEqual(items[0], ("config", payload["config"]))
+        binds = [value for key, value in items if key == "binds"]
+        self.assertEqual(binds, payload["binds"])
+        self.assertNotIn("phrases", [key for key, _ in items])
+        self.assertEqual(items[-1], ("autofix", payload["autofix"]))
+
+    def test_empty_object(self):
+        self.write("  {  }  ")
+        self.assertEqual(list(main.iter_json_bundle(self.path)), [])
+
+    def test_truncated_raises(self):
+        self.write('{"binds": [{"trigger": ".a", "text": "b"}, {"trig')
+        with self.assertRaises(ValueError):
+            list(main.iter_json_bundle(self.path, chunk_size=8))
+
+    def test_non_string_key_raises(self):
+        self.write("{1: 2}")
+        with self.assertRaises(ValueError):
+            list(main.iter_json_bundle(self.path))
+
+
+class RecordMergerTest(unittest.TestCase):
+    def merger(self, policy):
+        items = [{"trigger": ".a", "text": "старый"}, {"trigger": ".b", "text": "бэ"}]
+        return main.RecordMerger(items, "trigger", main.normalize_bind_entry, policy)
+
+    def test_add_unchanged_invalid(self):
+        merger = self.merger(main.IMPORT_KEEP_MINE)
+        merger.add({"trigger": ".c", "text": "цэ"})
+        merger.add({"trigger": ".b", "text": "бэ"})
+        merger.add({"trigger": "", "text": "пусто"})
+        merger.add("строка")
+        self.assertEqual(merger.stats["added"], 1)
+        self.assertEqual(merger.stats["unchanged"], 1)
+        self.assertEqual(merger.stats["invalid"], 2)
+        self.assertEqual(merger.touched, {".c"})
+
+    def test_keep_mine(self):
+        merger = self.merger(main.IMPORT_KEEP_MINE)
+        merger.add({"trigger": ".a", "text": "новый"})
+        self.assertEqual(merger.items[0]["text"], "старый")
+        self.assertEqual(merger.stats["skipped"], 1)
+        self.assertEqual(len(merger.conflicts), 1)
+        self.assertFalse(merger.changed)
+
+    def test_take_theirs(self):
+        merger = self.merger(main.IMPORT_TAKE_THEIRS)
+        merger.add({"trigger": ".a", "text": "новый"})
+        self.assertEqual(merger.items[0], {"trigger": ".a", "text": "новый"})
+        self.assertEqual(merger.stats["replaced"], 1)
+        self.assertTrue(merger.changed)
+
+    def test_keep_both_suffixes(self):
+        merger = self.merger(main.IMPORT_KEEP_BOTH)
+        merger.add({"trigger": ".a", "text": "новый"})
+        merger.add({"trigger": ".a", "text": "третий"})
+        self.assertEqual([item["trigger"] for item in merger.items], [".a", ".b", ".a2", ".a3"])
+        self.assertEqual(merger.stats["renamed"], 2)
+
+    def test_keep_both_without_suffix_skips(self):
+        items = [{"from": "q", "to": "й"}]
+        merger = main.RecordMerger(items, "from", main.normalize_autofix_entry, main.IMPORT_KEEP_BOTH, allow_suffix=False)
+        merger.add({"from": "q", "to": "к"})
+        self.assertEqual(merger.stats["skipped"], 1)
+        self.assertEqual(len(merger.items), 1)
+
+    def test_normalize_cursor_back(self):
+        entry = main.normalize_bind_entry({"trigger": " .a ", "response": "x", "cursor_back": "3"})
+        self.assertEqual(entry, {"trigger": ".a", "text": "x", "cursor_back": 3})
+        self.assertIsNone(main.normalize_bind_entry({"trigger": ".a", "text": "x", "cursor_back": -1}))
+        self.assertIsNone(main.normalize_bind_entry({"trigger": ".a", "text": "x", "cursor_back": True}))
+
+
+class MergeConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.current = {"theme": "dark", "variables": {"name": "Иван", "rank": "1"}}
+        self.incoming = {"theme": "light", "lang": "ru", "variables": {"name": "Пётр", "badge": "7"}}
+
+    def test_keep_mine(self):
+        result, conflicts = main.merge_config(self.current, self.incoming, main.IMPORT_KEEP_MINE)
+        self.assertEqual(result["theme"], "dark")
+        self.assertEqual(result["lang"], "ru")
+        self.assertEqual(result["variables"], {"name": "Иван", "rank": "1", "badge": "7"})
+        self.assertEqual(conflicts, [("name", "Иван", "Пётр")])
+        self.assertEqual(self.current["variables"]["name"], "Иван")
+
+    def test_take_theirs(self):
+        result, conflicts = main.merge_config(self.current, self.incoming, main.IMPORT_TAKE_THEIRS)
+        self.assertEqual(result["theme"], "light")
+        self.assertEqual(result["variables"]["name"], "Пётр")
+        self.assertEqual(len(conflicts), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import main
+
+
+class LayoutTest(unittest.TestCase):
+    def test_twin(self):
+        self.assertEqual(main.layout_twin(".лспд"), "/kcgl")
+        self.assertEqual(main.layout_twin("/kcgl"), ".лспд")
+        self.assertEqual(main.layout_twin("бю"), ",.")
+
+    def test_variants(self):
+        self.assertEqual(main.layout_variants(".лспд"), (".лспд", "/kcgl"))
+        self.assertEqual(main.layout_variants("123"), ("123",))
+        self.assertEqual(main.exact_layout(".лспд"), (".лспд",))
+
+    def test_snapshot_matches_twin(self):
+        items = [{"trigger": ".лспд", "text": "/ctp 429 -980 30.50"}]
+        snapshot = main.build_binder_snapshot(1, items, main.layout_variants, lambda item: item)
+        self.assertIs(snapshot.map["/kcgl"], snapshot.map[".лспд"])
+        exact = main.build_binder_snapshot(1, items, main.exact_layout, lambda item: item)
+        self.assertNotIn("/kcgl", exact.map)
+
+
+class CollapseLayoutPairsTest(unittest.TestCase):
+    source = {"trigger": ".лспд", "text": "/ctp 429 -980 30.50"}
+
+    def test_drops_generated_alias(self):
+        items, _stats = main.sync_aliases([dict(self.source)])
+        self.assertEqual([item["trigger"] for item in items], [".лспд", ".kcgl"])
+        kept, removed = main.collapse_layout_pairs(items)
+        self.assertEqual(kept, [self.source])
+        self.assertEqual(removed, [".kcgl"])
+
+    def test_drops_legacy_pairs(self):
+        for twin in (".kcgl", "/kcgl"):
+            kept, removed = main.collapse_layout_pairs([dict(self.source), dict(self.source, trigger=twin)])
+            self.assertEqual(kept, [self.source])
+            self.assertEqual(removed, [twin])
+
+    def test_keeps_pairs_with_different_text(self):
+        items = [dict(self.source), {"trigger": "/kcgl", "text": "другое"}]
+        kept, removed = main.collapse_layout_pairs(items)
+        self.assertEqual(kept, items)
+        self.assertEqual(removed, [])
+
+    def test_keeps_orphan_alias_once(self):
+        orphan = main.alias_record({"trigger": ".мэр", "text": "x"})
+        kept, removed = main.collapse_layout_pairs([orphan])
+        self.assertEqual((kept, removed), ([orphan], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import main
+
+
+ENTRIES = [
+    ("binds", {"trigger": ".лспд", "text": "/ctp 429 -980 30.50"}),
+    ("binds", {"trigger": ".привет", "text": "Привет!", "cursor_back": 1}),
+    ("phrases", {"trigger": ".лспд", "text": "дубликат"}),
+    ("autofix", {"layout": [{"from": "a", "to": "b"}]}),
+]
+
+
+class MappedLibraryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, f"lib{main.LIBRARY_EXT}")
+        self.count = main.write_library(self.path, ENTRIES)
+        self.library = main.MappedLibrary(self.path)
+        self.addCleanup(self.library.close)
+
+    def test_roundtrip(self):
+        self.assertTrue(main.is_library(self.path))
+        self.assertEqual(self.count, 2)
+        self.assertEqual(self.library.triggers, [".лспд", ".привет"])
+        self.assertEqual(self.library.text(1), "Привет!")
+        self.assertEqual(self.library.record(1)[2], 1)
+
+    def test_payload_reads_lazily(self):
+        payloads = dict(self.library.payloads())
+        payload = payloads[".привет"]
+        self.assertEqual(dict.get(payload, "text"), None)
+        self.assertEqual(payload["text"], "Привет!")
+        self.assertEqual(payload.get("text"), "Привет!")
+        self.assertEqual(payload.get("cursor_back"), 1)
+        self.assertEqual(payload.get("missing", "x"), "x")
+        self.assertIn("text", payload)
+
+    def test_snapshot_uses_library(self):
+        items = [{"trigger": ".лспд", "text": "свой"}]
+        snapshot = main.build_binder_snapshot(1, items, main.exact_layout, lambda item: item, (self.library,))
+        self.assertEqual(snapshot.map[".лспд"]["text"], "свой")
+        self.assertEqual(snapshot.map[".привет"].get("text"), "Привет!")
+
+    def test_rejects_other_files(self):
+        other = os.path.join(self.tmp.name, "other.bin")
+        with open(other, "wb") as f:
+            f.write(b"XXXX" + bytes(64))
+        with self.assertRaises(ValueError):
+            main.MappedLibrary(other)
+
+    def test_closed_library_raises(self):
+        library = main.MappedLibrary(self.path)
+        library.close()
+        with self.assertRaises(ValueError):
+            library.text(0)
+
+
+class MountLibrariesTest(unittest.TestCase):
+    def test_unmounted_libraries_are_closed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, f"lib{main.LIBRARY_EXT}")
+            main.write_library(path, ENTRIES)
+            scheduled = []
+            app = main.BinderApp.__new__(main.BinderApp)
+            app.root = SimpleNamespace(after=lambda _ms, func: scheduled.append(func))
+            app.config = {"libraries": {"Основной": [path]}}
+            app.active_profile = "Основной"
+            app.append_log = lambda *_args, **_kwargs: None
+            app._libraries = {}
+            app._mount_libraries()
+            library = app._libraries[path]
+            app._mount_libraries()
+            self.assertIs(app._libraries[path], library)
+            self.assertEqual(scheduled, [])
+
+            app.config["libraries"]["Основной"] = []
+            app._mount_libraries()
+            self.assertEqual(app._libraries, {})
+            for func in scheduled:
+                func()
+            with self.assertRaises(ValueError):
+                library.text(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
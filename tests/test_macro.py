@@ -0,0 +1,96 @@
+import queue
+import unittest
+from types import SimpleNamespace
+
+import main
+
+
+def make_app(**config):
+    app = main.BinderApp.__new__(main.BinderApp)
+    app.root = SimpleNamespace(after=lambda *_args: None)
+    app.config = config
+    app._worker_errors = queue.Queue()
+    app._setup_variable_resolvers()
+    return app
+
+
+def run(ops, check=lambda _name: True, cancel_after=None):
+    out = []
+    steps = []
+
+    def cancelled():
+        steps.append(1)
+        return cancel_after is not None and len(steps) > cancel_after
+
+    done = main.run_macro(
+        ops,
+        write=out.append,
+        send=lambda key: out.append(f"<{key}>"),
+        wait=lambda _ms: True,
+        check=check,
+        cancelled=cancelled,
+    )
+    return done, "".join(out)
+
+
+class CompileMacroTest(unittest.TestCase):
+    def test_plain_text_and_lines(self):
+        ops = main.compile_macro("/me кивает\n/do ок{Enter}")
+        self.assertEqual(
+            ops,
+            (
+                (main.MACRO_WRITE, "/me кивает"),
+                (main.MACRO_KEY, "enter"),
+                (main.MACRO_WRITE, "/do ок"),
+                (main.MACRO_KEY, "enter"),
+            ),
+        )
+
+    def test_repeat_and_if(self):
+        ops = main.compile_macro("{repeat 3}a{/repeat}{if name}b{/if}")
+        self.assertEqual(run(ops), (True, "aaab"))
+        self.assertEqual(run(ops, check=lambda _name: False), (True, "aaa"))
+
+    def test_errors(self):
+        for text in ("{repeat 0}a{/repeat}", "{repeat 2}a", "{/if}", "{wait x}", "{if}a{/if}"):
+            with self.assertRaises(ValueError):
+                main.compile_macro(text)
+
+    def test_cancel_stops_program(self):
+        ops = main.compile_macro("{repeat 100}a{/repeat}")
+        done, out = run(ops, cancel_after=5)
+        self.assertFalse(done)
+        self.assertLess(len(out), 5)
+
+
+class BinderProgramTest(unittest.TestCase):
+    def program(self, app, text):
+        resolved = {}
+        template = app._expand_binder_text(text, resolved, dynamic=False)
+        return app._expand_binder_ops(app._compile_binder_text(template, ".t"), resolved)
+
+    def test_clipboard_is_written_literally(self):
+        app = make_app()
+        app._clipboard_text = "{alt+f4}{repeat 100}"
+        ops = self.program(app, "%clipboard%{Enter}")
+        self.assertEqual(ops, ((main.MACRO_WRITE, "{alt+f4}{repeat 100}"), (main.MACRO_KEY, "enter")))
+
+    def test_user_variables_may_hold_keys(self):
+        app = make_app(variables={"send": "{Enter}"})
+        ops = self.program(app, "/me %send%")
+        self.assertEqual(ops, ((main.MACRO_WRITE, "/me "), (main.MACRO_KEY, "enter")))
+
+    def test_invalid_macro_is_logged_and_sent_as_text(self):
+        app = make_app()
+        ops = self.program(app, "{repeat 2}a\nb{Enter}")
+        self.assertEqual(
+            ops,
+            ((main.MACRO_WRITE, "{repeat 2}a"), (main.MACRO_KEY, "enter"), (main.MACRO_WRITE, "b{Enter}")),
+        )
+        action, details = app._worker_errors.get_nowait()
+        self.assertEqual(action, "Ошибка макроса")
+        self.assertTrue(details.startswith(".t: "))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import http.server
+import os
+import queue
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import main
+
+
+PAYLOAD = {
+    "config": {"active_profile": "Основной"},
+    "binds": [
+        {"trigger": ".лспд", "text": "/ctp 429 -980 30.50"},
+        {"trigger": ".привет", "text": "Доброго дня, %name%!", "cursor_back": 2},
+    ],
+    "phrases": [{"trigger": ".пока", "text": "Доброго дня, до встречи"}],
+    "autofix": {group: [{"from": "првиет", "to": "привет"}] for group in main.BUNDLE_AUTOFIX_GROUPS[:1]},
+    "profiles": ["Основной", "Запасной"],
+}
+
+
+class PackHandler(http.server.BaseHTTPRequestHandler):
+    body = b""
+    etag = '"v1"'
+    requests = []
+
+    def do_GET(self):
+        PackHandler.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *_args):
+        pass
+
+
+class PackSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.packs_dir = main.PACKS_DIR
+        main.PACKS_DIR = self.tmp.name
+        PackHandler.body = main.encode_bundle(PAYLOAD, main.BUNDLE_CODEC_GZIP)
+        PackHandler.requests = []
+        self.server = http.server.HTTPServer(("127.0.0.1", 0), PackHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/pack{main.BUNDLE_EXT}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        main.PACKS_DIR = self.packs_dir
+        self.tmp.cleanup()
+
+    def test_fetch_pack_uses_etag(self):
+        changed, path, meta = main.fetch_pack(self.url, {})
+        self.assertTrue(changed)
+        self.assertEqual(meta["etag"], PackHandler.etag)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), PackHandler.body)
+
+        changed, again, cached = main.fetch_pack(self.url, meta)
+        self.assertFalse(changed)
+        self.assertEqual(again, path)
+        self.assertEqual(cached, meta)
+        self.assertEqual(PackHandler.requests, [None, PackHandler.etag])
+
+    def test_local_source_tracks_mtime_and_size(self):
+        path = os.path.join(self.tmp.name, f"local{main.BUNDLE_EXT}")
+        main.save_bundle(path, PAYLOAD, main.BUNDLE_CODEC_GZIP)
+        changed, fetched, meta = main.fetch_pack(path, {})
+        self.assertTrue(changed)
+        self.assertEqual(fetched, path)
+        changed, _fetched, _meta = main.fetch_pack(path, meta)
+        self.assertFalse(changed)
+
+    def test_changed_body_is_refetched(self):
+        _changed, path, meta = main.fetch_pack(self.url, {})
+        PackHandler.etag = '"v2"'
+        PackHandler.body = main.encode_bundle(dict(PAYLOAD, profiles=["Новый"]), main.BUNDLE_CODEC_GZIP)
+        try:
+            changed, again, new_meta = main.fetch_pack(self.url, meta)
+        finally:
+            PackHandler.etag = '"v1"'
+        self.assertTrue(changed)
+        self.assertEqual(new_meta["etag"], '"v2"')
+        self.assertIn(("profiles", "Новый"), list(main.iter_bundle(again)))
+
+    def test_sync_packs_reports_every_source(self):
+        missing = os.path.join(self.tmp.name, "missing.mrpb")
+        results = queue.Queue()
+        main.sync_packs([self.url, missing], {}, results)
+        first = results.get_nowait()
+        second = results.get_nowait()
+        self.assertIsNone(results.get_nowait())
+
+        source, meta, entries, error = first
+        self.assertEqual(source, self.url)
+        self.assertIsNone(error)
+        self.assertEqual(meta["etag"], PackHandler.etag)
+        self.assertIn(("binds", PAYLOAD["binds"][0]), entries)
+
+        source, _meta, entries, error = second
+        self.assertEqual(source, missing)
+        self.assertIsNone(entries)
+        self.assertTrue(error)
+
+
+class PackSyncQueueTest(unittest.TestCase):
+    def test_request_during_sync_runs_after_it(self):
+        app = main.BinderApp.__new__(main.BinderApp)
+        app.root = SimpleNamespace(after=lambda *_args: "id", after_cancel=lambda _id: None)
+        app._pack_sync_after = None
+        app._pack_sync_running = True
+        app._pack_sync_again = None
+        app._pack_index = {}
+        app._pack_results = queue.Queue()
+        restarts = []
+
+        app.start_pack_sync()
+        app.start_pack_sync(force=True)
+        app.start_pack_sync()
+        self.assertIs(app._pack_sync_again, True)
+
+        app._pack_results.put(None)
+        app.start_pack_sync = lambda force=False: restarts.append(force)
+        app.update_info_files = app.run_trigger_analysis = lambda: None
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.object(main, "PACKS_INDEX_PATH", os.path.join(tmp, "index.json")):
+                app._poll_pack_sync()
+        self.assertEqual(restarts, [True])
+        self.assertFalse(app._pack_sync_running)
+        self.assertIsNone(app._pack_sync_again)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+import main
+
+
+PARAM_BIND = {"trigger": ".бан {id} {time}", "text": "/ban id time"}
+PLAIN_BIND = {"trigger": ".лспд", "text": "/ctp 429 -980 30.50"}
+
+
+class ParamTriggerTest(unittest.TestCase):
+    def test_normalize_accepts_param_triggers(self):
+        self.assertEqual(main.normalize_bind_entry(PARAM_BIND), PARAM_BIND)
+        self.assertIsNone(main.normalize_bind_entry({"trigger": ".бан id", "text": "x"}))
+        self.assertIsNone(main.normalize_bind_entry({"trigger": ".бан {id}{time}", "text": "x"}))
+        self.assertIsNone(main.normalize_bind_entry({"trigger": "{id} .бан", "text": "x"}))
+
+    def test_match_fills_slots(self):
+        matcher = main.ParamMatcher([(PARAM_BIND["trigger"], {"text": "/ban {id} {time}", "cursor_back": 0})])
+        trigger, payload, _span = matcher.match(".бан 15 60")
+        self.assertEqual(trigger, PARAM_BIND["trigger"])
+        self.assertEqual(payload["text"], "/ban 15 60")
+        self.assertIsNone(matcher.match(".бан abc 60"))
+
+    def test_bundle_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, f"data{main.BUNDLE_EXT}")
+            main.save_bundle(path, {"binds": [PLAIN_BIND, PARAM_BIND]}, main.BUNDLE_CODEC_GZIP)
+            entries = list(main.iter_bundle(path))
+        self.assertEqual(entries, [("binds", PLAIN_BIND), ("binds", PARAM_BIND)])
+
+    def test_merger_keeps_param_binds(self):
+        merger = main.RecordMerger([PARAM_BIND], "trigger", main.normalize_bind_entry, main.IMPORT_KEEP_BOTH)
+        merger.add(dict(PARAM_BIND, text="/kick id"))
+        self.assertEqual(merger.stats["renamed"], 1)
+        self.assertEqual(merger.items[-1]["trigger"], ".бан2 {id} {time}")
+        self.assertIsNotNone(main.normalize_bind_entry(merger.items[-1]))
+
+    def test_library_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lib.mrpl")
+            count = main.write_library(path, [("binds", PLAIN_BIND), ("binds", PARAM_BIND)])
+            library = main.MappedLibrary(path)
+            try:
+                snapshot = main.build_binder_snapshot(1, [], main.exact_layout, lambda item: item, (library,))
+                self.assertEqual(count, 2)
+                self.assertIn(PLAIN_BIND["trigger"], snapshot.map)
+                self.assertIn(PARAM_BIND["trigger"], snapshot.params.triggers)
+            finally:
+                library.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import queue
+import random
+import threading
+import unittest
+
+import main
+
+
+def plain(item):
+    if not item.get("text"):
+        return None
+    return {"trigger": item["trigger"], "text": item["text"], "cursor_back": 0}
+
+
+class PayloadTest(unittest.TestCase):
+    def payload(self, item):
+        app = main.BinderApp.__new__(main.BinderApp)
+        return app._binder_payload(item)
+
+    def test_bad_cursor_back_is_ignored(self):
+        self.assertEqual(self.payload({"trigger": ".a", "text": "x", "cursor_back": "2a"})["cursor_back"], 0)
+        self.assertEqual(self.payload({"trigger": ".a", "text": "x", "cursor_back": "2"})["cursor_back"], 2)
+
+    def test_invalid_items_are_skipped(self):
+        for item in (None, {"trigger": ".a"}, {"trigger": 5, "text": "x"}, {"trigger": ".a", "text": 5}):
+            self.assertIsNone(self.payload(item))
+
+
+class PatchSnapshotTest(unittest.TestCase):
+    def test_patch_matches_full_build(self):
+        rng = random.Random(7)
+        triggers = [f".{a}{b}" for a in "абвг" for b in "деж"] + [".бан {id}", ".кик {id} {word}"]
+        items = [{"trigger": trigger, "text": f"t{idx}"} for idx, trigger in enumerate(triggers[:6])]
+        snapshot = main.build_binder_snapshot(1, items, main.layout_variants, plain)
+        for version in range(2, 200):
+            before = {item["trigger"] for item in items}
+            trigger = rng.choice(triggers)
+            match = [item for item in items if item["trigger"] == trigger]
+            if match and rng.random() < 0.5:
+                items.remove(match[0])
+            elif match:
+                match[0]["text"] = f"t{version}"
+            else:
+                items.append({"trigger": trigger, "text": f"t{version}"})
+            touched = {trigger} | (before ^ {item["trigger"] for item in items})
+            snapshot = main.patch_binder_snapshot(snapshot, version, list(items), touched, plain)
+            full = main.build_binder_snapshot(version, items, main.layout_variants, plain)
+            self.assertEqual(snapshot.map, full.map)
+            self.assertEqual(snapshot.trie.root, full.trie.root)
+            self.assertEqual(snapshot.params.triggers, full.params.triggers)
+            self.assertEqual(snapshot.lengths, full.lengths)
+
+
+class SnapshotBuilderTest(unittest.TestCase):
+    def setUp(self):
+        self.published = queue.Queue()
+        self.errors = queue.Queue()
+        self.builder = main.SnapshotBuilder(
+            plain,
+            lambda: ({}, (), 8),
+            self.published.put,
+            lambda action, details: self.errors.put((action, details)),
+        )
+
+    def test_publishes_requested_items(self):
+        self.builder.request([{"trigger": ".a", "text": "x"}], main.exact_layout)
+        snapshot = self.published.get(timeout=5)
+        self.assertIn(".a", snapshot.map)
+
+    def test_failures_are_reported(self):
+        def broken(item):
+            raise ValueError("плохая запись")
+
+        self.builder.payload_of = broken
+        self.builder.request([{"trigger": ".a", "text": "x"}], main.exact_layout)
+        action, details = self.errors.get(timeout=5)
+        self.assertEqual(action, "Ошибка индекса")
+        self.assertIn("плохая запись", details)
+        self.assertTrue(self.published.empty())
+
+
+class MacroRunnerTest(unittest.TestCase):
+    def test_errors_are_reported_and_runner_survives(self):
+        errors = queue.Queue()
+        runner = main.MacroRunner(lambda action, details: errors.put((action, details)))
+        done = threading.Event()
+
+        def broken(_generation):
+            raise RuntimeError("сбой")
+
+        runner.submit(broken)
+        runner.submit(lambda _generation: done.set())
+        self.assertEqual(errors.get(timeout=5), ("Ошибка макроса", "RuntimeError: сбой"))
+        self.assertTrue(done.wait(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import main
+
+
+class StallWatchdogTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "stalls.json")
+        self.scheduled = []
+        self.root = SimpleNamespace(after=lambda ms, callback: self.scheduled.append((ms, callback)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def watchdog(self, threshold_ms, limit=main.STALL_REPORTS_LIMIT):
+        with mock.patch.object(main, "STALL_HEARTBEAT_INTERVAL", 10):
+            return main.StallWatchdog(self.root, self.path, threshold_ms, limit)
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("условие не выполнено")
+            time.sleep(0.01)
+
+    def saved(self):
+        reports = main.load_json(self.path, None)
+        return reports[0] if reports else {}
+
+    def test_stall_is_captured_with_main_stack(self):
+        watchdog = self.watchdog(50)
+        self.assertEqual(self.scheduled[0][0], 10)
+        self.wait_for(lambda: watchdog.snapshot())
+        report = watchdog.snapshot()[0]
+        self.assertGreaterEqual(report["duration_ms"], 50)
+        self.assertIn("wait_for", report["stack"])
+        self.wait_for(lambda: self.saved().get("stack") == report["stack"])
+        time.sleep(0.1)
+        watchdog._heartbeat()
+        self.wait_for(lambda: self.saved().get("duration_ms", 0) >= 100)
+        self.assertEqual(len(watchdog.snapshot()), 1)
+
+    def test_reports_persist_and_are_limited(self):
+        main.save_json(self.path, [{"at": str(n), "duration_ms": n, "stack": ""} for n in range(5)])
+        watchdog = self.watchdog(60000, limit=3)
+        self.assertEqual([report["at"] for report in watchdog.snapshot()], ["2", "3", "4"])
+        watchdog.clear()
+        self.assertEqual(watchdog.snapshot(), [])
+        self.assertEqual(main.load_json(self.path, None), [])
+
+    def test_broken_file_is_ignored(self):
+        main.save_json(self.path, {"not": "a list"})
+        self.assertEqual(self.watchdog(60000).snapshot(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+import main
+
+
+def plain(item):
+    return {"trigger": item["trigger"], "text": item["text"], "cursor_back": 0}
+
+
+class StartupCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, ".cache", "startup.bin")
+        self.binds = os.path.join(self.tmp.name, "binds.json")
+        self.phrases = os.path.join(self.tmp.name, "phrases.json")
+        self.config = os.path.join(self.tmp.name, "config.json")
+        main.save_json(self.binds, [{"trigger": ".привет", "text": "Привет"}])
+        main.save_json(self.config, {"variables": {"name": "Иван"}})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def cache(self):
+        return main.StartupCache(self.cache_path, [self.binds, self.phrases, self.config], [self.binds, self.phrases])
+
+    def fill(self):
+        cache = self.cache()
+        self.assertFalse(cache.load())
+        self.assertEqual(cache.load_json(self.binds, []), [{"trigger": ".привет", "text": "Привет"}])
+        self.assertEqual(cache.load_json(self.phrases, []), [])
+        self.assertEqual(cache.load_json(self.config, {}), {"variables": {"name": "Иван"}})
+        cache._write(dict(cache.keys), dict(cache.fresh), main.layout_variants, plain)
+        return cache
+
+    def test_round_trip_with_snapshot(self):
+        self.fill()
+        cache = self.cache()
+        self.assertTrue(cache.load())
+        self.assertEqual(cache.load_json(self.config, {}), {"variables": {"name": "Иван"}})
+        self.assertEqual(cache.load_json(self.phrases, []), [])
+        snapshot = cache.snapshot_for(main.layout_variants)
+        self.assertIn(".привет", snapshot.map)
+        self.assertIn("/ghbdtn", snapshot.map)
+        self.assertIsNone(cache.snapshot_for(main.layout_variants))
+
+    def test_snapshot_for_other_variants_is_dropped(self):
+        self.fill()
+        cache = self.cache()
+        cache.load()
+        self.assertIsNone(cache.snapshot_for(main.exact_layout))
+
+    def test_changed_source_invalidates(self):
+        self.fill()
+        main.save_json(self.binds, [{"trigger": ".пока", "text": "Пока"}])
+        self.assertFalse(self.cache().load())
+
+    def test_same_size_edit_invalidates(self):
+        self.fill()
+        main.save_json(self.binds, [{"trigger": ".превед", "text": "Привет"}])
+        stat = os.stat(self.binds)
+        os.utime(self.binds, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertFalse(self.cache().load())
+
+    def test_touched_but_identical_source_still_hits(self):
+        self.fill()
+        stat = os.stat(self.binds)
+        os.utime(self.binds, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertTrue(self.cache().load())
+
+    def test_created_missing_source_invalidates(self):
+        self.fill()
+        main.save_json(self.phrases, [])
+        self.assertFalse(self.cache().load())
+
+    def test_bad_magic_and_garbage(self):
+        os.makedirs(os.path.dirname(self.cache_path))
+        for blob in (b"BSTC1\n" + b"x" * 10, main.STARTUP_CACHE_MAGIC + b"garbage"):
+            with open(self.cache_path, "wb") as f:
+                f.write(blob)
+            self.assertFalse(self.cache().load())
+
+    def test_hit_does_not_rewrite(self):
+        self.fill()
+        cache = self.cache()
+        cache.load()
+        before = os.stat(self.cache_path).st_mtime_ns
+        cache.save(main.layout_variants, plain)
+        self.assertEqual(os.stat(self.cache_path).st_mtime_ns, before)
+        self.assertEqual(cache.fresh, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import main
+
+
+def teleport(trigger, x, y, z=30.0):
+    return {"trigger": trigger, "text": f"/ctp {x} {y} {z}"}
+
+
+class TeleportCatalogTest(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(main.parse_teleport("/ctp 429 -980 30.50"), (429.0, -980.0, 30.5))
+        self.assertIsNone(main.parse_teleport("/me машет"))
+
+    def test_nearest_matches_brute_force(self):
+        rng = random.Random(3)
+        points = [(rng.uniform(-4000, 4000), rng.uniform(-4000, 8000), rng.uniform(0, 100)) for _ in range(400)]
+        catalog = main.TeleportCatalog(teleport(f".t{idx}", *point) for idx, point in enumerate(points))
+        for query in [(0, 0, 0), (20000, 20000, 0), points[5]]:
+            expected = sorted((main.TeleportCatalog.distance(query, point), idx) for idx, point in enumerate(points))
+            self.assertEqual(catalog.nearest(query, 5), expected[:5])
+
+    def test_within(self):
+        catalog = main.TeleportCatalog([teleport(".a", 0, 0), teleport(".b", 3, 4, 30), teleport(".c", 50, 0)])
+        self.assertEqual([idx for _dist, idx in catalog.within((0, 0, 30), 5)], [0, 1])
+
+    def test_duplicates_ignore_layout_twins_and_aliases(self):
+        catalog = main.TeleportCatalog(
+            [
+                teleport(".лспд", 429, -980),
+                teleport("/kcgl", 429, -980),
+                dict(teleport(".kcgl", 429, -980), alias_of=".лспд"),
+                teleport(".пд", 429.5, -980),
+                teleport(".мэр", 100, 100),
+            ]
+        )
+        self.assertEqual(len(catalog), 4)
+        groups = catalog.duplicate_groups()
+        self.assertEqual([[catalog.entries[idx][0] for idx in group] for group in groups], [[".лспд", ".пд"]])
+
+
+class RemoveDuplicatesTest(unittest.TestCase):
+    def test_aliases_of_removed_teleports_go_too(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.object(main, "BINDS_PATH", os.path.join(tmp, "binds.json")):
+                app = main.BinderApp.__new__(main.BinderApp)
+                app.config = {"auto_alias_ru": True, "variables": {}}
+                app.commands_data, _stats = main.sync_aliases([teleport(".лспд", 429, -980), teleport(".пд", 429, -980)])
+                app.phrases_data = []
+                app.autofix_data = {}
+                app.hotkeys_data = []
+                app.history = main.EditHistory()
+                app.commands_ui = {"data_ref": "commands_data", "path": main.BINDS_PATH, "label": "Команды"}
+                refreshed = []
+                app._refresh_binder_triggers = refreshed.append
+                for name in ("append_log", "update_info_files", "run_trigger_analysis", "refresh_bind_list", "refresh_teleport_list"):
+                    setattr(app, name, lambda *_args, **_kwargs: None)
+                app.refresh_teleport_catalog()
+                data = app.commands_data
+                with mock.patch.object(main.messagebox, "askyesno", return_value=True):
+                    app.teleports_remove_duplicates()
+                self.assertIs(app.commands_data, data)
+                self.assertEqual([item["trigger"] for item in app.commands_data], [".лспд", ".kcgl"])
+                self.assertEqual(main.load_json(main.BINDS_PATH, None), app.commands_data)
+                self.assertIn(".gl", refreshed[-1])
+                self.assertEqual(len(app.history.undo_stack), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import queue
+import tempfile
+import unittest
+
+import main
+
+
+def key_events(text):
+    events = []
+    for ch in text:
+        name = "space" if ch == " " else ch
+        events.append((0, name, False))
+        events.append((0, name, True))
+    return events
+
+
+def record(snapshot, text):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.bin")
+        recorder = main.TraceRecorder(path)
+        for _delta, name, is_up in key_events(text):
+            recorder.record(name, is_up, snapshot)
+        recorder.flush()
+        return main.read_trace(path)
+
+
+def typed(events):
+    return [name for _delta, name, is_up in events if not is_up]
+
+
+class ReplayTest(unittest.TestCase):
+    items = [{"trigger": ".тест", "text": "привет"}]
+
+    def test_replay_expands(self):
+        report, expansions = main.replay_trace(key_events(".тест "), items=self.items)
+        self.assertEqual(len(expansions), 1)
+        trigger, output = expansions[0]
+        self.assertEqual(trigger, ".тест")
+        self.assertTrue(output.endswith("привет{space}"))
+        self.assertEqual(output.count("{backspace}"), len(".тест"))
+        self.assertEqual(report["mismatches"], [])
+
+    def test_replay_reports_mismatch(self):
+        report, _expansions = main.replay_trace(key_events(".тест "), expected=[], items=self.items)
+        self.assertEqual(len(report["mismatches"]), 1)
+        report, expansions = main.replay_trace(key_events(".нет "), items=self.items)
+        self.assertEqual(expansions, [])
+
+    def test_recorded_trace_replays(self):
+        snapshot = main.build_binder_snapshot(1, self.items, main.exact_layout, lambda item: item)
+        snapshot.redaction = main.build_redaction_index(snapshot)
+        events = record(snapshot, "секрет .тест ")
+        self.assertEqual(typed(events)[:6], [main.TRACE_REDACT] * 6)
+        self.assertEqual(typed(events)[7:12], list(".тест"))
+        _report, expansions = main.replay_trace(events, items=self.items)
+        self.assertEqual([trigger for trigger, _output in expansions], [".тест"])
+
+    def test_snapshot_without_index_redacts_everything(self):
+        snapshot = main.build_binder_snapshot(1, self.items, main.exact_layout, lambda item: item)
+        events = record(snapshot, ".тест 1")
+        self.assertEqual(typed(events), [main.TRACE_REDACT] * 5 + ["space", main.TRACE_REDACT])
+
+
+class RedactionIndexTest(unittest.TestCase):
+    def test_digits_are_kept_unless_triggers_use_zero(self):
+        snapshot = main.build_binder_snapshot(1, [{"trigger": ".а1", "text": "x"}], main.exact_layout, lambda item: item)
+        _root, digit = main.build_redaction_index(snapshot)
+        self.assertEqual(digit, "0")
+        snapshot = main.build_binder_snapshot(1, [{"trigger": ".а0", "text": "x"}], main.exact_layout, lambda item: item)
+        _root, digit = main.build_redaction_index(snapshot)
+        self.assertEqual(digit, main.TRACE_REDACT)
+
+    def test_builder_attaches_index_when_tracing(self):
+        published = queue.Queue()
+        builder = main.SnapshotBuilder(lambda item: item, lambda: ({}, (), 8), published.put)
+        builder.request([{"trigger": ".а", "text": "x"}], main.exact_layout)
+        self.assertIsNone(published.get(timeout=5).redaction)
+        builder.request_redaction(True)
+        root, _digit = published.get(timeout=5).redaction
+        self.assertIn(".", root)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from types import SimpleNamespace
+
+import main
+
+
+def make_app(**config):
+    app = main.BinderApp.__new__(main.BinderApp)
+    app.root = SimpleNamespace(after=lambda *_args: None)
+    app.config = config
+    app._setup_variable_resolvers()
+    return app
+
+
+class ExpandVariablesTest(unittest.TestCase):
+    def test_user_variables(self):
+        app = make_app(variables={"name": "Иван"})
+        self.assertEqual(app._expand_binder_text("Я %name%, %unknown%"), "Я Иван, %unknown%")
+
+    def test_discord_keys_win_over_user_variables(self):
+        app = make_app(discord_me="me#1", variables={"qdis": "чужое", "gadis": "чужое"})
+        self.assertEqual(app._expand_binder_text("%qdis% %gadis%"), "me#1 ")
+
+    def test_dynamic_values_resolve_once(self):
+        app = make_app(counters={"id": 4})
+        app._clipboard_text = "буфер"
+        resolved = {}
+        text = app._expand_binder_text("%counter:id% %counter:id% %clipboard%", resolved)
+        self.assertEqual(text, "5 5 буфер")
+        self.assertEqual(app._counters["id"], 5)
+
+
+class VariableIndexTest(unittest.TestCase):
+    def test_update_tracks_users(self):
+        index = main.VariableIndex()
+        index.update(".a", "%name% %clipboard%")
+        index.update(".b", "%name%")
+        self.assertEqual(index.triggers("name"), [".a", ".b"])
+        index.update(".a", "без переменных")
+        self.assertEqual(index.triggers("name"), [".b"])
+        self.assertNotIn("clipboard", index.users)
+
+    def test_copy_is_independent(self):
+        index = main.VariableIndex()
+        index.update(".a", "%name%")
+        clone = index.copy()
+        clone.update(".a")
+        self.assertEqual(index.triggers("name"), [".a"])
+        self.assertEqual(clone.triggers("name"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
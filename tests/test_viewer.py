@@ -0,0 +1,99 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import main
+
+
+class LineIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "log.txt")
+        main._LINE_INDEXES.clear()
+
+    def tearDown(self):
+        main._LINE_INDEXES.clear()
+        self.tmp.cleanup()
+
+    def write(self, text, mode="w"):
+        with open(self.path, mode, encoding="utf-8", newline="") as f:
+            f.write(text)
+
+    def test_lines_and_read(self):
+        self.write("первая\r\nвторая\nтретья")
+        index = main.open_line_index(self.path)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.read(0, 2), "первая\nвторая")
+        self.assertEqual(index.read(2, 10), "третья")
+        self.assertEqual(index.read(5, 6), "")
+
+    def test_trailing_newline_is_not_a_line(self):
+        self.write("a\nb\n")
+        self.assertEqual(len(main.open_line_index(self.path)), 2)
+
+    def test_small_chunks(self):
+        text = "".join(f"строка {n}\n" for n in range(200))
+        self.write(text)
+        with mock.patch.object(main, "VIEWER_CHUNK_BYTES", 7):
+            index = main.open_line_index(self.path)
+        self.assertEqual(len(index), 200)
+        self.assertEqual(index.read(150, 151), "строка 150")
+
+    def test_cached_until_changed(self):
+        self.write("a\n")
+        index = main.open_line_index(self.path)
+        self.assertIs(main.open_line_index(self.path), index)
+
+    def test_append_only_extends(self):
+        self.write("a\nb\n")
+        index = main.open_line_index(self.path, append_only=True)
+        self.write("c\n", "a")
+        extended = main.open_line_index(self.path, append_only=True)
+        self.assertIs(extended, index)
+        self.assertEqual(len(extended), 3)
+        self.assertEqual(extended.read(2, 3), "c")
+
+    def test_rotation_rebuilds(self):
+        self.write("старое содержимое\n" * 3)
+        index = main.open_line_index(self.path, append_only=True)
+        os.remove(self.path)
+        self.write("новое\n" * 4)
+        rebuilt = main.open_line_index(self.path, append_only=True)
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(rebuilt.read(0, 1), "новое")
+
+    def test_shrink_rebuilds(self):
+        self.write("a\nb\nc\n")
+        main.open_line_index(self.path, append_only=True)
+        self.write("x\n")
+        rebuilt = main.open_line_index(self.path, append_only=True)
+        self.assertEqual(len(rebuilt), 1)
+        self.assertEqual(rebuilt.read(0, 1), "x")
+
+    def test_find_wraps_around(self):
+        self.write("alpha\nБета\ngamma\nбета два\n")
+        index = main.open_line_index(self.path)
+        self.assertEqual(index.find("бета"), 1)
+        self.assertEqual(index.find("БЕТА", 2), 3)
+        self.assertEqual(index.find("alpha", 1), 0)
+        self.assertEqual(index.find("нет"), -1)
+        self.assertEqual(index.find(""), -1)
+
+    def test_find_across_search_blocks(self):
+        self.write("".join(f"{n}\n" for n in range(50)) + "цель\n")
+        with mock.patch.object(main, "VIEWER_SEARCH_LINES", 4):
+            self.assertEqual(main.open_line_index(self.path).find("цель"), 50)
+
+    def test_gzip_segment(self):
+        path = os.path.join(self.tmp.name, "log.1.txt.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write("один\nдва\n")
+        index = main.open_line_index(path)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.read(1, 2), "два")
+
+
+if __name__ == "__main__":
+    unittest.main()